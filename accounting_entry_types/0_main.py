@@ -18,8 +18,8 @@ def delete_files():
     """删除指定的文件和目录"""
     files_to_delete = [
         'output/accountingentrytypes_localized.json',
-        'output/combined_localization.json',
-        'output/en_multi_lang_mapping.json',
+        'output/localization.sqlite',
+        'output/combined_localization_en_zh.json',
     ]
     print("\n开始重新构建数据资源...")
     # 删除文件
@@ -1,8 +1,12 @@
 import os
 import re
 import shutil
+import sys
 from get_path import get_resfileindex, get_eve_shared_cache_path
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from resfile_index import ResFileIndex  # noqa: E402
+
 def get_localization_pickles():
     """
     从resfileindex.txt文件中搜索本地化pickle文件的信息
@@ -28,23 +32,23 @@ def get_localization_pickles():
         print("无法获取EVE SharedCache路径")
         return {}
     
-    # 正则表达式模式，匹配localization_fsd_[\w-]+.pickle格式的文件
-    pattern = r'res:/localizationfsd/localization_fsd_([\w-]+)\.pickle,([^,]+)'
+    # 匹配localization_fsd_[\w-]+.pickle格式的资源路径
+    pattern = re.compile(r'res:/localizationfsd/localization_fsd_([\w-]+)\.pickle')
     
     # 存储结果的字典
     result = {}
     
     try:
-        # 读取resfileindex.txt文件
-        with open(resfileindex_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        # 查找所有匹配项
-        matches = re.findall(pattern, content)
+        # 加载resfileindex.txt索引（按文件大小和修改时间缓存），只查找本地化目录下的资源
+        index = ResFileIndex.load(resfileindex_path)
         
         # 处理匹配结果，排除语言代码为"main"的情况
-        for lang_code, file_path in matches:
-            if lang_code.lower() != "main":  # 排除"main"语言
+        for resource_path, file_path in index.prefix('res:/localizationfsd/localization_fsd_'):
+            match = pattern.fullmatch(resource_path)
+            if not match:
+                continue
+            lang_code = match.group(1)
+            if lang_code != "main":  # 排除"main"语言
                 # 构建完整的pickle文件路径
                 full_path = os.path.join(cache_path, 'ResFiles', file_path)
                 
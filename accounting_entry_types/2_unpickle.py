@@ -94,11 +94,6 @@ def unpickle_localization_files():
             with open(json_file, 'w', encoding='utf-8') as f:
                 json.dump(processed_data, f, ensure_ascii=False, indent=2)
             
-            # 同时保存原始pickle格式（以防需要）
-            pickle_output = os.path.join(lang_dir, f"{lang_code}_localization.pkl")
-            with open(pickle_output, 'wb') as f:
-                pickle.dump(processed_data, f)
-            
             print(f"已解包: {pickle_file} -> {lang_dir}")
             result[lang_code] = processed_data
             
@@ -7,8 +7,11 @@
 
 import json
 import os
+import sys
 import glob
-from collections import defaultdict, Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from localization_store import LANGUAGES, create_store, write_language, build_en_mapping  # noqa: E402
 
 def load_json_file(file_path):
     """加载JSON文件"""
@@ -46,6 +49,11 @@ def lang_data_patch(entry_id, lang_code, lang_data):
               }.get(lang_code, lang_data[entry_id]["text"])
     return lang_data[entry_id]["text"]
 
+def iter_language_texts(lang_code, lang_data):
+    """一种语言的 (消息ID, 文本)，应用文本修补"""
+    for entry_id in lang_data:
+        yield int(entry_id), lang_data_patch(entry_id, lang_code, lang_data)
+
 def main():
     # 获取基础目录
     base_dir = os.path.dirname(os.path.abspath(__file__))
@@ -54,104 +62,54 @@ def main():
     # 获取所有语言目录
     language_dirs = [d for d in glob.glob(os.path.join(extra_dir, "*")) if os.path.isdir(d)]
     
-    # 加载所有语言的本地化数据
-    localization_data = {}
+    # 逐个语言写入本地化存储，同一时间只有一种语言的数据在内存中
+    store_file = os.path.join(base_dir, "output", "localization.sqlite")
+    conn = create_store(store_file)
+    loaded_languages = []
     for lang_dir in language_dirs:
         lang_code = get_language_code(lang_dir)
         json_file = os.path.join(lang_dir, f"{lang_code}_localization.json")
-        if os.path.exists(json_file):
-            localization_data[lang_code] = load_json_file(json_file)
-            print(f"已加载 {lang_code} 的本地化数据")
-    
-    # 创建合并后的数据结构
-    combined_data = {}
+        if not os.path.exists(json_file):
+            continue
+        if lang_code not in LANGUAGES:
+            print(f"跳过不支持的语言: {lang_code}")
+            continue
+        lang_data = load_json_file(json_file)
+        write_language(conn, lang_code, iter_language_texts(lang_code, lang_data))
+        conn.commit()
+        loaded_languages.append(lang_code)
+        del lang_data
+        print(f"已写入 {lang_code} 的本地化数据")
     
-    # 获取所有ID
-    all_ids = set()
-    for lang_data in localization_data.values():
-        all_ids.update(lang_data.keys())
-    
-    # 合并所有语言的文本
-    for entry_id in all_ids:
-        combined_data[entry_id] = {}
-        
-        # 从每种语言中获取文本
-        for lang_code, lang_data in localization_data.items():
-            if entry_id in lang_data:
-                combined_data[entry_id][lang_code] = lang_data_patch(entry_id, lang_code, lang_data)
-    
-    # 保存合并后的JSON文件
-    output_file = os.path.join(base_dir, "output", "combined_localization.json")
-    save_json_file(combined_data, output_file)
-    
-    print(f"合并完成！共处理了 {len(combined_data)} 个条目，包含 {len(localization_data)} 种语言。")
+    entry_count = conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+    print(f"合并完成！共处理了 {entry_count} 个条目，包含 {len(loaded_languages)} 种语言。")
 
-    # 创建合并后的数据结构
+    # 导出en/zh精简文本
     combined_data = {}
-
-    # 获取所有ID
-    all_ids = set()
-    for lang_data in localization_data.values():
-        all_ids.update(lang_data.keys())
-
-    # 合并所有语言的文本
-    for entry_id in all_ids:
-        combined_data[entry_id] = {}
-
-        # 从每种语言中获取文本
-        for lang_code, lang_data in localization_data.items():
-            if entry_id in lang_data and lang_code in ["en", "zh"]:
-                combined_data[entry_id][lang_code] = lang_data[entry_id]["text"]
+    for entry_id, en_text, zh_text in conn.execute("SELECT message_id, en, zh FROM messages"):
+        texts = {}
+        if en_text is not None:
+            texts["en"] = en_text
+        if zh_text is not None:
+            texts["zh"] = zh_text
+        combined_data[str(entry_id)] = texts
 
     # 保存合并后的JSON文件
     output_file = os.path.join(base_dir, "output", "combined_localization_en_zh.json")
     save_json_file(combined_data, output_file)
+    del combined_data
 
-    print(f"合并zh精简文本完成！共处理了 {len(combined_data)} 个条目，包含 {len(localization_data)} 种语言。")
+    print(f"合并zh精简文本完成！")
 
-    # 创建英文到多种语言的映射
-    en_to_multi_lang = {}
-    # 用于记录每个英文文本出现的次数
-    en_count = {}
-    # 用于记录每个英文文本对应的所有本地化文本
-    en_translations = defaultdict(list)
-    
-    # 遍历所有条目，统计每个英文文本出现的次数和对应的本地化文本
-    for entry_id, translations in combined_data.items():
-        if "en" in translations:
-            en_text = translations["en"]
-            en_count[en_text] = en_count.get(en_text, 0) + 1
-            
-            # 收集每种语言的翻译
-            for lang_code, lang_text in translations.items():
-                if lang_code != "en":  # 不包含英文本身
-                    en_translations[en_text].append((lang_code, lang_text))
-    
-    # 处理英文到多种语言的映射
-    for en_text, translations_list in en_translations.items():
-        # 按语言代码分组
-        lang_translations = defaultdict(list)
-        for lang_code, lang_text in translations_list:
-            lang_translations[lang_code].append(lang_text)
-        
-        # 对于每种语言，选择出现次数最多的翻译
-        multi_lang_translations = {}
-        for lang_code, texts in lang_translations.items():
-            # 使用Counter统计每个翻译出现的次数
-            text_counter = Counter(texts)
-            # 选择出现次数最多的翻译
-            most_common_text = text_counter.most_common(1)[0][0]
-            multi_lang_translations[lang_code] = most_common_text
-        
-        # 添加到映射中
-        if multi_lang_translations:  # 确保至少有一种其他语言的翻译
-            en_to_multi_lang[en_text] = multi_lang_translations
-    
-    # 保存英文到多种语言的映射
-    en_multi_lang_file = os.path.join(base_dir, "output", "en_multi_lang_mapping.json")
-    save_json_file(en_to_multi_lang, en_multi_lang_file)
+    # 创建英文到多种语言的映射：每种语言选择出现次数最多的翻译
+    build_en_mapping(conn)
+    conn.commit()
+    mapping_count = conn.execute("SELECT COUNT(*) FROM en_mapping").fetchone()[0]
+    conn.execute("VACUUM")
+    conn.close()
     
-    print(f"英文到多种语言的映射完成！共处理了 {len(en_to_multi_lang)} 个英文条目。")
+    print(f"英文到多种语言的映射完成！共处理了 {mapping_count} 个英文条目。")
+    print(f"本地化数据已保存到 {store_file}")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
@@ -7,41 +7,37 @@ agent_localization_handler.py
 """
 
 import os
-import json
 import sqlite3
-import glob
-from pathlib import Path
+from localization_store import LOCALIZATION_DB_PATH, open_store
 
 # 定义输出目录和语言列表
 output_db_dir = 'output/db'
 languages = ['en', 'de', 'es', 'fr', 'ja', 'ko', 'ru', 'zh']  # en 务必在第一个否则有些功能可能会有缺失
 
-def load_localization_mapping():
+def load_localization_mapping(english_names):
     """
-    加载英文到多种语言的映射文件
+    从本地化存储中查询英文名称到多种语言的映射，只读取需要的名称
     """
-    mapping_file = os.path.join("accounting_entry_types", "output", "en_multi_lang_mapping.json")
-    
-    if not os.path.exists(mapping_file):
-        print(f"错误：找不到本地化映射文件 {mapping_file}")
+    store = open_store()
+    if store is None:
         return None
     
     try:
-        with open(mapping_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        with store:
+            return store.translate_en_many(english_names)
     except Exception as e:
-        print(f"加载本地化映射文件时出错: {e}")
+        print(f"加载本地化映射时出错: {e}")
         return None
 
 def update_agents_localization():
     """
     更新agents表的本地化信息
     """
-    # 加载本地化映射
-    localization_mapping = load_localization_mapping()
-    if not localization_mapping:
+    if not os.path.exists(LOCALIZATION_DB_PATH):
+        print(f"错误：找不到本地化数据库 {LOCALIZATION_DB_PATH}")
         return False
     
+    localization_mapping = None
     # 确保输出目录存在
     os.makedirs(output_db_dir, exist_ok=True)
     
@@ -81,39 +77,50 @@ def update_agents_localization():
                 print(f"在数据库 {db_filename} 中添加agent_name列")
                 cursor.execute("ALTER TABLE agents ADD COLUMN agent_name TEXT")
             
-            # 获取所有agents记录
+            # 获取所有代理人的英文名称
             cursor.execute("""
-                SELECT a.agent_id, n.itemName 
-                FROM agents a 
+                SELECT DISTINCT n.itemName
+                FROM agents a
                 JOIN invNames n ON a.agent_id = n.itemID
             """)
-            agents = cursor.fetchall()
+            english_names = [row[0] for row in cursor.fetchall()]
+            
+            # 各数据库的代理人英文名称相同，只在第一次查询本地化映射
+            if localization_mapping is None:
+                localization_mapping = load_localization_mapping(english_names)
+                if localization_mapping is None:
+                    return False
+            
+            # 当前语言的映射写入临时表，再用一条 UPDATE ... FROM 联表更新，找不到本地化文本时使用原始英文名称
+            cursor.execute("DROP TABLE IF EXISTS temp.agent_name_mapping")
+            cursor.execute("""
+                CREATE TEMP TABLE agent_name_mapping (
+                    english_name TEXT NOT NULL PRIMARY KEY,
+                    localized_name TEXT NOT NULL
+                ) WITHOUT ROWID
+            """)
+            cursor.executemany(
+                "INSERT INTO agent_name_mapping (english_name, localized_name) VALUES (?, ?)",
+                [(name, localization_mapping[name][lang]) for name in english_names
+                 if lang in localization_mapping.get(name, {})]
+            )
+            cursor.execute("""
+                UPDATE agents
+                SET agent_name = COALESCE(m.localized_name, n.itemName)
+                FROM invNames n
+                LEFT JOIN agent_name_mapping m ON m.english_name = n.itemName
+                WHERE n.itemID = agents.agent_id
+            """)
             
-            # 更新每条记录的agent_name
-            updated_count = 0
-            not_found_count = 0
-            for agent_id, english_name in agents:
-                # 查找对应的本地化文本
-                if english_name in localization_mapping and lang in localization_mapping[english_name]:
-                    localized_name = localization_mapping[english_name][lang]
-                    
-                    # 更新agent_name
-                    cursor.execute("""
-                        UPDATE agents 
-                        SET agent_name = ? 
-                        WHERE agent_id = ?
-                    """, (localized_name, agent_id))
-                    
-                    updated_count += 1
-                else:
-                    # 如果找不到本地化文本，使用原始英文名称
-                    cursor.execute("""
-                        UPDATE agents 
-                        SET agent_name = ? 
-                        WHERE agent_id = ?
-                    """, (english_name, agent_id))
-                    
-                    not_found_count += 1
+            # 统计更新结果
+            cursor.execute("""
+                SELECT COUNT(m.localized_name), COUNT(*) - COUNT(m.localized_name)
+                FROM agents a
+                JOIN invNames n ON a.agent_id = n.itemID
+                LEFT JOIN agent_name_mapping m ON m.english_name = n.itemName
+            """)
+            updated_count, not_found_count = cursor.fetchone()
+            cursor.execute("DROP TABLE temp.agent_name_mapping")
             
             # 提交更改
             conn.commit()
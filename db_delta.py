@@ -0,0 +1,364 @@
+# -*- coding: utf-8 -*-
+"""
+数据库版本间的增量补丁
+
+每次发布时 App 只需要下载与上一版数据库的差异，而不是完整的 item_db_{lang}.sqlite.zip。
+与 whatsNew.compare_databases 一样按表、按主键比较，但输出的是可以直接执行的行级变更集：
+
+    python db_delta.py build output_old/db output/db output/delta     # 生成各语言的补丁
+    python db_delta.py apply output_old/db/item_db_zh.sqlite output/delta/item_db_zh.delta.json.gz
+
+补丁（gzip 压缩的 JSON）内容：
+- base_digest / target_digest: 旧、新数据库的内容摘要（所有表的结构和按主键排序的行）
+- ops: 按顺序执行的 [{"sql": ..., "rows": [[...], ...]}, ...]
+    - 结构变化的表、新增的表整体重建；删除的表直接删除
+    - 结构不变的表：按主键删除旧版独有的记录，INSERT OR REPLACE 新增和修改的记录；没有主键的表整体替换
+    - FTS5 / R*Tree 虚拟表内容变化时重建（外部内容的 FTS5 使用 rebuild 命令）
+    - 索引、视图、触发器按 SQL 比较，变化时删除后重新创建
+
+应用补丁时先校验数据库的摘要与 base_digest 一致，再在一个事务中执行所有变更，
+提交前校验结果的摘要与 target_digest 一致，不一致则整体回滚，数据库保持原样。
+"""
+import argparse
+import base64
+import gzip
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# 支持的语言列表
+LANGUAGES = ['en', 'de', 'es', 'fr', 'ja', 'ko', 'ru', 'zh']
+
+DELTA_FORMAT_VERSION = 1
+MANIFEST_FILENAME = 'deltas.json'
+
+# 每个变更项的最大行数，过大的 executemany 拆成多项
+ROWS_PER_OP = 5000
+
+VIRTUAL_MODULE_PATTERN = re.compile(r'USING\s+(\w+)', re.IGNORECASE)
+EXTERNAL_CONTENT_PATTERN = re.compile(r"content\s*=\s*'[^']+'", re.IGNORECASE)
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _json_default(value):
+    if isinstance(value, bytes):
+        return {'$b': base64.b64encode(value).decode('ascii')}
+    raise TypeError(f"无法序列化的值: {value!r}")
+
+
+def _json_object_hook(obj):
+    if len(obj) == 1 and '$b' in obj:
+        return base64.b64decode(obj['$b'])
+    return obj
+
+
+class Schema:
+    """一个数据库（main 或 ATTACH 的别名）中的表和其他对象"""
+
+    def __init__(self, conn: sqlite3.Connection, schema: str = 'main'):
+        rows = conn.execute(
+            f"SELECT type, name, tbl_name, sql FROM {schema}.sqlite_master WHERE sql IS NOT NULL"
+        ).fetchall()
+        tables = {name: sql for kind, name, _, sql in rows if kind == 'table' and not name.startswith('sqlite_')}
+        self.virtual = {
+            name: sql for name, sql in tables.items() if sql.upper().startswith('CREATE VIRTUAL TABLE')
+        }
+        # 虚拟表的内部表由虚拟表自己维护
+        self.tables = {
+            name: sql for name, sql in tables.items()
+            if name not in self.virtual and not any(name.startswith(f'{table}_') for table in self.virtual)
+        }
+        self.objects = {
+            name: (kind, tbl_name, sql) for kind, name, tbl_name, sql in rows if kind in ('index', 'view', 'trigger')
+        }
+
+
+def _columns(conn: sqlite3.Connection, schema: str, table: str) -> List[Tuple[str, int]]:
+    """[(列名, 主键序号), ...]"""
+    return [(row[1], row[5]) for row in conn.execute(f'PRAGMA {schema}.table_info({_quote(table)})')]
+
+
+def _primary_key(columns: List[Tuple[str, int]]) -> List[str]:
+    return [name for name, pk in sorted(columns, key=lambda column: column[1]) if pk]
+
+
+def _select_sql(conn: sqlite3.Connection, schema: str, table: str, virtual: bool) -> str:
+    """按确定顺序读取整张表的 SQL，虚拟表带上 rowid"""
+    columns = _columns(conn, schema, table)
+    names = [name for name, _ in columns]
+    order = _primary_key(columns) or names
+    select = ', '.join(_quote(name) for name in names)
+    if virtual:
+        return f'SELECT rowid, {select} FROM {schema}.{_quote(table)} ORDER BY rowid'
+    return f"SELECT {select} FROM {schema}.{_quote(table)} ORDER BY {', '.join(_quote(name) for name in order)}"
+
+
+def table_digest(conn: sqlite3.Connection, schema: str, table: str, sql: str, virtual: bool = False) -> str:
+    """一张表的结构和所有行的摘要"""
+    digest = hashlib.sha256(sql.encode('utf-8'))
+    for row in conn.execute(_select_sql(conn, schema, table, virtual)):
+        digest.update(repr(row).encode('utf-8'))
+        digest.update(b'\n')
+    return digest.hexdigest()
+
+
+def database_digest(conn: sqlite3.Connection, schema: str = 'main') -> Tuple[str, Dict[str, str]]:
+    """
+    数据库的内容摘要
+
+    Returns:
+        (整体摘要, {表名: 表摘要})
+    """
+    info = Schema(conn, schema)
+    tables = {name: table_digest(conn, schema, name, sql) for name, sql in info.tables.items()}
+    tables.update({name: table_digest(conn, schema, name, sql, virtual=True) for name, sql in info.virtual.items()})
+
+    digest = hashlib.sha256()
+    for name in sorted(tables):
+        digest.update(f'table {name} {tables[name]}\n'.encode('utf-8'))
+    for name in sorted(info.objects):
+        digest.update(f'{info.objects[name]!r}\n'.encode('utf-8'))
+    return digest.hexdigest(), tables
+
+
+def _rows_ops(sql: str, rows: List[tuple]) -> List[dict]:
+    return [{'sql': sql, 'rows': [list(row) for row in rows[start:start + ROWS_PER_OP]]}
+            for start in range(0, len(rows), ROWS_PER_OP)]
+
+
+def _insert_sql(table: str, names: Sequence[str], replace: bool = False) -> str:
+    verb = 'INSERT OR REPLACE' if replace else 'INSERT'
+    return (f"{verb} INTO {_quote(table)} ({', '.join(_quote(name) for name in names)}) "
+            f"VALUES ({', '.join('?' * len(names))})")
+
+
+def _copy_table_ops(conn: sqlite3.Connection, table: str) -> List[dict]:
+    """用新数据库中的全部行填充一张表"""
+    names = [name for name, _ in _columns(conn, 'main', table)]
+    rows = conn.execute(_select_sql(conn, 'main', table, virtual=False)).fetchall()
+    return _rows_ops(_insert_sql(table, names), rows)
+
+
+def _table_diff_ops(conn: sqlite3.Connection, table: str) -> List[dict]:
+    """结构相同的表：按主键删除旧记录，写入新增和修改的记录"""
+    columns = _columns(conn, 'main', table)
+    names = [name for name, _ in columns]
+    primary_key = _primary_key(columns)
+    if not primary_key:
+        return [{'sql': f'DELETE FROM {_quote(table)}'}] + _copy_table_ops(conn, table)
+
+    key_list = ', '.join(_quote(name) for name in primary_key)
+    column_list = ', '.join(_quote(name) for name in names)
+    deleted = conn.execute(
+        f'SELECT {key_list} FROM old.{_quote(table)} EXCEPT SELECT {key_list} FROM main.{_quote(table)}'
+    ).fetchall()
+    upserted = conn.execute(
+        f'SELECT {column_list} FROM main.{_quote(table)} EXCEPT SELECT {column_list} FROM old.{_quote(table)}'
+    ).fetchall()
+
+    where = ' AND '.join(f'{_quote(name)} = ?' for name in primary_key)
+    return (_rows_ops(f'DELETE FROM {_quote(table)} WHERE {where}', deleted)
+            + _rows_ops(_insert_sql(table, names, replace=True), upserted))
+
+
+def _virtual_table_ops(conn: sqlite3.Connection, table: str, sql: str) -> List[dict]:
+    """重建虚拟表：外部内容的 FTS5 用 rebuild 命令，其他虚拟表写入全部行"""
+    ops = [{'sql': sql}]
+    module = VIRTUAL_MODULE_PATTERN.search(sql)
+    module = module.group(1).lower() if module else ''
+    if module == 'fts5' and EXTERNAL_CONTENT_PATTERN.search(sql):
+        ops.append({'sql': f"INSERT INTO {_quote(table)}({_quote(table)}) VALUES ('rebuild')"})
+        return ops
+
+    names = [name for name, _ in _columns(conn, 'main', table)]
+    rows = conn.execute(_select_sql(conn, 'main', table, virtual=True)).fetchall()
+    if module == 'rtree':
+        # R*Tree 的 rowid 就是第一列
+        ops += _rows_ops(_insert_sql(table, names), [row[1:] for row in rows])
+    else:
+        ops += _rows_ops(_insert_sql(table, ['rowid'] + names), rows)
+    return ops
+
+
+def build_delta(old_db_path: str, new_db_path: str) -> dict:
+    """比较两个数据库，生成把旧数据库变为新数据库的补丁"""
+    conn = sqlite3.connect(f'file:{new_db_path}?mode=ro', uri=True)
+    try:
+        conn.execute('ATTACH DATABASE ? AS old', (f'file:{old_db_path}?mode=ro',))
+        old, new = Schema(conn, 'old'), Schema(conn, 'main')
+        base_digest, old_tables = database_digest(conn, 'old')
+        target_digest, new_tables = database_digest(conn, 'main')
+
+        pre_ops, data_ops, post_ops = [], [], []
+        recreated = set()
+
+        # 删除的表和结构变化的表
+        for table in sorted(set(old.tables) | set(old.virtual)):
+            old_sql = old.tables.get(table) or old.virtual.get(table)
+            new_sql = new.tables.get(table) or new.virtual.get(table)
+            if new_sql is None or new_sql != old_sql or (table in new.virtual and old_tables[table] != new_tables[table]):
+                pre_ops.append({'sql': f'DROP TABLE IF EXISTS {_quote(table)}'})
+                recreated.add(table)
+
+        # 变化或删除的索引、视图、触发器先删除
+        for name, (kind, tbl_name, sql) in sorted(old.objects.items()):
+            if new.objects.get(name) != (kind, tbl_name, sql):
+                pre_ops.append({'sql': f'DROP {kind.upper()} IF EXISTS {_quote(name)}'})
+
+        # 普通表：新建的整体写入，结构相同的按主键比较
+        for table, sql in sorted(new.tables.items()):
+            if table not in old.tables or table in recreated:
+                recreated.add(table)
+                data_ops.append({'sql': sql})
+                data_ops += _copy_table_ops(conn, table)
+            elif old_tables[table] != new_tables[table]:
+                data_ops += _table_diff_ops(conn, table)
+
+        # 虚拟表在普通表更新之后重建（外部内容的 FTS5 依赖内容表）
+        for table, sql in sorted(new.virtual.items()):
+            if table not in old.virtual or table in recreated:
+                post_ops += _virtual_table_ops(conn, table, sql)
+
+        # 新增、变化的对象，以及重建的表上的对象
+        for name, (kind, tbl_name, sql) in sorted(new.objects.items()):
+            if old.objects.get(name) != (kind, tbl_name, sql) or tbl_name in recreated:
+                post_ops.append({'sql': f'DROP {kind.upper()} IF EXISTS {_quote(name)}'})
+                post_ops.append({'sql': sql})
+    finally:
+        conn.close()
+
+    return {
+        'format': DELTA_FORMAT_VERSION,
+        'base_digest': base_digest,
+        'target_digest': target_digest,
+        'ops': pre_ops + data_ops + post_ops,
+    }
+
+
+def write_delta(delta: dict, path: str):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    payload = json.dumps(delta, ensure_ascii=False, separators=(',', ':'), default=_json_default)
+    with gzip.open(path, 'wb', compresslevel=9) as f:
+        f.write(payload.encode('utf-8'))
+
+
+def read_delta(path: str) -> dict:
+    with gzip.open(path, 'rb') as f:
+        delta = json.loads(f.read().decode('utf-8'), object_hook=_json_object_hook)
+    if delta.get('format') != DELTA_FORMAT_VERSION:
+        raise ValueError(f"不支持的补丁格式: {delta.get('format')!r}")
+    return delta
+
+
+def apply_delta(db_path: str, delta: dict, vacuum: bool = False) -> int:
+    """
+    在一个事务中应用补丁，执行前后都校验摘要，失败时回滚
+
+    Returns:
+        写入和删除的行数
+    """
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            if database_digest(conn)[0] != delta['base_digest']:
+                raise ValueError(f"数据库 {db_path} 与补丁的基础版本不一致")
+
+            affected = 0
+            for op in delta['ops']:
+                if 'rows' in op:
+                    cursor = conn.executemany(op['sql'], op['rows'])
+                    affected += max(cursor.rowcount, 0)
+                else:
+                    conn.execute(op['sql'])
+
+            if database_digest(conn)[0] != delta['target_digest']:
+                raise ValueError(f"应用补丁后 {db_path} 的内容与目标版本不一致")
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        if vacuum:
+            conn.execute('VACUUM')
+        return affected
+    finally:
+        conn.close()
+
+
+def build_delta_file(old_db_path: str, new_db_path: str, delta_path: str) -> dict:
+    """生成并保存一个补丁，返回清单项"""
+    start_time = time.time()
+    delta = build_delta(old_db_path, new_db_path)
+    write_delta(delta, delta_path)
+    with open(delta_path, 'rb') as f:
+        content = f.read()
+    return {
+        'file': os.path.basename(delta_path),
+        'base_digest': delta['base_digest'],
+        'target_digest': delta['target_digest'],
+        'ops': len(delta['ops']),
+        'rows': sum(len(op.get('rows', ())) for op in delta['ops']),
+        'size': len(content),
+        'sha256': hashlib.sha256(content).hexdigest(),
+        'full_size': os.path.getsize(new_db_path),
+        'seconds': round(time.time() - start_time, 2),
+    }
+
+
+def build_all_deltas(old_dir: str, new_dir: str, out_dir: str,
+                     languages: Sequence[str] = LANGUAGES, workers: Optional[int] = None) -> dict:
+    """并行生成各语言的补丁并写入清单"""
+    jobs = {
+        lang: (os.path.join(old_dir, f'item_db_{lang}.sqlite'), os.path.join(new_dir, f'item_db_{lang}.sqlite'),
+               os.path.join(out_dir, f'item_db_{lang}.delta.json.gz'))
+        for lang in languages
+    }
+    jobs = {lang: paths for lang, paths in jobs.items() if os.path.exists(paths[0]) and os.path.exists(paths[1])}
+    if not jobs:
+        raise FileNotFoundError(f"{old_dir} 和 {new_dir} 中没有可以比较的数据库")
+
+    # 摘要和比较主要是 Python 逐行处理，使用进程池
+    with ProcessPoolExecutor(max_workers=workers or min(len(jobs), os.cpu_count() or 1)) as executor:
+        futures = {lang: executor.submit(build_delta_file, *paths) for lang, paths in jobs.items()}
+        manifest = {lang: future.result() for lang, future in futures.items()}
+
+    with open(os.path.join(out_dir, MANIFEST_FILENAME), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return manifest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='生成或应用数据库增量补丁')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = subparsers.add_parser('build', help='比较两个版本的数据库目录，生成各语言的补丁')
+    build_parser.add_argument('old_dir', help='上一版数据库目录，如 output_old/db')
+    build_parser.add_argument('new_dir', help='新数据库目录，如 output/db')
+    build_parser.add_argument('out_dir', help='补丁输出目录')
+
+    apply_parser = subparsers.add_parser('apply', help='把补丁应用到数据库')
+    apply_parser.add_argument('db_path', help='要更新的数据库')
+    apply_parser.add_argument('delta_path', help='补丁文件')
+    apply_parser.add_argument('--vacuum', action='store_true', help='应用后整理数据库文件')
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        manifest = build_all_deltas(args.old_dir, args.new_dir, args.out_dir)
+        for lang, entry in manifest.items():
+            print(f"{lang}: 补丁 {entry['size'] / 1024:.1f}KB（{entry['rows']} 行，{entry['ops']} 项变更），"
+                  f"完整数据库 {entry['full_size'] / 1024 / 1024:.2f}MB，耗时 {entry['seconds']:.2f} 秒")
+    else:
+        affected = apply_delta(args.db_path, read_delta(args.delta_path), vacuum=args.vacuum)
+        print(f"补丁已应用到 {args.db_path}，变更 {affected} 行，校验通过")
+
+
+if __name__ == "__main__":
+    main()
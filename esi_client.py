@@ -0,0 +1,329 @@
+# -*- coding: utf-8 -*-
+"""
+ESI 爬虫共享的异步HTTP客户端
+
+所有爬虫（fetchUniverse、fetchTypes、fetchIcons、mapGenerator 等）共用同一个
+EsiClient，由一个令牌桶统一控制请求速率，而不是各自写死批大小/信号量/线程数。
+
+令牌桶的速率根据 ESI 的错误限额响应头自适应调整（AIMD）：
+- 请求成功且错误余量充足时，速率线性增加，直到 max_rate
+- 错误余量低于阈值、或遇到 420/429/5xx 时，速率减半；
+  错误余量耗尽时暂停所有请求直到 X-ESI-Error-Limit-Reset 给出的窗口结束
+"""
+import asyncio
+import json
+import logging
+import random
+import ssl
+import time
+from typing import Any, Awaitable, Callable, Iterable, List, Optional
+
+import aiohttp
+from multidict import CIMultiDict
+
+try:
+    import certifi
+except ImportError:
+    certifi = None
+
+logger = logging.getLogger(__name__)
+
+# ESI 错误限额响应头
+ERROR_LIMIT_REMAIN_HEADER = 'X-ESI-Error-Limit-Remain'
+ERROR_LIMIT_RESET_HEADER = 'X-ESI-Error-Limit-Reset'
+PAGES_HEADER = 'X-Pages'
+
+# ESI 分页接口每页的最大条数
+PAGE_SIZE = 1000
+
+# 错误余量低于该值时开始降速
+ERROR_LIMIT_LOW_WATER = 20
+# 错误余量低于该值时暂停到重置窗口结束
+ERROR_LIMIT_PAUSE_WATER = 5
+
+# 需要重试的状态码
+RETRY_STATUSES = {420, 429, 500, 502, 503, 504}
+
+
+class EsiError(Exception):
+    """请求最终失败（重试耗尽或返回非 2xx 状态码）"""
+
+    def __init__(self, url: str, status: Optional[int] = None, message: str = ''):
+        super().__init__(f"{url}: HTTP {status} {message}".strip() if status else f"{url}: {message}")
+        self.url = url
+        self.status = status
+
+
+class EsiResponse:
+    """一次请求的结果，只保留状态码、响应头（不区分大小写）和响应体"""
+
+    __slots__ = ('url', 'status', 'headers', 'body')
+
+    def __init__(self, url: str, status: int, headers: CIMultiDict, body: bytes):
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status < 300
+
+    def text(self, encoding: str = 'utf-8') -> str:
+        return self.body.decode(encoding, errors='replace')
+
+    def json(self) -> Any:
+        return json.loads(self.body)
+
+
+class TokenBucket:
+    """令牌桶限速器，rate 为每秒补充的令牌数，可在运行中调整"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float):
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._updated = now
+
+    def set_rate(self, rate: float):
+        """调整补充速率，已积累的令牌按新容量截断"""
+        self._refill(time.monotonic())
+        self.rate = float(rate)
+        self.capacity = max(1.0, float(rate))
+        self._tokens = min(self._tokens, self.capacity)
+
+    def pause(self, seconds: float):
+        """在接下来的 seconds 秒内不再发放令牌"""
+        now = time.monotonic()
+        self._paused_until = max(self._paused_until, now + seconds)
+        self._tokens = 0.0
+        self._updated = max(self._updated, self._paused_until)
+
+    async def acquire(self):
+        """获取一个令牌，令牌不足时等待"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class EsiClient:
+    """
+    共享的异步请求客户端
+
+    一个进程内的所有爬虫应复用同一个实例：
+        async with EsiClient() as client:
+            data = await client.get_json(url)
+
+    Args:
+        rate: 初始请求速率（请求/秒）
+        min_rate: 降速的下限
+        max_rate: 提速的上限
+        max_connections: 连接池大小，只用于限制同时打开的套接字数
+        max_retries: 单个请求的最大重试次数
+        timeout: 单个请求的总超时（秒）
+        backoff_base: 指数退避的基数（秒），实际等待时间带随机抖动
+    """
+
+    def __init__(self, rate: float = 50, min_rate: float = 5, max_rate: float = 300,
+                 max_connections: int = 100, max_retries: int = 5, timeout: float = 30,
+                 backoff_base: float = 0.5, user_agent: Optional[str] = None):
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.max_connections = max_connections
+        self.max_retries = max_retries
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.backoff_base = backoff_base
+        self.user_agent = user_agent
+        self.bucket = TokenBucket(rate)
+        self.session: Optional[aiohttp.ClientSession] = None
+        self._last_slow_down = 0.0
+        self.stats = {'requests': 0, 'retries': 0, 'errors': 0, 'throttled': 0}
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def open(self):
+        if self.session is not None:
+            return
+        if certifi is not None:
+            ssl_context = ssl.create_default_context(cafile=certifi.where())
+        else:
+            ssl_context = ssl.create_default_context()
+        connector = aiohttp.TCPConnector(ssl=ssl_context, limit=self.max_connections)
+        headers = {'User-Agent': self.user_agent} if self.user_agent else None
+        self.session = aiohttp.ClientSession(connector=connector, timeout=self.timeout, headers=headers)
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+        logger.info(f"请求统计: {self.stats}, 最终速率: {self.bucket.rate:.1f} 请求/秒")
+
+    def _slow_down(self):
+        # 同一时间窗内大量并发请求会同时失败，只按一次处理
+        now = time.monotonic()
+        if now - self._last_slow_down < 1.0:
+            return
+        self._last_slow_down = now
+        new_rate = max(self.min_rate, self.bucket.rate / 2)
+        if new_rate < self.bucket.rate:
+            logger.warning(f"降低请求速率: {self.bucket.rate:.1f} -> {new_rate:.1f} 请求/秒")
+            self.bucket.set_rate(new_rate)
+
+    def _speed_up(self):
+        if self.bucket.rate < self.max_rate:
+            self.bucket.set_rate(min(self.max_rate, self.bucket.rate + 1))
+
+    def _adapt(self, status: int, headers):
+        """根据状态码和错误限额响应头调整速率"""
+        remain = headers.get(ERROR_LIMIT_REMAIN_HEADER)
+        reset = headers.get(ERROR_LIMIT_RESET_HEADER)
+        remain = int(remain) if remain is not None and remain.isdigit() else None
+        reset = int(reset) if reset is not None and reset.isdigit() else None
+
+        if status == 420 or (remain is not None and remain <= ERROR_LIMIT_PAUSE_WATER):
+            # 错误余量耗尽，暂停到窗口重置
+            self.stats['throttled'] += 1
+            pause = (reset or 60) + random.uniform(0, 1)
+            logger.warning(f"ESI 错误余量不足 (remain={remain})，暂停 {pause:.1f} 秒")
+            self.bucket.pause(pause)
+            self._slow_down()
+        elif status in RETRY_STATUSES or (remain is not None and remain < ERROR_LIMIT_LOW_WATER):
+            self._slow_down()
+        elif status < 400:
+            self._speed_up()
+
+    def _backoff(self, attempt: int) -> float:
+        """带完全抖动的指数退避"""
+        return random.uniform(0, self.backoff_base * (2 ** attempt))
+
+    async def request(self, url: str, method: str = 'GET', **kwargs) -> EsiResponse:
+        """
+        发起请求，处理限速与重试
+
+        4xx（除 420/429）直接返回给调用方处理，不重试；
+        网络错误和 RETRY_STATUSES 中的状态码会退避后重试，重试耗尽时抛出异常
+        """
+        if self.session is None:
+            await self.open()
+
+        last_error = None
+        for attempt in range(self.max_retries):
+            await self.bucket.acquire()
+            self.stats['requests'] += 1
+            try:
+                async with self.session.request(method, url, **kwargs) as response:
+                    body = await response.read()
+                    self._adapt(response.status, response.headers)
+                    if response.status not in RETRY_STATUSES:
+                        return EsiResponse(url, response.status, CIMultiDict(response.headers), body)
+                    last_error = EsiError(url, response.status, body[:200].decode('utf-8', errors='replace'))
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                last_error = e
+                self._slow_down()
+
+            if attempt < self.max_retries - 1:
+                self.stats['retries'] += 1
+                delay = self._backoff(attempt)
+                logger.debug(f"请求失败，{delay:.2f} 秒后进行第 {attempt + 2}/{self.max_retries} 次尝试: {url} ({last_error})")
+                await asyncio.sleep(delay)
+
+        self.stats['errors'] += 1
+        logger.error(f"请求失败，重试耗尽: {url}, 错误: {last_error}")
+        if isinstance(last_error, EsiError):
+            raise last_error
+        raise EsiError(url, message=str(last_error)) from last_error
+
+    async def get_json(self, url: str) -> Any:
+        """GET 并解析 JSON，非 2xx 状态码抛出异常"""
+        response = await self.request(url)
+        if not response.ok:
+            raise EsiError(url, response.status, response.text()[:200])
+        return response.json()
+
+    async def get_paginated(self, url: str) -> List[Any]:
+        """
+        按 X-Pages 响应头并发获取所有分页，返回合并后的列表
+
+        没有 X-Pages 响应头但第一页已满时给出警告，并逐页请求直到返回空页或不满一页
+        """
+        separator = '&' if '?' in url else '?'
+        first = await self.request(f"{url}{separator}page=1")
+        if not first.ok:
+            raise EsiError(url, first.status, first.text()[:200])
+        results = list(first.json())
+        pages_header = first.headers.get(PAGES_HEADER)
+        if pages_header is None:
+            if len(results) >= PAGE_SIZE:
+                logger.warning(f"{url} 第一页已满但没有 {PAGES_HEADER} 响应头，逐页请求直到空页")
+                page = 2
+                while True:
+                    response = await self.request(f"{url}{separator}page={page}")
+                    page_data = response.json() if response.ok else []
+                    results.extend(page_data)
+                    if len(page_data) < PAGE_SIZE:
+                        break
+                    page += 1
+            return results
+
+        pages = int(pages_header)
+        if pages > 1:
+            rest = await asyncio.gather(*(self.get_json(f"{url}{separator}page={page}")
+                                          for page in range(2, pages + 1)))
+            for page_data in rest:
+                results.extend(page_data)
+        return results
+
+    async def map(self, func: Callable[[Any], Awaitable[Any]], items: Iterable[Any],
+                  progress: Optional[Callable[[int, int, Any, Any], None]] = None) -> List[Any]:
+        """
+        对 items 中的每一项并发执行 func，并发度完全由令牌桶控制
+
+        异常会作为结果返回而不是中断其他任务；progress(completed, total, item, result)
+        在每一项完成时调用
+        """
+        items = list(items)
+        total = len(items)
+        completed = 0
+
+        async def run(item):
+            nonlocal completed
+            try:
+                result = await func(item)
+            except Exception as e:
+                result = e
+            completed += 1
+            if progress is not None:
+                progress(completed, total, item, result)
+            return result
+
+        return await asyncio.gather(*(run(item) for item in items))
+
+
+def run(coro_factory: Callable[[EsiClient], Awaitable[Any]], **client_kwargs) -> Any:
+    """在新的事件循环中创建共享客户端并运行 coro_factory(client)，供同步脚本调用"""
+    async def runner():
+        async with EsiClient(**client_kwargs) as client:
+            return await coro_factory(client)
+
+    return asyncio.run(runner())
@@ -1,5 +1,6 @@
 # 从eve本地客户端导出图标，但效果不佳，types.yaml 中缺失了很多图标 iconID
 import os
+import sys
 import json
 import yaml
 import requests
@@ -7,6 +8,9 @@ import time
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Dict, Set, List, Optional
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from resfile_index import ResFileIndex
+
 class LocalIconFetcher:
     def __init__(self):
         # 硬编码的配置
@@ -164,36 +168,21 @@ class LocalIconFetcher:
         print(f"Parsed {len(iconid_to_iconfile)} iconID to iconFile mappings from iconIDs.yaml")
         return iconid_to_iconfile
     
-    def parse_resfileindex(self) -> Dict[str, str]:
-        """Parse resfileindex.txt file, return resource path to file path mapping"""
-        print("Parsing resfileindex.txt file...")
+    def parse_resfileindex(self) -> ResFileIndex:
+        """Load resfileindex.txt index (cached by file size and mtime), mapping resource path to file path"""
+        print("Loading resfileindex.txt index...")
         
         if not os.path.exists(self.resfileindex_path):
             raise FileNotFoundError(f"resfileindex.txt file not found: {self.resfileindex_path}")
         
-        resource_to_filepath = {}
-        
-        with open(self.resfileindex_path, 'r', encoding='utf-8') as f:
-            for line_num, line in enumerate(f, 1):
-                line = line.strip()
-                if not line:
-                    continue
-                
-                parts = line.split(',')
-                if len(parts) >= 2:
-                    resource_path = parts[0].lower()  # res:/staticdata/skillplans.fsdbinary
-                    file_path = parts[1].lower()      # c7/c7def626ddcfd142_38da240ee9fa6fc94f4993218d5aac53
-                    resource_to_filepath[resource_path] = file_path
-                else:
-                    print(f"Warning: Line {line_num} format incorrect: {line}")
-        
-        print(f"Parsed {len(resource_to_filepath)} resource mappings from resfileindex.txt")
+        resource_to_filepath = ResFileIndex.load(self.resfileindex_path)
+        print(f"Loaded {len(resource_to_filepath)} resource mappings from resfileindex.txt")
         return resource_to_filepath
     
     def generate_typeid_to_filepath_mapping(self, type_ids: List[int], 
                                           typeid_to_iconid: Dict[int, int],
                                           iconid_to_iconfile: Dict[int, str],
-                                          resource_to_filepath: Dict[str, str]) -> Dict[int, str]:
+                                          resource_to_filepath: ResFileIndex) -> Dict[int, str]:
         """Generate mapping from typeid to local file path"""
         print("Generating typeid to file path mapping...")
         
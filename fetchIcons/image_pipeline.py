@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+"""
+图标处理流水线
+
+用进程池并行处理整个图标目录：缩放超过目标尺寸的图片、去除元数据、重新编码为优化过的 PNG（或无损 WebP）。
+- 去重：先并行计算解码后像素的哈希，像素完全相同的图片只编码一次，其余直接复制编码结果
+- 增量：处理结果记录在输出目录的 PIPELINE_CACHE_FILENAME 中，源文件未变化且输出存在时跳过
+
+用法：
+    from image_pipeline import run_pipeline
+    run_pipeline('icon_from_api_and_client')                 # 原地处理
+    run_pipeline('icon_from_api', 'icon_webp', fmt='webp')   # 输出到其他目录
+"""
+import hashlib
+import json
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from PIL import Image
+
+# 图标的最大尺寸，超过时缩放到该尺寸
+TARGET_SIZE = (64, 64)
+
+# 支持的输出格式
+OUTPUT_FORMATS = ('png', 'webp')
+
+# 记录已处理文件的缓存
+PIPELINE_CACHE_FILENAME = '.image_pipeline_cache.json'
+
+# 每个任务批次交给工作进程的文件数
+CHUNK_SIZE = 64
+
+# 可以直接取像素数据的模式，其他模式（如调色板）先转换为 RGBA
+DIRECT_MODES = ('RGB', 'RGBA', 'L', 'LA')
+
+
+def _load_pixels(source_path: str, target_size: Tuple[int, int]) -> Image.Image:
+    """解码并按需缩放，返回不带任何元数据的新图片"""
+    with Image.open(source_path) as img:
+        if img.mode not in DIRECT_MODES:
+            img = img.convert('RGBA')
+        if img.size[0] > target_size[0] or img.size[1] > target_size[1]:
+            # 使用高质量的重采样算法压缩图片
+            img = img.resize(target_size, Image.Resampling.LANCZOS)
+        # 只保留像素，丢弃 EXIF、ICC、文本块等元数据
+        return Image.frombytes(img.mode, img.size, img.tobytes())
+
+
+def pixel_hash(source_path: str) -> Optional[str]:
+    """解码后像素的哈希（包含模式和尺寸），无法解码时返回 None"""
+    try:
+        with Image.open(source_path) as img:
+            if img.mode not in DIRECT_MODES:
+                img = img.convert('RGBA')
+            digest = hashlib.sha256(f'{img.mode}:{img.size[0]}x{img.size[1]}:'.encode())
+            digest.update(img.tobytes())
+            return digest.hexdigest()
+    except Exception as e:
+        print(f"读取文件 {source_path} 时出错: {e}")
+        return None
+
+
+def encode_image(task: Tuple[str, str, Tuple[int, int], str]) -> Optional[str]:
+    """
+    处理一张图片并写入输出路径
+
+    Args:
+        task: (源路径, 输出路径, 目标尺寸, 输出格式)
+
+    Returns:
+        出错时返回错误信息，成功返回 None
+    """
+    source_path, output_path, target_size, fmt = task
+    try:
+        img = _load_pixels(source_path, target_size)
+        # 先写临时文件再替换，原地处理时不会因中途出错损坏源文件
+        temp_path = output_path + '.tmp'
+        if fmt == 'webp':
+            img.save(temp_path, 'WEBP', lossless=True, method=6)
+        else:
+            img.save(temp_path, 'PNG', optimize=True)
+        os.replace(temp_path, output_path)
+        return None
+    except Exception as e:
+        return f"处理文件 {source_path} 时出错: {e}"
+
+
+def _signature(path: str) -> List[int]:
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def _load_cache(cache_path: str, options: dict) -> Dict[str, list]:
+    """读取已处理文件的记录，处理参数变化时全部失效"""
+    if not os.path.exists(cache_path):
+        return {}
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except Exception as e:
+        print(f"读取缓存 {cache_path} 时出错: {e}")
+        return {}
+    if cache.get('options') != options:
+        return {}
+    return cache.get('files', {})
+
+
+def _output_name(filename: str, fmt: str) -> str:
+    return os.path.splitext(filename)[0] + '.' + fmt
+
+
+def run_pipeline(source_dir: str, output_dir: Optional[str] = None, target_size: Tuple[int, int] = TARGET_SIZE,
+                 fmt: str = 'png', workers: Optional[int] = None) -> Dict[str, int]:
+    """
+    并行处理 source_dir 中的所有 PNG 图标
+
+    Args:
+        source_dir: 源图标目录
+        output_dir: 输出目录，默认原地处理
+        target_size: 最大尺寸，超过时缩放
+        fmt: 输出格式，'png' 或 'webp'
+        workers: 进程数，默认为 CPU 核心数
+
+    Returns:
+        统计信息 {'total', 'skipped', 'encoded', 'deduplicated', 'errors'}
+    """
+    if fmt not in OUTPUT_FORMATS:
+        raise ValueError(f"不支持的输出格式: {fmt}")
+    output_dir = output_dir or source_dir
+    os.makedirs(output_dir, exist_ok=True)
+
+    cache_path = os.path.join(output_dir, PIPELINE_CACHE_FILENAME)
+    options = {'size': list(target_size), 'format': fmt, 'source_dir': os.path.abspath(source_dir)}
+    cache = _load_cache(cache_path, options)
+
+    filenames = sorted(f for f in os.listdir(source_dir) if f.lower().endswith('.png'))
+    stats = {'total': len(filenames), 'skipped': 0, 'encoded': 0, 'deduplicated': 0, 'errors': 0}
+
+    # 源文件与上次处理后的记录一致且输出存在时跳过
+    pending = []
+    for filename in filenames:
+        output_path = os.path.join(output_dir, _output_name(filename, fmt))
+        if cache.get(filename) == _signature(os.path.join(source_dir, filename)) and os.path.exists(output_path):
+            stats['skipped'] += 1
+        else:
+            pending.append(filename)
+    print(f"共 {len(filenames)} 个图标，{stats['skipped']} 个已是最新，{len(pending)} 个待处理")
+
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # 第一步：并行计算像素哈希，按哈希分组
+            source_paths = [os.path.join(source_dir, filename) for filename in pending]
+            groups: Dict[str, List[str]] = {}
+            for filename, digest in zip(pending, executor.map(pixel_hash, source_paths, chunksize=CHUNK_SIZE)):
+                if digest is None:
+                    stats['errors'] += 1
+                    continue
+                groups.setdefault(digest, []).append(filename)
+
+            # 第二步：每组只编码第一张图片
+            tasks = [
+                (os.path.join(source_dir, names[0]), os.path.join(output_dir, _output_name(names[0], fmt)),
+                 tuple(target_size), fmt)
+                for names in groups.values()
+            ]
+            failed = set()
+            for names, error in zip(groups.values(), executor.map(encode_image, tasks, chunksize=CHUNK_SIZE)):
+                if error:
+                    print(error)
+                    stats['errors'] += len(names)
+                    failed.add(names[0])
+                else:
+                    stats['encoded'] += 1
+
+        # 第三步：同组的其他图片复制编码结果，并记录处理后的源文件状态
+        for names in groups.values():
+            if names[0] in failed:
+                continue
+            canonical_output = os.path.join(output_dir, _output_name(names[0], fmt))
+            for filename in names[1:]:
+                shutil.copyfile(canonical_output, os.path.join(output_dir, _output_name(filename, fmt)))
+                stats['deduplicated'] += 1
+            for filename in names:
+                cache[filename] = _signature(os.path.join(source_dir, filename))
+
+    # 清理已不存在的源文件记录
+    present = set(filenames)
+    cache = {filename: signature for filename, signature in cache.items() if filename in present}
+    with open(cache_path, 'w', encoding='utf-8') as f:
+        json.dump({'options': options, 'files': cache}, f)
+
+    print(f"编码 {stats['encoded']} 个，像素重复直接复制 {stats['deduplicated']} 个，错误 {stats['errors']} 个")
+    return stats
@@ -2,6 +2,7 @@ import os
 import shutil
 import time
 from PIL import Image
+from image_pipeline import PIPELINE_CACHE_FILENAME
 
 
 def get_file_size(image_path):
@@ -236,7 +237,8 @@ def copy_icons_from_source(source_dir):
         print(f"源目录 {source_dir} 不存在！")
         return
 
-    files = os.listdir(source_dir)
+    # 跳过图标处理流水线的缓存记录
+    files = [f for f in os.listdir(source_dir) if f != PIPELINE_CACHE_FILENAME]
     total_files = len(files)
     copied = 0
     replaced = 0
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+图标图集
+
+把数据库中使用的 32px / 64px 小图标（如 items_*_64_*.png、faction_*.png）按尺寸拼接到少量大图中，
+App 的列表页只需解码几张图集，再按坐标裁剪，不必为每个图标单独读取和解码一个 PNG。
+大于 ATLAS_ICON_SIZES 的图标和非正方形图标不进入图集，仍然从 icons.zip 读取。
+
+输出：
+- {atlas_dir}/icon_atlas_{尺寸}_{页号}.png：图集
+- {atlas_dir}/icon_atlas.json：{图标文件名: {"atlas": 图集文件名, "x": ..., "y": ..., "size": ...}}
+- 数据库中的 icon_atlas 表：与 JSON 相同的坐标，可以直接与 types.icon_filename 等列联表查询
+"""
+import json
+import os
+from collections import defaultdict
+from typing import Dict, Iterable
+
+from PIL import Image
+
+# 进入图集的图标边长（像素）
+ATLAS_ICON_SIZES = (32, 64)
+
+# 图集边长（像素），64px 图标每张图集可容纳 32 x 32 = 1024 个
+ATLAS_SIZE = 2048
+
+ATLAS_INDEX_FILENAME = 'icon_atlas.json'
+
+
+def _icon_size(file_path: str):
+    """图标边长，非正方形或无法读取时返回 None（只读取文件头，不解码像素）"""
+    try:
+        with Image.open(file_path) as img:
+            width, height = img.size
+    except Exception as e:
+        print(f"读取图标 {file_path} 时发生错误: {e}")
+        return None
+    return width if width == height else None
+
+
+def build_icon_atlases(source_dir: str, atlas_dir: str, used_icons: Iterable[str]) -> Dict[str, dict]:
+    """
+    把使用的小图标拼接为图集
+
+    Args:
+        source_dir: 图标目录
+        atlas_dir: 图集输出目录
+        used_icons: 数据库中使用的图标文件名
+
+    Returns:
+        {图标文件名: {"atlas": 图集文件名, "x": 列坐标, "y": 行坐标, "size": 边长}}
+    """
+    os.makedirs(atlas_dir, exist_ok=True)
+
+    # 按尺寸分组，同一尺寸的图标按网格排列
+    icons_by_size = defaultdict(list)
+    for name in sorted(set(used_icons)):
+        file_path = os.path.join(source_dir, name)
+        if not name.lower().endswith('.png') or not os.path.isfile(file_path):
+            continue
+        size = _icon_size(file_path)
+        if size in ATLAS_ICON_SIZES:
+            icons_by_size[size].append(name)
+
+    entries = {}
+    for size, names in sorted(icons_by_size.items()):
+        columns = ATLAS_SIZE // size
+        per_page = columns * columns
+        for page, start in enumerate(range(0, len(names), per_page)):
+            page_names = names[start:start + per_page]
+            rows = (len(page_names) + columns - 1) // columns
+            atlas_name = f'icon_atlas_{size}_{page}.png'
+            # 最后一页只保留用到的行
+            atlas = Image.new('RGBA', (ATLAS_SIZE, rows * size), (0, 0, 0, 0))
+            for position, name in enumerate(page_names):
+                x, y = (position % columns) * size, (position // columns) * size
+                with Image.open(os.path.join(source_dir, name)) as img:
+                    atlas.paste(img.convert('RGBA'), (x, y))
+                entries[name] = {'atlas': atlas_name, 'x': x, 'y': y, 'size': size}
+            atlas.save(os.path.join(atlas_dir, atlas_name))
+            print(f"已生成图集 {atlas_name}，包含 {len(page_names)} 个 {size}px 图标")
+
+    with open(os.path.join(atlas_dir, ATLAS_INDEX_FILENAME), 'w', encoding='utf-8') as f:
+        json.dump(entries, f, ensure_ascii=False, indent=1, sort_keys=True)
+
+    return entries
+
+
+def create_icon_atlas_table(cursor, entries: Dict[str, dict]):
+    """把图集坐标写入数据库的 icon_atlas 表"""
+    cursor.execute('DROP TABLE IF EXISTS icon_atlas')
+    cursor.execute('''
+        CREATE TABLE icon_atlas (
+            icon_filename TEXT NOT NULL PRIMARY KEY,
+            atlas TEXT NOT NULL,
+            x INTEGER NOT NULL,
+            y INTEGER NOT NULL,
+            size INTEGER NOT NULL
+        ) WITHOUT ROWID
+    ''')
+    cursor.executemany(
+        'INSERT INTO icon_atlas (icon_filename, atlas, x, y, size) VALUES (?, ?, ?, ?, ?)',
+        [(name, entry['atlas'], entry['x'], entry['y'], entry['size']) for name, entry in entries.items()]
+    )
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""
+图标打包
+
+根据数据库中实际引用的图标文件名，只把用到的 PNG 写入无压缩的 icons.zip，不需要先删除未使用的文件；
+文件由线程池并行读取，按文件名顺序流式写入 ZIP。
+
+同时生成清单 icons_manifest.json：{文件名: {"offset": 数据偏移, "size": 字节数, "sha256": 哈希}}，
+offset 指向 ZIP 中该文件数据的起始位置（已跳过本地文件头），App 可以直接内存映射 ZIP 后按偏移读取，
+不需要扫描中央目录；sha256 用于增量更新时判断图标是否变化。
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import struct
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Optional, Set, Tuple
+
+# (表名, 图标文件名列)
+ICON_COLUMNS = [
+    ('marketGroups', 'icon_name'),
+    ('groups', 'icon_filename'),
+    ('categories', 'icon_filename'),
+    ('types', 'icon_filename'),
+    ('types', 'bpc_icon_filename'),
+    ('dogmaAttributes', 'icon_filename'),
+    ('npcCorporations', 'icon_filename'),
+    ('factions', 'iconName'),
+]
+
+# 读取图标文件的线程数
+READ_WORKERS = 8
+
+# 每批并行读取的文件数，限制同时驻留内存的文件数量
+READ_BATCH_SIZE = 256
+
+# ZIP 本地文件头的固定长度
+LOCAL_HEADER_SIZE = struct.calcsize(zipfile.structFileHeader)
+
+# 固定的文件时间，相同的图标集合总是生成相同的 ZIP
+ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+
+def collect_used_icons(db_path: str) -> Set[str]:
+    """
+    从数据库中查询所有引用的图标文件名
+
+    Returns:
+        set: 使用的图标文件名集合，查询失败时返回空集合
+    """
+    used_icons = set()
+    try:
+        conn = sqlite3.connect(db_path)
+        try:
+            cursor = conn.cursor()
+            for table, column in ICON_COLUMNS:
+                cursor.execute(f"SELECT DISTINCT {column} FROM {table} WHERE {column} != ''")
+                used_icons.update(row[0] for row in cursor.fetchall() if row[0])
+        finally:
+            conn.close()
+    except Exception as e:
+        print(f"数据库查询错误: {e}")
+        return set()
+    return used_icons
+
+
+def _read_file(file_path: str) -> Optional[bytes]:
+    try:
+        with open(file_path, 'rb') as f:
+            return f.read()
+    except Exception as e:
+        print(f"读取文件 {file_path} 时发生错误: {e}")
+        return None
+
+
+def _batches(values: list, size: int = READ_BATCH_SIZE) -> Iterable[list]:
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def _data_offset(info: zipfile.ZipInfo) -> int:
+    """文件数据在 ZIP 中的起始偏移：本地文件头 + 文件名 + 扩展字段之后"""
+    return info.header_offset + LOCAL_HEADER_SIZE + len(info.filename.encode('utf-8')) + len(info.extra)
+
+
+def create_icons_zip(source_dir: str, zip_path: str, used_icons: Iterable[str],
+                     manifest_path: Optional[str] = None, workers: int = READ_WORKERS) -> Tuple[int, int]:
+    """
+    把 source_dir 中被使用的 PNG 图标写入无压缩的 ZIP，并生成清单
+
+    Args:
+        source_dir: 源图标目录路径
+        zip_path: 目标ZIP文件路径
+        used_icons: 需要打包的图标文件名
+        manifest_path: 清单路径，默认与 ZIP 同目录的 icons_manifest.json
+        workers: 并行读取的线程数
+
+    Returns:
+        (写入的图标数, 缺失的图标数)
+    """
+    if manifest_path is None:
+        manifest_path = os.path.join(os.path.dirname(zip_path), 'icons_manifest.json')
+
+    names = sorted(name for name in set(used_icons) if name.lower().endswith('.png'))
+    present = [name for name in names if os.path.isfile(os.path.join(source_dir, name))]
+    missing_count = len(names) - len(present)
+
+    manifest = {}
+    with zipfile.ZipFile(zip_path, 'w', compression=zipfile.ZIP_STORED) as zipf, \
+            ThreadPoolExecutor(max_workers=workers) as executor:
+        for batch in _batches(present):
+            # 同一批文件并行读取，按文件名顺序写入
+            contents = executor.map(_read_file, [os.path.join(source_dir, name) for name in batch])
+            for name, data in zip(batch, contents):
+                if data is None:
+                    missing_count += 1
+                    continue
+                info = zipfile.ZipInfo(name, date_time=ZIP_DATE_TIME)
+                info.compress_type = zipfile.ZIP_STORED
+                zipf.writestr(info, data)
+                manifest[name] = {
+                    'offset': _data_offset(info),
+                    'size': len(data),
+                    'sha256': hashlib.sha256(data).hexdigest(),
+                }
+
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1, sort_keys=True)
+
+    return len(manifest), missing_count
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+EVE 图像服务器（images.evetech.net）的军团/联盟/势力图标下载
+
+所有下载共用一个 EsiClient：一个带 keep-alive 的连接池会话，不再为每个图标建立新的 TCP+TLS 连接；
+失败时按带随机抖动的指数退避重试，文件在线程中写入，不阻塞事件循环。
+
+图像服务器地址可以通过 base_url 参数或环境变量 EVE_IMAGE_SERVER 替换，
+例如指向本地的 http://127.0.0.1:8080 模拟服务器进行测试。
+"""
+import asyncio
+import logging
+import os
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from esi_client import EsiClient, EsiError
+
+logger = logging.getLogger(__name__)
+
+IMAGE_SERVER = 'https://images.evetech.net'
+IMAGE_SERVER_ENV = 'EVE_IMAGE_SERVER'
+
+# 类别 -> (URL路径, 图像类型, 文件名模板)
+IMAGE_CATEGORIES = {
+    'corporation': ('corporations', 'logo', 'corperation_{id}_{size}.png'),
+    'alliance': ('alliances', 'logo', 'alliance_{id}_{size}.png'),
+    'faction': ('corporations', 'logo', 'faction_{id}_{size}.png'),
+}
+
+# 图像服务器不返回 ESI 错误限额响应头，初始速率可以比 ESI 高
+IMAGE_CLIENT_OPTIONS = {'rate': 100, 'max_rate': 500, 'max_connections': 20, 'timeout': 10}
+
+
+def image_server_url(base_url: Optional[str] = None) -> str:
+    """图像服务器地址：参数 > 环境变量 > 默认地址"""
+    return (base_url or os.environ.get(IMAGE_SERVER_ENV) or IMAGE_SERVER).rstrip('/')
+
+
+def _write_file(filepath: Path, content: bytes):
+    # 先写临时文件再替换，中断时不会留下不完整的图标
+    temp_path = filepath.with_name(filepath.name + '.tmp')
+    with open(temp_path, 'wb') as f:
+        f.write(content)
+    os.replace(temp_path, filepath)
+
+
+async def download_image(client: EsiClient, kind: str, item_id: int, output_dir: str,
+                         size: int = 128, base_url: Optional[str] = None) -> Optional[str]:
+    """
+    下载单个图标，文件已存在时跳过
+
+    Returns:
+        文件名，图像不存在或下载失败时返回 None
+    """
+    path, variant, filename_template = IMAGE_CATEGORIES[kind]
+    filename = filename_template.format(id=item_id, size=size)
+    filepath = Path(output_dir) / filename
+    if filepath.exists():
+        return filename
+
+    url = f"{image_server_url(base_url)}/{path}/{item_id}/{variant}?size={size}"
+    try:
+        response = await client.request(url)
+    except EsiError as e:
+        logger.error(f"所有重试均失败: {filename} - {e}")
+        return None
+    if response.status != 200:
+        logger.warning(f"下载失败 (HTTP {response.status}): {filename}")
+        return None
+
+    await asyncio.to_thread(_write_file, filepath, response.body)
+    return filename
+
+
+async def download_images(kind: str, item_ids: Iterable[int], output_dir: str, size: int = 128,
+                          client: Optional[EsiClient] = None, base_url: Optional[str] = None) -> Dict[int, str]:
+    """
+    批量下载同一类别的图标
+
+    Args:
+        kind: 'corporation'、'alliance' 或 'faction'
+        item_ids: ID列表
+        output_dir: 输出目录
+        size: 图标尺寸
+        client: 共享的客户端，不传时新建一个并在结束时关闭
+        base_url: 图像服务器地址，用于指向本地模拟服务器
+
+    Returns:
+        {ID: 文件名}，只包含成功的ID
+    """
+    if kind not in IMAGE_CATEGORIES:
+        raise ValueError(f"不支持的图像类别: {kind}")
+    os.makedirs(output_dir, exist_ok=True)
+    item_ids = list(item_ids)
+
+    if client is None:
+        async with EsiClient(**IMAGE_CLIENT_OPTIONS) as own_client:
+            return await download_images(kind, item_ids, output_dir, size, own_client, base_url)
+
+    results = await client.map(
+        lambda item_id: download_image(client, kind, item_id, output_dir, size, base_url), item_ids
+    )
+    filenames = {item_id: result for item_id, result in zip(item_ids, results) if isinstance(result, str)}
+    logger.info(f"{kind} 图标: {len(filenames)}/{len(item_ids)} 个可用")
+    return filenames
@@ -1,19 +1,27 @@
-try:
-    from yaml import CSafeLoader as SafeLoader
-except ImportError:
-    from yaml import SafeLoader
-import yaml
 import time
+from yaml_stream import iter_sequence_rows
+
+# 需要保留的itemID范围（闭区间），其他记录在读取时直接跳过，不写入数据库
+# 3,000,000 - 3,999,999: NPC角色（代理人），供代理人名称本地化使用，修补阶段删除
+# 40,000,000 - 49,999,999: 天体（行星、卫星、小行星带等）
+ITEM_ID_RANGES = [(3000000, 3999999), (40000000, 49999999)]
+
+def is_kept_item(item_id):
+    """itemID是否在需要保留的范围内"""
+    return item_id is not None and any(low <= item_id <= high for low, high in ITEM_ID_RANGES)
 
 def read_yaml(file_path):
-    """读取YAML文件"""
+    """流式读取invNames.yaml，只保留ITEM_ID_RANGES范围内的记录
+
+    Returns:
+        [(itemID, itemName), ...]
+    """
     start_time = time.time()
     
-    with open(file_path, 'r', encoding='utf-8') as file:
-        data = yaml.load(file, Loader=SafeLoader)
+    data = list(iter_sequence_rows(file_path, ('itemID', 'itemName'), filters={'itemID': is_kept_item}))
     
     end_time = time.time()
-    print(f"读取 {file_path} 耗时: {end_time - start_time:.2f} 秒")
+    print(f"读取 {file_path} 耗时: {end_time - start_time:.2f} 秒，保留 {len(data)} 条记录")
     return data
 
 def create_tables(cursor):
@@ -29,7 +37,7 @@ def process_data(data, cursor, lang):
     """处理invNames数据并插入数据库
     
     Args:
-        data: 从YAML文件读取的数据
+        data: read_yaml 返回的 (itemID, itemName) 列表
         cursor: 数据库游标
         lang: 语言代码
     """
@@ -39,37 +47,16 @@ def process_data(data, cursor, lang):
     # 清空现有数据
     cursor.execute('DELETE FROM invNames')
     
-    # 用于批量插入的数据
-    batch_data = []
     batch_size = 1000  # 每批处理的记录数
     
     try:
-        for item in data:
-            itemID = item.get('itemID')
-            itemName = item.get('itemName')
-
-            # 添加到批处理列表
-            batch_data.append((
-                itemID, itemName
-            ))
-            
-            # 当达到批处理大小时执行插入
-            if len(batch_data) >= batch_size:
-                cursor.executemany('''
-                    INSERT OR REPLACE INTO invNames (
-                        itemID, itemName
-                    ) VALUES (?, ?)
-                ''', batch_data)
-                batch_data = []  # 清空批处理列表
-        
-        # 处理剩余的数据
-        if batch_data:
+        for start in range(0, len(data), batch_size):
             cursor.executemany('''
                 INSERT OR REPLACE INTO invNames (
                     itemID, itemName
                 ) VALUES (?, ?)
-            ''', batch_data)
+            ''', data[start:start + batch_size])
             
     except Exception as e:
         print(f"处理invNames数据时出错: {str(e)}")
-        raise 
\ No newline at end of file
+        raise
@@ -1,14 +1,34 @@
-import json
 import sqlite3
-from typing import Dict
+from typing import Dict, Iterable, Iterator
+from universe_records import iter_systems
 
 # 支持的语言列表
 LANGUAGES = ['de', 'en', 'es', 'fr', 'ja', 'ko', 'ru', 'zh']
 
-def read_universe_data(file_path: str = 'fetchUniverse/universe_data.json') -> dict:
-    """读取 universe_data.json 文件"""
-    with open(file_path, 'r', encoding='utf-8') as file:
-        return json.load(file)
+def read_universe_data(file_path: str = None) -> Iterator[Dict]:
+    """惰性读取 universe_data.jsonl 中的星系记录"""
+    return iter_systems(file_path)
+
+def new_name_rows() -> dict:
+    """名称数据的容器：星域/星座按ID去重，星系按记录顺序保存"""
+    return {'regions': {}, 'constellations': {}, 'systems': []}
+
+def collect_names(record: Dict, name_rows: dict):
+    """从一条星系记录中收集星域、星座、星系的多语言名称"""
+    name_rows['regions'].setdefault(int(record['region_id']), record['region_name'])
+    name_rows['constellations'].setdefault(int(record['constellation_id']), record['constellation_name'])
+    name_rows['systems'].append((
+        int(record['system_id']),
+        record['system_name'],
+        record['system_info']['security_status']
+    ))
+
+def collect_name_rows(systems: Iterable[Dict]) -> dict:
+    """遍历星系记录，收集所有名称数据"""
+    name_rows = new_name_rows()
+    for record in systems:
+        collect_names(record, name_rows)
+    return name_rows
 
 def create_table(cursor):
     """创建所需的表"""
@@ -49,15 +69,25 @@ def create_table(cursor):
         )
     ''')
 
-def process_data(data: dict, cursor, lang: str = 'en'):
+def _localized_values(item_id: int, names: Dict[str, str], lang: str) -> list:
+    """ID、指定语言的名称（缺失时使用英文）以及所有语言的名称"""
+    values = [item_id, names.get(lang, names.get('en'))]
+    for lang_code in LANGUAGES:
+        values.append(names.get(lang_code))
+    return values
+
+def process_data(data, cursor, lang: str = 'en'):
     """
     处理数据并插入到数据库
     
     Args:
-        data: 数据字典
+        data: collect_name_rows 的结果，或星系记录的可迭代对象
         cursor: 数据库游标
         lang: 数据库使用的语言代码
     """
+    if not isinstance(data, dict):
+        data = collect_name_rows(data)
+
     # 创建表
     create_table(cursor)
     
@@ -78,35 +108,17 @@ def process_data(data: dict, cursor, lang: str = 'en'):
     '''
     
     # 处理星域数据
-    for region_id, region_data in data.items():
-        region_names = region_data['region_name']
-        region_values = [
-            int(region_id), 
-            region_names.get(lang, region_names.get('en'))  # 使用指定语言的名称，如果没有则使用英文
-        ]
-        for lang_code in LANGUAGES:
-            region_values.append(region_names.get(lang_code))
-        cursor.execute(regions_sql, region_values)
+    cursor.executemany(regions_sql, [
+        _localized_values(region_id, names, lang) for region_id, names in data['regions'].items()
+    ])
         
-        # 处理星座数据
-        for const_id, const_data in region_data['constellations'].items():
-            const_names = const_data['constellation_name']
-            const_values = [
-                int(const_id), 
-                const_names.get(lang, const_names.get('en'))  # 使用指定语言的名称，如果没有则使用英文
-            ]
-            for lang_code in LANGUAGES:
-                const_values.append(const_names.get(lang_code))
-            cursor.execute(constellations_sql, const_values)
+    # 处理星座数据
+    cursor.executemany(constellations_sql, [
+        _localized_values(const_id, names, lang) for const_id, names in data['constellations'].items()
+    ])
             
-            # 处理星系数据
-            for sys_id, sys_data in const_data['systems'].items():
-                sys_names = sys_data['system_name']
-                sys_values = [
-                    int(sys_id), 
-                    sys_names.get(lang, sys_names.get('en'))  # 使用指定语言的名称，如果没有则使用英文
-                ]
-                for lang_code in LANGUAGES:
-                    sys_values.append(sys_names.get(lang_code))
-                sys_values.append(sys_data['system_info']['security_status'])
-                cursor.execute(solarsystems_sql, sys_values)
\ No newline at end of file
+    # 处理星系数据
+    cursor.executemany(solarsystems_sql, [
+        _localized_values(sys_id, names, lang) + [security_status]
+        for sys_id, names, security_status in data['systems']
+    ])
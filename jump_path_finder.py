@@ -4,6 +4,7 @@ import sqlite3
 from typing import Dict, List, Set, Tuple, Optional
 from heapq import heappush, heappop
 from datetime import datetime
+from name_index import NameIndex
 
 class JumpPathFinder:
     def __init__(self, json_file_path: str, db_path: str):
@@ -12,6 +13,7 @@ class JumpPathFinder:
         self.system_names: Dict[int, str] = {}  # 星系ID到名称的映射
         self.load_jump_map(json_file_path)
         self.load_system_names(db_path)
+        self.name_index = NameIndex.from_database(db_path, kinds=('solarsystem',))  # 星系名称索引（所有语言）
     
     def load_system_names(self, db_path: str) -> None:
         """从数据库加载星系名称"""
@@ -36,41 +38,27 @@ class JumpPathFinder:
             raise
     
     def find_system_id(self, system_name: str) -> Optional[int]:
-        """根据星系名称查找星系ID"""
-        try:
-            conn = sqlite3.connect('output/db/item_db_en.sqlite')
-            cursor = conn.cursor()
-            
-            # 使用LIKE进行模糊查询
-            cursor.execute("""
-                SELECT solarSystemID, solarSystemName 
-                FROM solarsystems 
-                WHERE solarSystemName LIKE ?
-            """, (f"%{system_name}%",))
-            
-            results = cursor.fetchall()
-            conn.close()
-            
-            if not results:
-                return None
-            elif len(results) == 1:
-                return results[0][0]
-            else:
-                print("\n找到多个匹配的星系:")
-                for i, (system_id, name) in enumerate(results, 1):
-                    print(f"{i}. {name} (ID: {system_id})")
-                while True:
-                    try:
-                        choice = int(input("\n请选择星系编号: "))
-                        if 1 <= choice <= len(results):
-                            return results[choice-1][0]
-                        print("无效的选择，请重试")
-                    except ValueError:
-                        print("请输入有效的数字")
-                
-        except Exception as e:
-            print(f"查询星系时出错: {e}")
+        """根据星系名称查找星系ID（完全匹配 > 前缀 > 子串 > 模糊匹配）"""
+        results = self.name_index.search(system_name, kind='solarsystem')
+        # 同一星系可能以多种语言的名称命中，按ID去重
+        results = list({match.item_id: match for match in results}.values())
+
+        if not results:
             return None
+        elif len(results) == 1:
+            return results[0].item_id
+        else:
+            print("\n找到多个匹配的星系:")
+            for i, match in enumerate(results, 1):
+                print(f"{i}. {match.name} (ID: {match.item_id})")
+            while True:
+                try:
+                    choice = int(input("\n请选择星系编号: "))
+                    if 1 <= choice <= len(results):
+                        return results[choice-1].item_id
+                    print("无效的选择，请重试")
+                except ValueError:
+                    print("请输入有效的数字")
     
     def load_jump_map(self, json_file_path: str) -> None:
         """加载跳跃地图数据"""
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""
+本地化覆盖率检查
+
+并行检查 output/db 下各语言数据库，将每个本地化字段与英文数据库中同一条记录的同一字段比较，
+按表、字段、语言统计：
+- missing: 英文有内容，但本语言为空
+- identical: 与英文完全相同（可能未翻译；专有名词等相同属于正常情况）
+
+每个字段只执行一条聚合查询（ATTACH 英文数据库后联表），不在 Python 中逐行比较，
+可以在每次构建后运行：
+    python localization_coverage.py                      # 打印报告
+    python localization_coverage.py --max-missing 0.01   # 任一字段缺失比例超过 1% 时返回非零退出码
+    python localization_coverage.py --json report.json   # 同时保存 JSON 报告
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, NamedTuple, Optional
+
+# 支持的语言列表，en 为比较基准
+LANGUAGES = ['en', 'de', 'es', 'fr', 'ja', 'ko', 'ru', 'zh']
+
+output_db_dir = 'output/db'
+
+# (表名, 主键列, 字段, 附加过滤条件)
+COVERAGE_FIELDS = [
+    ('types', 'type_id', 'name', 'e.published'),
+    ('types', 'type_id', 'description', 'e.published'),
+    ('groups', 'group_id', 'name', None),
+    ('categories', 'category_id', 'name', None),
+    ('marketGroups', 'group_id', 'name', None),
+    ('marketGroups', 'group_id', 'description', None),
+    ('dogmaAttributes', 'attribute_id', 'display_name', None),
+    ('dogmaAttributes', 'attribute_id', 'tooltipDescription', None),
+    ('factions', 'id', 'name', None),
+    ('factions', 'id', 'description', None),
+    ('npcCorporations', 'corporation_id', 'name', None),
+    ('npcCorporations', 'corporation_id', 'description', None),
+    ('regions', 'regionID', 'regionName', None),
+    ('constellations', 'constellationID', 'constellationName', None),
+    ('solarsystems', 'solarSystemID', 'solarSystemName', None),
+    ('stations', 'stationID', 'stationName', None),
+    ('agents', 'agent_id', 'agent_name', None),
+]
+
+COVERAGE_SQL = '''
+    SELECT
+        COUNT(*),
+        SUM(l.{column} IS NULL OR trim(l.{column}) = ''),
+        SUM(l.{column} = e.{column})
+    FROM en.{table} e
+    LEFT JOIN main.{table} l ON l.{key} = e.{key}
+    WHERE e.{column} IS NOT NULL AND trim(e.{column}) != '' {condition}
+'''
+
+
+class FieldCoverage(NamedTuple):
+    lang: str
+    table: str
+    column: str
+    total: int
+    missing: int
+    identical: int
+
+    @property
+    def missing_ratio(self) -> float:
+        return self.missing / self.total if self.total else 0.0
+
+    @property
+    def identical_ratio(self) -> float:
+        return self.identical / self.total if self.total else 0.0
+
+
+def _columns(conn: sqlite3.Connection, schema: str, table: str) -> set:
+    return {row[1] for row in conn.execute(f'PRAGMA {schema}.table_info({table})')}
+
+
+def check_language(lang: str, db_dir: str = output_db_dir) -> List[FieldCoverage]:
+    """检查一种语言的数据库，表或字段不存在时跳过"""
+    db_path = os.path.join(db_dir, f'item_db_{lang}.sqlite')
+    en_path = os.path.join(db_dir, 'item_db_en.sqlite')
+    conn = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True)
+    try:
+        conn.execute('ATTACH DATABASE ? AS en', (f'file:{en_path}?mode=ro',))
+        results = []
+        for table, key, column, condition in COVERAGE_FIELDS:
+            en_columns = _columns(conn, 'en', table)
+            if not {key, column} <= en_columns or not {key, column} <= _columns(conn, 'main', table):
+                continue
+            if condition and condition.split('.', 1)[1] not in en_columns:
+                condition = None
+            sql = COVERAGE_SQL.format(table=table, key=key, column=column,
+                                      condition=f'AND {condition}' if condition else '')
+            total, missing, identical = conn.execute(sql).fetchone()
+            results.append(FieldCoverage(lang, table, column, total, missing or 0, identical or 0))
+        return results
+    finally:
+        conn.close()
+
+
+def check_all(db_dir: str = output_db_dir, languages: Optional[List[str]] = None) -> List[FieldCoverage]:
+    """并行检查所有非英文数据库"""
+    languages = [lang for lang in (languages or LANGUAGES) if lang != 'en']
+    languages = [lang for lang in languages if os.path.exists(os.path.join(db_dir, f'item_db_{lang}.sqlite'))]
+    # sqlite3 在执行查询时释放 GIL，线程即可并行
+    with ThreadPoolExecutor(max_workers=max(1, len(languages))) as executor:
+        per_language = executor.map(lambda lang: check_language(lang, db_dir), languages)
+    return [result for results in per_language for result in results]
+
+
+def print_report(results: List[FieldCoverage]):
+    """按表和字段分组打印各语言的缺失和相同比例"""
+    languages = sorted({result.lang for result in results}, key=LANGUAGES.index)
+    grouped: Dict[tuple, Dict[str, FieldCoverage]] = {}
+    for result in results:
+        grouped.setdefault((result.table, result.column), {})[result.lang] = result
+
+    header = f"{'字段':<36}{'总数':>8}  " + ''.join(f"{lang:>16}" for lang in languages)
+    print(header)
+    print('-' * len(header))
+    for (table, column), by_lang in grouped.items():
+        total = next(iter(by_lang.values())).total
+        cells = []
+        for lang in languages:
+            result = by_lang.get(lang)
+            # 缺失比例 / 与英文相同比例
+            cells.append(f"{result.missing_ratio:>7.1%}/{result.identical_ratio:<7.1%}" if result else f"{'-':>16}")
+        print(f"{table + '.' + column:<36}{total:>8}  " + ''.join(f"{cell:>16}" for cell in cells))
+    print("\n每格为：缺失比例/与英文相同比例")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='检查各语言数据库的本地化覆盖率')
+    parser.add_argument('--db-dir', default=output_db_dir, help='数据库目录')
+    parser.add_argument('--max-missing', type=float, default=None,
+                        help='任一字段的缺失比例超过该值时返回非零退出码，例如 0.01')
+    parser.add_argument('--json', dest='json_path', default=None, help='保存 JSON 报告的路径')
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(os.path.join(args.db_dir, 'item_db_en.sqlite')):
+        print(f"错误：找不到英文数据库 {os.path.join(args.db_dir, 'item_db_en.sqlite')}")
+        return 1
+
+    results = check_all(args.db_dir)
+    print_report(results)
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump([dict(result._asdict(), missing_ratio=result.missing_ratio,
+                            identical_ratio=result.identical_ratio) for result in results],
+                      f, ensure_ascii=False, indent=2)
+
+    if args.max_missing is not None:
+        failures = [result for result in results if result.missing_ratio > args.max_missing]
+        for result in failures:
+            print(f"缺失比例过高: {result.lang} {result.table}.{result.column} "
+                  f"{result.missing}/{result.total} ({result.missing_ratio:.1%})")
+        if failures:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
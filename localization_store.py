@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""
+本地化文本存储
+
+取代 combined_localization.json 与 en_multi_lang_mapping.json：所有本地化文本保存在一个 SQLite 文件中，
+- messages: 按消息ID索引，每行包含八种语言的文本
+- en_mapping: 按英文文本索引，每种语言取出现次数最多的译文（用于没有消息ID、只有英文名称的数据，如代理人名称）
+
+查询时按需读取，不需要把整个语料加载到内存。
+由 accounting_entry_types/4_combain.py 生成，agent_localization_handler 和空间站名称本地化读取。
+"""
+import os
+import sqlite3
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# 支持的语言列表
+LANGUAGES = ['en', 'de', 'es', 'fr', 'ja', 'ko', 'ru', 'zh']
+
+LOCALIZATION_DB_PATH = os.path.join("accounting_entry_types", "output", "localization.sqlite")
+
+# IN 查询每批的参数个数，低于 SQLite 的变量上限
+QUERY_CHUNK_SIZE = 500
+
+
+def _chunks(values: List, size: int = QUERY_CHUNK_SIZE) -> Iterator[List]:
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def _row_to_translations(row: Tuple, languages: List[str]) -> Dict[str, str]:
+    """将一行各语言的文本转为 {语言: 文本}，跳过缺失的语言"""
+    return {lang: text for lang, text in zip(languages, row) if text is not None}
+
+
+class LocalizationStore:
+    """
+    只读的本地化文本查询接口
+
+    用法：
+        with LocalizationStore() as store:
+            store.get(271747)                 # {'en': ..., 'zh': ..., ...}
+            store.translate_en('Jita')        # {'de': ..., 'zh': ..., ...}
+    """
+
+    def __init__(self, db_path: str = LOCALIZATION_DB_PATH):
+        if not os.path.exists(db_path):
+            raise FileNotFoundError(db_path)
+        self.db_path = db_path
+        self.conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    def __len__(self):
+        return self.conn.execute('SELECT COUNT(*) FROM messages').fetchone()[0]
+
+    def get(self, message_id, default=None) -> Optional[Dict[str, str]]:
+        """按消息ID获取所有语言的文本"""
+        row = self.conn.execute(
+            f"SELECT {', '.join(LANGUAGES)} FROM messages WHERE message_id = ?", (int(message_id),)
+        ).fetchone()
+        return _row_to_translations(row, LANGUAGES) if row else default
+
+    def get_many(self, message_ids: Iterable) -> Dict[str, Dict[str, str]]:
+        """批量按消息ID获取文本，返回 {消息ID字符串: {语言: 文本}}，不存在的ID不出现在结果中"""
+        ids = sorted({int(message_id) for message_id in message_ids})
+        result = {}
+        for chunk in _chunks(ids):
+            cursor = self.conn.execute(
+                f"SELECT message_id, {', '.join(LANGUAGES)} FROM messages "
+                f"WHERE message_id IN ({', '.join('?' * len(chunk))})", chunk
+            )
+            for row in cursor:
+                result[str(row[0])] = _row_to_translations(row[1:], LANGUAGES)
+        return result
+
+    def find_id_by_en(self, text: str) -> Optional[int]:
+        """英文文本完全相同的最小消息ID"""
+        row = self.conn.execute('SELECT MIN(message_id) FROM messages WHERE en = ?', (text,)).fetchone()
+        return row[0] if row else None
+
+    def translate_en(self, text: str) -> Optional[Dict[str, str]]:
+        """英文文本在其他语言中最常见的译文"""
+        return self.translate_en_many([text]).get(text)
+
+    def translate_en_many(self, texts: Iterable[str]) -> Dict[str, Dict[str, str]]:
+        """批量查询英文文本的译文，返回 {英文: {语言: 译文}}，没有译文的英文不出现在结果中"""
+        other_languages = LANGUAGES[1:]
+        result = {}
+        for chunk in _chunks(sorted(set(texts))):
+            cursor = self.conn.execute(
+                f"SELECT en, {', '.join(other_languages)} FROM en_mapping "
+                f"WHERE en IN ({', '.join('?' * len(chunk))})", chunk
+            )
+            for row in cursor:
+                result[row[0]] = _row_to_translations(row[1:], other_languages)
+        return result
+
+
+def open_store(db_path: str = LOCALIZATION_DB_PATH) -> Optional[LocalizationStore]:
+    """打开本地化存储，文件不存在时打印错误并返回 None"""
+    if not os.path.exists(db_path):
+        print(f"错误：找不到本地化数据库 {db_path}")
+        return None
+    return LocalizationStore(db_path)
+
+
+def create_store(db_path: str) -> sqlite3.Connection:
+    """创建空的本地化存储，已存在时覆盖"""
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    language_columns = ', '.join(f'{lang} TEXT' for lang in LANGUAGES)
+    conn.execute(f'CREATE TABLE messages (message_id INTEGER NOT NULL PRIMARY KEY, {language_columns})')
+    return conn
+
+
+def write_language(conn: sqlite3.Connection, lang: str, texts: Iterable[Tuple[int, str]]):
+    """写入一种语言的 (消息ID, 文本)，每次只需要一种语言的数据在内存中"""
+    if lang not in LANGUAGES:
+        raise ValueError(f"不支持的语言: {lang}")
+    conn.executemany(
+        f'INSERT INTO messages (message_id, {lang}) VALUES (?, ?) '
+        f'ON CONFLICT(message_id) DO UPDATE SET {lang} = excluded.{lang}',
+        texts
+    )
+
+
+def build_en_mapping(conn: sqlite3.Connection):
+    """
+    基于 messages 生成英文到各语言的映射表 en_mapping
+
+    同一英文文本对应多个消息ID时，每种语言取出现次数最多的译文
+    """
+    other_languages = LANGUAGES[1:]
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_messages_en ON messages(en)')
+    conn.execute('DROP TABLE IF EXISTS en_mapping')
+    conn.execute(f'''
+        CREATE TABLE en_mapping (
+            en TEXT NOT NULL PRIMARY KEY,
+            {', '.join(f'{lang} TEXT' for lang in other_languages)}
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('INSERT INTO en_mapping (en) SELECT DISTINCT en FROM messages WHERE en IS NOT NULL')
+    for lang in other_languages:
+        conn.execute(f'''
+            UPDATE en_mapping SET {lang} = (
+                SELECT {lang} FROM messages
+                WHERE messages.en = en_mapping.en AND {lang} IS NOT NULL
+                GROUP BY {lang}
+                ORDER BY COUNT(*) DESC, MIN(message_id)
+                LIMIT 1
+            )
+        ''')
+    # 没有任何其他语言译文的英文不需要保留
+    conn.execute(f"DELETE FROM en_mapping WHERE {' AND '.join(f'{lang} IS NULL' for lang in other_languages)}")
@@ -25,7 +25,8 @@ from planet_schematics_handler import read_yaml as read_planetSchematics_yaml, \
     process_data as process_planetSchematics_data
 from stations_handler import read_stations_yaml, process_data as process_stations_data
 # from invUniqueNames_handler import read_yaml as read_invUniqueNames_yaml, process_data as process_invUniqueNames_data  # 注释掉旧的导入
-from invUniqueNames_handler_new import read_universe_data, process_data as process_invUniqueNames_data  # 新的导入
+from invUniqueNames_handler_new import read_universe_data, new_name_rows, collect_names, \
+    process_data as process_invUniqueNames_data  # 新的导入
 # from universe import process_data as process_universe_data  # 注释掉旧的导入
 from universe_new import process_data as process_universe_data  # 新的导入
 from npcCorporations_handler import process_data as process_corporations_data
@@ -40,6 +41,11 @@ from station_name_localization.station_localization_handler import update_statio
 from dogmaEffects_handler import read_yaml as read_dogmaEffects_yaml, process_data as process_dogmaEffects_data
 from dbuff_collections_handler import read_yaml as read_dbuff_collections_yaml, process_data as process_dbuff_collections_data
 from facility_rig_effects import process_facility_rig_effects
+from search_index_handler import create_search_index
+from icons_package import collect_used_icons, create_icons_zip
+from icon_atlas import build_icon_atlases, create_icon_atlas_table
+from patch_engine import apply_patches_to_all
+from yaml_prefetch import YamlPrefetcher
 
 # 文件路径
 categories_yaml_file_path = 'Data/sde/fsd/categories.yaml'
@@ -62,6 +68,7 @@ agents_in_space_yaml_file_path = 'Data/sde/fsd/agentsInSpace.yaml'
 divisions_yaml_file_path = 'Data/sde/fsd/npcCorporationDivisions.yaml'
 ICONS_DEST_DIR = 'output/Icons'
 ZIP_ICONS_DEST = 'output/Icons/icons.zip'
+ICON_ATLAS_DIR = 'output/Icons/atlas'
 stations_yaml_file_path = 'Data/sde/bsd/staStations.yaml'
 invFlags_yaml_file_path = 'Data/sde/bsd/invFlags.yaml'
 invNames_yaml_file_path = 'Data/sde/bsd/invNames.yaml'
@@ -76,6 +83,21 @@ languages = ['en', 'de', 'es', 'fr', 'ja', 'ko', 'ru', 'zh']  # en 务必在第
 output_db_dir = 'output/db'
 output_icons_dir = 'output/Icons'
 
+# 是否为小图标生成图集（output/Icons/atlas 与数据库中的 icon_atlas 表），App 尚未使用图集，默认不生成
+BUILD_ICON_ATLAS = False
+
+# 数据库分发格式：zip（每个数据库单独 ZIP_DEFLATED）或 zstd（共享字典并行压缩，见 zstd_distribution.py）
+DISTRIBUTION_FORMAT = 'zip'
+# zstd 分发的字典模式：dictionary（共享训练字典）或 reference（以英文数据库为字典）
+ZSTD_DISTRIBUTION_MODE = 'dictionary'
+
+# 是否在进程池中提前解析后续阶段的 YAML 文件，以及同时提前解析的文件数
+PREFETCH_YAML = True
+YAML_PREFETCH_LOOKAHEAD = 3
+
+# 当前的 YAML 预读取器，由 main() 创建
+yaml_prefetcher = None
+
 def file_check():
     for item in [categories_yaml_file_path, groups_yaml_file_path, iconIDs_yaml_file_path, planetSchematics_yaml_file_path, types_yaml_file_path, metaGroups_yaml_file_path,
                  dogmaAttributes_yaml_file_path, dogmaAttributeCategories_yaml_file_path, typeDogma_yaml_file_path, typeMaterials_yaml_file_path,
@@ -106,89 +128,9 @@ def rebuild_directory(directory_path):
     os.makedirs(output_icons_dir, exist_ok=True)
 
 
-def clean_unused_icons(source_dir):
-    """
-    清理未使用的图标文件
-    
-    Args:
-        source_dir: 源图标目录路径
-        
-    Returns:
-        set: 返回所有使用的图标文件名集合
-    """
-    # 连接数据库获取所有使用的图标文件名
-    db_path = os.path.join('output/db', 'item_db_en.sqlite')
-    used_icons = set()
-
-    try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-
-        # 查询 marketGroups
-        cursor.execute("SELECT icon_name FROM marketGroups WHERE icon_name != ''")
-        marketGroups_icons = {row[0] for row in cursor.fetchall()}
-
-        # 查询 groups
-        cursor.execute("SELECT icon_filename FROM groups WHERE icon_filename != ''")
-        groups_icons = {row[0] for row in cursor.fetchall()}
-
-        # 查询categories
-        cursor.execute("SELECT icon_filename FROM categories WHERE icon_filename != ''")
-        categories_icons = {row[0] for row in cursor.fetchall()}
-
-        # 查询types表中的icon_filename和bpc_icon_filename
-        cursor.execute(
-            "SELECT icon_filename FROM types WHERE icon_filename != '' UNION SELECT bpc_icon_filename FROM types WHERE bpc_icon_filename != ''")
-        types_icons = {row[0] for row in cursor.fetchall()}
-
-        # 查询dogmaAttributes表中的icon_filename
-        cursor.execute("SELECT icon_filename FROM dogmaAttributes WHERE icon_filename != ''")
-        dogma_icons = {row[0] for row in cursor.fetchall()}
-
-        # 查询npcCorporations表中的icon_filename
-        cursor.execute("SELECT icon_filename FROM npcCorporations WHERE icon_filename != ''")
-        corp_icons = {row[0] for row in cursor.fetchall()}
-
-        # 查询factions表中的iconName
-        cursor.execute("SELECT iconName FROM factions WHERE iconName != ''")
-        factions_icons = {row[0] for row in cursor.fetchall()}
-
-        # 合并所有使用的图标文件名
-        used_icons = types_icons.union(marketGroups_icons, groups_icons, dogma_icons, corp_icons, categories_icons,
-                                       factions_icons)
-
-        conn.close()
-    except Exception as e:
-        print(f"数据库查询错误: {e}")
-        return set()
-
-    # 统计删除的文件数量
-    deleted_count = 0
-    total_count = 0
-
-    # 遍历目录下的文件
-    for filename in os.listdir(source_dir):
-        file_path = os.path.join(source_dir, filename)
-        # 确保处理的是PNG文件
-        if os.path.isfile(file_path) and filename.lower().endswith(".png"):
-            total_count += 1
-            try:
-                # 如果文件不在使用的图标列表中，则删除
-                if filename not in used_icons:
-                    os.remove(file_path)
-                    # print(f"已删除未使用的图标文件: {filename}")
-                    deleted_count += 1
-            except Exception as e:
-                print(f"删除文件 {filename} 时发生错误: {e}")
-
-    print(f"总共检查了 {total_count} 个图标文件，删除了 {deleted_count} 个未使用的图标文件")
-    print(f"保留了 {total_count - deleted_count} 个使用的图标文件")
-    return used_icons
-
-
 def create_uncompressed_icons_zip(source_dir, zip_path):
     """
-    创建一个无压缩的ZIP文件，用于存储图标
+    创建一个无压缩的ZIP文件，只包含数据库中使用的图标，并生成内存映射访问用的清单
 
     Args:
         source_dir: 源图标目录路径
@@ -199,22 +141,20 @@ def create_uncompressed_icons_zip(source_dir, zip_path):
         os.remove(zip_path)
         print(f"已删除现有ZIP文件: {zip_path}")
 
-    # 清理未使用的图标文件
-    clean_unused_icons(source_dir)
-
-    # 创建一个无压缩的ZIP文件
-    with zipfile.ZipFile(zip_path, 'w', compression=zipfile.ZIP_STORED) as zipf:
-        # 遍历指定目录下的文件
-        for filename in os.listdir(source_dir):
-            file_path = os.path.join(source_dir, filename)
-            # 确保处理的是PNG文件
-            if os.path.isfile(file_path) and filename.lower().endswith(".png"):
-                try:
-                    # 将文件添加到ZIP中，不使用压缩
-                    zipf.write(file_path, filename)  # 只保留文件名，不包含路径
-                    os.remove(file_path)
-                except Exception as e:
-                    print(f"处理文件 {filename} 时发生错误: {e}")
+    # 从数据库获取所有使用的图标文件名
+    used_icons = collect_used_icons(os.path.join(output_db_dir, 'item_db_en.sqlite'))
+
+    # 并行读取使用的图标，流式写入ZIP，未使用的文件直接跳过
+    written_count, missing_count = create_icons_zip(source_dir, zip_path, used_icons)
+    print(f"数据库引用了 {len(used_icons)} 个图标文件，写入 {written_count} 个，缺失 {missing_count} 个")
+
+    # ZIP 创建成功后一次性删除复制过来的图标，目录中只保留 icons.zip、清单和图集
+    removed_count = 0
+    for file_name in os.listdir(source_dir):
+        if file_name.lower().endswith('.png'):
+            os.remove(os.path.join(source_dir, file_name))
+            removed_count += 1
+    print(f"已删除 {source_dir} 中的 {removed_count} 个图标文件")
 
     # 显示ZIP文件大小
     zip_size = os.path.getsize(zip_path) / (1024 * 1024)  # 转换为MB
@@ -222,10 +162,51 @@ def create_uncompressed_icons_zip(source_dir, zip_path):
     print(f"文件大小: {zip_size:.2f}MB")
 
 
+def build_icon_atlas_data():
+    """为数据库中使用的小图标生成图集，并把坐标写入所有数据库"""
+    used_icons = collect_used_icons(os.path.join(output_db_dir, 'item_db_en.sqlite'))
+    entries = build_icon_atlases(ICONS_DEST_DIR, ICON_ATLAS_DIR, used_icons)
+    print(f"共 {len(entries)} 个图标写入图集")
+    process_special_data(lambda cursor: create_icon_atlas_table(cursor, entries), "icon atlas")
+
+
+def read_yaml_data(yaml_file_path, read_func):
+    """读取 YAML 数据，预读取器已经解析过的文件直接取结果"""
+    if yaml_prefetcher is not None:
+        return yaml_prefetcher.get(yaml_file_path, read_func)
+    return read_func(yaml_file_path)
+
+
+def yaml_prefetch_plan():
+    """main() 中按顺序一次性读取的 YAML 文件（types 和 typeDogma 分批流式读取，不在其中）"""
+    return [
+        (dogmaEffects_yaml_file_path, read_dogmaEffects_yaml),
+        (planetSchematics_yaml_file_path, read_planetSchematics_yaml),
+        (iconIDs_yaml_file_path, read_iconIDs_yaml),
+        (categories_yaml_file_path, read_categories_yaml),
+        (groups_yaml_file_path, read_groups_yaml),
+        (stations_yaml_file_path, read_stations_yaml),
+        (metaGroups_yaml_file_path, read_metaGroups_yaml),
+        (factions_yaml_file_path, read_factions_yaml),
+        (npcCorporations_yaml_file_path, read_corporations_yaml),
+        (agents_yaml_file_path, read_agents_yaml),
+        (agents_in_space_yaml_file_path, read_agents_in_space_yaml),
+        (divisions_yaml_file_path, read_divisions_yaml),
+        (dogmaAttributeCategories_yaml_file_path, read_dogmaAttributeCategories_yaml),
+        (dogmaAttributes_yaml_file_path, read_dogmaAttributes_yaml),
+        (dbuff_collections_yaml_file_path, read_dbuff_collections_yaml),
+        (marketGroups_yaml_file_path, read_marketGroups_yaml),
+        (typeMaterials_yaml_file_path, read_typeMaterials_yaml),
+        (blueprints_yaml_file_path, read_blueprints_yaml),
+        (invFlags_yaml_file_path, read_invFlags_yaml),
+        (invNames_yaml_file_path, read_invNames_yaml),
+    ]
+
+
 def process_yaml_file(yaml_file_path, read_func, process_func):
     """处理每个 YAML 文件并更新所有语言的数据库"""
     # 读取 YAML 数据一次
-    data = read_func(yaml_file_path)
+    data = read_yaml_data(yaml_file_path, read_func)
 
     for lang in languages:
         db_filename = os.path.join(output_db_dir, f'item_db_{lang}.sqlite')
@@ -244,6 +225,31 @@ def process_yaml_file(yaml_file_path, read_func, process_func):
         print(f"Database {db_filename} has been updated for language: {lang}.")
 
 
+def process_yaml_file_in_batches(yaml_file_path, read_func, process_func):
+    """
+    处理按批流式读取的大 YAML 文件（read_func 逐批产出 dict）
+
+    文件只读取一次，每一批依次交给所有语言的数据库处理（en 在前），
+    处理完即丢弃，峰值内存与批大小相关，而不是与文件大小相关
+    """
+    connections = {
+        lang: sqlite3.connect(os.path.join(output_db_dir, f'item_db_{lang}.sqlite'))
+        for lang in languages
+    }
+    try:
+        cursors = {lang: conn.cursor() for lang, conn in connections.items()}
+        for batch in read_func(yaml_file_path):
+            for lang in languages:
+                process_func(batch, cursors[lang], lang)
+
+        for lang, conn in connections.items():
+            conn.commit()
+            print(f"Database {os.path.join(output_db_dir, f'item_db_{lang}.sqlite')} has been updated for language: {lang}.")
+    finally:
+        for conn in connections.values():
+            conn.close()
+
+
 def process_special_data(process_func, description, **kwargs):
     """处理特殊数据（不需要读取YAML文件的处理器）"""
     for lang in languages:
@@ -263,28 +269,39 @@ def process_special_data(process_func, description, **kwargs):
         print(f"Database {db_filename} has been updated for {description}.")
 
 
-def process_universe_names():
-    """处理宇宙名称数据"""
-    data = read_universe_data()
-    for lang in languages:
+def process_universe():
+    """处理宇宙数据和宇宙名称：只遍历一次 universe_data.jsonl，universe表与名称表共用这次遍历"""
+    name_rows = new_name_rows()
+
+    def systems():
+        for record in read_universe_data():
+            collect_names(record, name_rows)
+            yield record
+
+    for i, lang in enumerate(languages):
         db_filename = os.path.join(output_db_dir, f'item_db_{lang}.sqlite')
         conn = sqlite3.connect(db_filename)
         cursor = conn.cursor()
 
         try:
-            process_invUniqueNames_data(data, cursor, lang)
+            # 第一个数据库遍历记录并缓存universe行，其余数据库直接使用缓存
+            if i == 0:
+                process_universe_data(cursor, lang, systems=systems())
+            else:
+                process_universe_data(cursor, lang)
+            process_invUniqueNames_data(name_rows, cursor, lang)
             conn.commit()
         finally:
             conn.close()
 
-        print(f"Database {db_filename} has been updated for universe names.")
+        print(f"Database {db_filename} has been updated for universe data and names.")
 
 
 def process_agents_yaml_files():
     """处理代理相关的YAML文件"""
     # 读取YAML数据
-    agents_data = read_agents_yaml(agents_yaml_file_path)
-    agents_in_space_data = read_agents_in_space_yaml(agents_in_space_yaml_file_path)
+    agents_data = read_yaml_data(agents_yaml_file_path, read_agents_yaml)
+    agents_in_space_data = read_yaml_data(agents_in_space_yaml_file_path, read_agents_in_space_yaml)
 
     for lang in languages:
         db_filename = os.path.join(output_db_dir, f'item_db_{lang}.sqlite')
@@ -344,6 +361,13 @@ def compress_database(db_filename):
 def compress_all_databases():
     """压缩所有语言的数据库"""
     print("\n开始压缩所有数据库...")
+    if DISTRIBUTION_FORMAT == 'zstd':
+        # 只在使用 zstd 分发时需要 zstandard
+        from zstd_distribution import compress_databases, print_report
+        manifest = compress_databases(output_db_dir, languages, mode=ZSTD_DISTRIBUTION_MODE, remove_source=True)
+        print_report(manifest)
+        return
+
     total_saved = 0
 
     for lang in languages:
@@ -355,55 +379,6 @@ def compress_all_databases():
     print(f"\n数据库压缩完成，总共节省空间: {total_saved:.2f}MB")
 
 
-def drop_icon_ids_table():
-    """删除所有数据库中的iconIDs表，因为该表已不再需要"""
-    print("\n删除iconIDs表...")
-
-    for lang in languages:
-        db_filename = os.path.join(output_db_dir, f'item_db_{lang}.sqlite')
-
-        try:
-            conn = sqlite3.connect(db_filename)
-            cursor = conn.cursor()
-
-            # 删除iconIDs表
-            cursor.execute('DROP TABLE IF EXISTS iconIDs')
-
-            conn.commit()
-            conn.close()
-
-            print(f"已从数据库 {db_filename} 中删除iconIDs表")
-        except Exception as e:
-            print(f"删除数据库 {db_filename} 中的iconIDs表时发生错误: {e}")
-
-
-def clean_invnames_table():
-    """删除invNames表中itemID不在40,000,000到49,999,999范围内的记录"""
-    print("\n清理invNames表...")
-
-    for lang in languages:
-        db_filename = os.path.join(output_db_dir, f'item_db_{lang}.sqlite')
-
-        try:
-            conn = sqlite3.connect(db_filename)
-            cursor = conn.cursor()
-
-            # 先获取总记录数
-            cursor.execute('SELECT COUNT(*) FROM invNames')
-            total_records = cursor.fetchone()[0]
-
-            # 删除不在指定范围内的记录
-            cursor.execute('DELETE FROM invNames WHERE itemID < 40000000 OR itemID > 49999999')
-            deleted_count = cursor.rowcount
-
-            conn.commit()
-            conn.close()
-
-            print(
-                f"已从数据库 {db_filename} 中删除了 {deleted_count} 条记录，原有 {total_records} 条，剩余 {total_records - deleted_count} 条")
-        except Exception as e:
-            print(f"清理数据库 {db_filename} 中的invNames表时发生错误: {e}")
-
 def update_dynamic_items_data():
     """尝试从网络更新动态物品数据，如果失败则使用本地数据"""
     print("\nUpdating dynamic items data...")
@@ -425,77 +400,10 @@ def getNewAttributeID(cursor):
     return max_id + 1
 
 
-def load_dogma_effect_patches():
-    """从JSON文件加载dogmaEffects的修补数据"""
-    patch_file = 'dogmaPatch/dogma_effect_patches.json'
-    
-    try:
-        with open(patch_file, 'r', encoding='utf-8') as f:
-            patches = json.load(f)
-        print(f"成功从 {patch_file} 加载了 {len(patches)} 个修补项")
-        return patches
-    except FileNotFoundError:
-        print(f"警告：修补文件 {patch_file} 不存在，跳过dogmaEffects修补")
-        return []
-    except json.JSONDecodeError as e:
-        print(f"错误：解析修补文件 {patch_file} 失败: {e}")
-        return []
-    except Exception as e:
-        print(f"错误：加载修补文件 {patch_file} 时发生异常: {e}")
-        return []
-
-
-def dogmaEffect_patch():
-    """修补dogmaEffects表中的特定效果数据"""
-    print("\n执行dogmaEffects表数据修补...")
-
-    # 从JSON文件加载修补数据
-    patches = load_dogma_effect_patches()
-    
-    if not patches:
-        print("没有可用的修补数据，跳过修补操作")
-        return
-
-    # 遍历所有语言的数据库
-    for lang in languages:
-        db_filename = os.path.join(output_db_dir, f'item_db_{lang}.sqlite')
-
-        # 检查数据库文件是否存在
-        if os.path.exists(db_filename):
-            db_path = db_filename
-        elif os.path.exists(f"{db_filename}.zip"):
-            print(f"警告：数据库 {db_filename} 已被压缩，无法修补。请在压缩前执行修补操作。")
-            continue
-        else:
-            print(f"错误：找不到数据库 {db_filename}")
-            continue
-
-        try:
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
-
-            # 应用每个修补
-            for patch in patches:
-                effect_name = patch["effect_name"]
-                # 将JSON对象转换为字符串存储到数据库中
-                modifier_info = json.dumps(patch["modifier_info"], separators=(',', ':'))
-
-                # 更新指定效果的modifier_info字段
-                cursor.execute(
-                    'UPDATE dogmaEffects SET modifier_info = ? WHERE effect_name = ?',
-                    (modifier_info, effect_name)
-                )
-
-                # 获取受影响的行数
-                affected_rows = cursor.rowcount
-                print(f"数据库 {lang}: 已修补 {affected_rows} 条 {effect_name} 效果记录")
-
-            # 提交更改
-            conn.commit()
-            conn.close()
-
-        except Exception as e:
-            print(f"修补数据库 {db_filename} 时发生错误: {e}")
+def apply_post_build_patches():
+    """按 dogmaPatch/post_build_patches.json 修补所有数据库（删除iconIDs表、清理invNames表、修补dogmaEffects表等）"""
+    print("\n执行数据库修补...")
+    apply_patches_to_all(output_db_dir, languages)
 
 
 def fetch_compressable():
@@ -570,10 +478,8 @@ def fetch_compressable():
             print(f"更新数据库 {db_filename} 时发生错误: {e}")
 
 
-def main():
-    file_check()
-    rebuild_directory("./output")
-    # 依次处理每个 YAML 文件
+def build_databases():
+    """依次处理每个 YAML 文件，写入所有语言的数据库"""
     copy_and_rename_png_files()
 
     # 更新动态物品数据（尝试从网络获取）
@@ -582,11 +488,8 @@ def main():
     print("\nProcessing dynamic items data...")  # 动态物品属性数据
     process_special_data(process_dynamic_items_data, "dynamic items data")
 
-    print("\nProcessing universe data...")
-    process_special_data(process_universe_data, "universe data", lang=True)
-
-    print("\nProcessing universe names...")
-    process_universe_names()
+    print("\nProcessing universe data and names...")
+    process_universe()
 
     print("\nProcessing dogmaEffects.yaml...")  # 处理效果数据
     process_yaml_file(dogmaEffects_yaml_file_path, read_dogmaEffects_yaml, process_dogmaEffects_data)
@@ -634,12 +537,12 @@ def main():
     print("\nProcessing typeDogma.yaml...")  # 物品属性详情
     load_online = False  # 在线属性同步比较麻烦，只在必要时重新同步，执行 fetch_type_dogma.py 即可
     if os.path.exists(update_typeDogma_yaml_file_path) and load_online:
-        process_yaml_file(update_typeDogma_yaml_file_path, read_typeDogma_yaml, process_typeDogma_data)
+        process_yaml_file_in_batches(update_typeDogma_yaml_file_path, read_typeDogma_yaml, process_typeDogma_data)
     else:
-        process_yaml_file(typeDogma_yaml_file_path, read_typeDogma_yaml, process_typeDogma_data)
+        process_yaml_file_in_batches(typeDogma_yaml_file_path, read_typeDogma_yaml, process_typeDogma_data)
 
     print("\nProcessing types.yaml...")  # 物品详情
-    process_yaml_file(types_yaml_file_path, read_types_yaml, process_types_data)
+    process_yaml_file_in_batches(types_yaml_file_path, read_types_yaml, process_types_data)
 
     print("\nProcessing dbuffCollections.yaml...")  # 处理dbuff集合数据
     process_yaml_file(dbuff_collections_yaml_file_path, read_dbuff_collections_yaml, process_dbuff_collections_data)
@@ -663,6 +566,23 @@ def main():
     print("\nProcessing invNames.yaml...")  # 物品名称
     process_yaml_file(invNames_yaml_file_path, read_invNames_yaml, process_invNames_data)
 
+
+def main():
+    global yaml_prefetcher
+
+    file_check()
+    rebuild_directory("./output")
+
+    # 后续阶段的 YAML 文件在进程池中提前解析，与前面阶段的数据库写入重叠
+    if PREFETCH_YAML:
+        yaml_prefetcher = YamlPrefetcher(yaml_prefetch_plan(), lookahead=YAML_PREFETCH_LOOKAHEAD)
+    try:
+        build_databases()
+    finally:
+        if yaml_prefetcher is not None:
+            yaml_prefetcher.close()
+            yaml_prefetcher = None
+
     print("\nUpdating agents localization...")  # 更新agents表的本地化信息
     update_agents_localization()
 
@@ -675,18 +595,19 @@ def main():
     print("\nProcessing facility rig effects...")  # 处理设施装配效果数据
     process_special_data(process_facility_rig_effects, "facility rig effects", lang=True)
 
-    # 删除iconIDs表，因为图标文件名已经复制到各个相关表中
-    drop_icon_ids_table()
-
-    # 清理invNames表中不在指定范围的记录
-    clean_invnames_table()
-
-    # 执行dogmaEffects表数据修补
-    dogmaEffect_patch()
+    # 执行所有声明式修补：删除iconIDs表、清理invNames表、修补dogmaEffects表
+    apply_post_build_patches()
 
     # 获取物品压缩对照表数据
     fetch_compressable()
 
+    print("\nCreating search index...")  # 生成名称全文搜索索引，需在所有名称处理完成后执行
+    process_special_data(create_search_index, "search index")
+
+    if BUILD_ICON_ATLAS:
+        print("\nBuilding icon atlases...")  # 生成小图标图集，需在图标复制和图标文件名写入数据库之后执行
+        build_icon_atlas_data()
+
     print("\n")
     create_uncompressed_icons_zip(ICONS_DEST_DIR, ZIP_ICONS_DEST)
 
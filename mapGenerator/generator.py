@@ -1,13 +1,16 @@
 import asyncio
-import aiohttp
 import os
 import re
 import json
+import sys
 import yaml
 from bs4 import BeautifulSoup
 from pathlib import Path
 from urllib.parse import urljoin, urlparse
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from esi_client import EsiClient
+
 # 从dotlan下载svg地图并生成json文件
 # 1. 下载New Eden SVG
 # 2. 提取星域链接
@@ -27,19 +30,18 @@ class MapGenerator:
         self.region_links = {}  # 存储星域连接关系
         self.systems_data = {}  # 存储所有星域的系统数据
         
-    async def download_new_eden_svg(self):
+    async def download_new_eden_svg(self, client):
         """下载New Eden SVG地图"""
         print("正在下载New Eden SVG地图...")
-        async with aiohttp.ClientSession() as session:
-            async with session.get(world_map_layout) as response:
-                if response.status == 200:
-                    content = await response.text()
-                    with open(self.maps_dir / "New_Eden.svg", "w", encoding="utf-8") as f:
-                        f.write(content)
-                    print("New Eden SVG下载完成")
-                    return content
-                else:
-                    raise Exception(f"下载失败: {response.status}")
+        response = await client.request(world_map_layout)
+        if response.status == 200:
+            content = response.text()
+            with open(self.maps_dir / "New_Eden.svg", "w", encoding="utf-8") as f:
+                f.write(content)
+            print("New Eden SVG下载完成")
+            return content
+        else:
+            raise Exception(f"下载失败: {response.status}")
     
     def extract_region_links(self, svg_content):
         """从SVG内容中提取星域链接"""
@@ -65,38 +67,33 @@ class MapGenerator:
             print(f"解析SVG失败: {e}")
             return {}
     
-    async def download_region_svg(self, session, region_name, url):
+    async def download_region_svg(self, client, region_name, url):
         """下载单个星域的SVG"""
         try:
             # 修改URL为SVG格式
             svg_url = url.replace('/map/', '/svg/') + '.svg'
-            async with session.get(svg_url) as response:
-                if response.status == 200:
-                    content = await response.text()
-                    filename = f"{region_name}.svg"
-                    with open(self.maps_dir / filename, "w", encoding="utf-8") as f:
-                        f.write(content)
-                    print(f"下载完成: {region_name}")
-                    return region_name, content
-                else:
-                    print(f"下载失败 {region_name}: {response.status}")
-                    return region_name, None
+            response = await client.request(svg_url)
+            if response.status == 200:
+                content = response.text()
+                filename = f"{region_name}.svg"
+                with open(self.maps_dir / filename, "w", encoding="utf-8") as f:
+                    f.write(content)
+                print(f"下载完成: {region_name}")
+                return region_name, content
+            else:
+                print(f"下载失败 {region_name}: {response.status}")
+                return region_name, None
         except Exception as e:
             print(f"下载出错 {region_name}: {e}")
             return region_name, None
     
-    async def download_all_regions(self, region_links):
-        """并发下载所有星域SVG"""
+    async def download_all_regions(self, client, region_links):
+        """并发下载所有星域SVG，并发度由共享客户端的令牌桶控制"""
         print("正在并发下载星域SVG...")
-        connector = aiohttp.TCPConnector(limit=30)
-        async with aiohttp.ClientSession(connector=connector) as session:
-            tasks = []
-            for region_name, url in region_links.items():
-                task = self.download_region_svg(session, region_name, url)
-                tasks.append(task)
-            
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-            return {name: content for name, content in results if content is not None}
+        results = await client.map(
+            lambda item: self.download_region_svg(client, item[0], item[1]),
+            region_links.items())
+        return {name: content for name, content in results if content is not None}
     
     def extract_coordinates_and_relations(self, svg_content):
         """从SVG中提取坐标和连接关系"""
@@ -409,17 +406,17 @@ class MapGenerator:
             json.dump(self.systems_data, f, ensure_ascii=False, indent=2)
         print(f"所有星域系统数据已保存到: {output_path}")
     
-    async def run(self):
+    async def run(self, client):
         """运行完整的地图生成流程"""
         try:
             # 1. 下载New Eden SVG
-            svg_content = await self.download_new_eden_svg()
+            svg_content = await self.download_new_eden_svg(client)
             
             # 2. 提取星域链接
             region_links = self.extract_region_links(svg_content)
             
             # 3. 并发下载所有星域SVG
-            region_svgs = await self.download_all_regions(region_links)
+            region_svgs = await self.download_all_regions(client, region_links)
             
             # 4. 处理星域数据
             self.process_regions_data(region_links, region_svgs, svg_content)
@@ -435,7 +432,9 @@ class MapGenerator:
 
 async def main():
     generator = MapGenerator()
-    await generator.run()
+    # dotlan 不是 ESI，使用较低的速率上限
+    async with EsiClient(rate=10, max_rate=30) as client:
+        await generator.run(client)
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
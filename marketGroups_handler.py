@@ -1,5 +1,4 @@
 import yaml
-from collections import defaultdict
 import time
 
 def read_yaml(file_path):
@@ -13,21 +12,35 @@ def read_yaml(file_path):
     print(f"读取 {file_path} 耗时: {end_time - start_time:.2f} 秒")
     return data
 
-def build_group_hierarchies(cursor):
-    """构建组层级关系和组信息的缓存"""
-    # 获取所有组的层级关系
-    cursor.execute('SELECT group_id, parentgroup_id, icon_name FROM marketGroups')
-    results = cursor.fetchall()
-    
-    # 构建父子关系映射
-    children_map = defaultdict(list)
-    group_info = {}
-    for group_id, parent_id, icon_name in results:
-        if parent_id is not None:
-            children_map[parent_id].append(group_id)
-        group_info[group_id] = {'icon_name': icon_name}
-    
-    return children_map, group_info
+# 没有找到任何图标时使用的默认图标
+DEFAULT_GROUP_ICON = 'items_73_16_50.png'
+
+# 特殊图标ID对应的图标文件
+SPECIAL_GROUP_ICONS = {
+    20966: "items_19_128_1.png",
+    20959: "items_19_128_4.png",
+    20967: "items_19_128_3.png",
+    20968: "items_19_128_2.png",
+}
+
+def load_icon_files(cursor):
+    """一次读取 iconIDs 表中所有图标ID对应的文件名"""
+    cursor.execute('SELECT icon_id, iconFile_new FROM iconIDs')
+    return dict(cursor.fetchall())
+
+def load_group_type_icons(cursor):
+    """一次读取每个市场组中 metaGroupID 最小的物品图标，作为该组没有图标时的备选"""
+    cursor.execute('''
+        SELECT marketGroupID, icon_filename
+        FROM types
+        WHERE marketGroupID IS NOT NULL
+        AND icon_filename IS NOT NULL
+        ORDER BY marketGroupID, metaGroupID
+    ''')
+    type_icons = {}
+    for group_id, icon_filename in cursor.fetchall():
+        type_icons.setdefault(group_id, icon_filename)
+    return type_icons
 
 def build_group_items_map(cursor):
     """构建组与物品数量的映射"""
@@ -39,47 +52,56 @@ def build_group_items_map(cursor):
     ''')
     return dict(cursor.fetchall())
 
-def get_icon_for_group(group_id, children_map, group_info, visited=None):
-    """使用缓存的数据递归查找组的图标"""
-    if visited is None:
-        visited = set()
-    
-    if group_id in visited:
-        return None
-    visited.add(group_id)
-    
-    # 检查当前组的图标
-    current_icon = group_info[group_id]['icon_name']
-    if current_icon:
-        return current_icon
-    
-    # 检查子组的图标
-    for child_id in children_map[group_id]:
-        child_icon = get_icon_for_group(child_id, children_map, group_info, visited)
-        if child_icon:
-            return child_icon
-    
-    return None
+def build_closure(parent_map):
+    """
+    根据父组关系生成祖先/后代闭包
 
-def check_group_has_items_cached(group_id, children_map, items_map, visited=None):
-    """使用缓存的数据递归检查组是否包含物品"""
-    if visited is None:
-        visited = set()
-    
-    if group_id in visited:
-        return False
-    visited.add(group_id)
-    
-    # 检查当前组是否有物品
-    if items_map.get(group_id, 0) > 0:
-        return True
-    
-    # 检查子组
-    for child_id in children_map[group_id]:
-        if check_group_has_items_cached(child_id, children_map, items_map, visited):
-            return True
-    
-    return False
+    Returns:
+        closure: [(ancestor_id, descendant_id, depth), ...]，包含 depth 为 0 的自身记录
+        levels: {group_id: 该组到根的层数}
+    """
+    closure = []
+    levels = {}
+    for group_id in parent_map:
+        ancestor_id = group_id
+        depth = 0
+        seen = set()
+        # 沿父组链向上，遇到环或不存在的父组时停止
+        while ancestor_id is not None and ancestor_id in parent_map and ancestor_id not in seen:
+            seen.add(ancestor_id)
+            closure.append((ancestor_id, group_id, depth))
+            ancestor_id = parent_map[ancestor_id]
+            depth += 1
+        levels[group_id] = depth - 1
+    return closure, levels
+
+def resolve_group_tree(parent_map, icon_map, items_map):
+    """
+    自底向上一次遍历，计算每个组的子树物品数和最终图标
+
+    组自身没有图标时，按组ID顺序使用第一个有图标的子组的图标（与原先的深度优先查找一致），
+    整个子树都没有图标时使用默认图标
+
+    Returns:
+        closure, subtree_counts {group_id: 子树物品数}, resolved_icons {group_id: 图标}
+    """
+    closure, levels = build_closure(parent_map)
+
+    subtree_counts = dict.fromkeys(parent_map, 0)
+    for ancestor_id, descendant_id, _ in closure:
+        subtree_counts[ancestor_id] += items_map.get(descendant_id, 0)
+
+    # 子组先于父组处理，同层按组ID顺序
+    resolved_icons = {}
+    first_child_icon = {}  # {父组ID: 组ID最小的有图标子组的图标}
+    for group_id in sorted(parent_map, key=lambda g: (-levels[g], g)):
+        icon_name = icon_map.get(group_id) or first_child_icon.get(group_id)
+        parent_id = parent_map[group_id]
+        if icon_name and parent_id in parent_map and parent_id not in first_child_icon:
+            first_child_icon[parent_id] = icon_name
+        resolved_icons[group_id] = icon_name or DEFAULT_GROUP_ICON
+
+    return closure, subtree_counts, resolved_icons
 
 def process_data(yaml_data, cursor, language):
     """处理YAML数据并写入数据库"""
@@ -91,12 +113,27 @@ def process_data(yaml_data, cursor, language):
         description TEXT,
         icon_name TEXT,
         parentgroup_id INTEGER,
-        show BOOLEAN DEFAULT 1
+        show BOOLEAN DEFAULT 1,
+        item_count INTEGER NOT NULL DEFAULT 0  -- 子树（含自身）中的物品数量
     )
     ''')
     
+    # 创建祖先/后代闭包表，"某市场分组下的所有物品"可通过一次索引连接查询：
+    # SELECT t.* FROM marketGroups_closure c JOIN types t ON t.marketGroupID = c.descendant_id WHERE c.ancestor_id = ?
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS marketGroups_closure (
+        ancestor_id INTEGER NOT NULL,
+        descendant_id INTEGER NOT NULL,
+        depth INTEGER NOT NULL,  -- 0 表示自身
+        PRIMARY KEY (ancestor_id, descendant_id)
+    ) WITHOUT ROWID
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_marketGroups_closure_descendant ON marketGroups_closure(descendant_id, ancestor_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_types_marketGroupID ON types(marketGroupID)')
+    
     # 清空现有数据
     cursor.execute('DELETE FROM marketGroups')
+    cursor.execute('DELETE FROM marketGroups_closure')
 
     # 自定义组名称附加文本
     custom_group_expand = {
@@ -112,8 +149,14 @@ def process_data(yaml_data, cursor, language):
         '1337': '(P4)',
     }
 
+    # 一次性读取图标映射，不再逐组查询
+    icon_files = load_icon_files(cursor)
+    type_icons = load_group_type_icons(cursor)
+
     # 处理每个市场组
     insert_data = []
+    parent_map = {}
+    icon_map = {}
     for group_id, group_data in yaml_data.items():
         # 获取当前语言的名称和描述，如果为空则使用英语
         name = group_data.get('nameID', {}).get(language, '')
@@ -128,78 +171,38 @@ def process_data(yaml_data, cursor, language):
         
         # 获取图标ID并查找对应的图标文件名
         icon_id = group_data.get('iconID')
-        icon_name = None
-        if icon_id == 20966:
-            icon_name = "items_19_128_1.png"
-        if icon_id == 20959:
-            icon_name = "items_19_128_4.png"
-        if icon_id == 20967:
-            icon_name = "items_19_128_3.png"
-        if icon_id == 20968:
-            icon_name = "items_19_128_2.png"
+        icon_name = SPECIAL_GROUP_ICONS.get(icon_id)
         if icon_id is not None and icon_name is None:
-            cursor.execute('SELECT iconFile_new FROM iconIDs WHERE icon_id = ?', (icon_id,))
-            result = cursor.fetchone()
-            if result:
-                icon_name = result[0]
+            icon_name = icon_files.get(icon_id)
         
         # 如果没有找到图标，从types表中获取
         if not icon_name:
-            cursor.execute('''
-                SELECT icon_filename 
-                FROM types 
-                WHERE marketGroupID = ? 
-                AND icon_filename IS NOT NULL 
-                ORDER BY metaGroupID 
-                LIMIT 1
-            ''', (group_id,))
-            result = cursor.fetchone()
-            if result:
-                icon_name = result[0]
+            icon_name = type_icons.get(group_id)
         
         # 获取父组ID
         parentgroup_id = group_data.get('parentGroupID')
         
         # 收集插入数据
-        insert_data.append((group_id, name, description, icon_name, parentgroup_id))
+        insert_data.append((group_id, name, description, parentgroup_id))
+        parent_map[group_id] = parentgroup_id
+        icon_map[group_id] = icon_name
+    
+    # 自底向上计算闭包、子树物品数和图标继承
+    closure, subtree_counts, resolved_icons = resolve_group_tree(parent_map, icon_map, build_group_items_map(cursor))
     
     # 批量插入数据
     cursor.executemany('''
         INSERT OR REPLACE INTO marketGroups 
-        (group_id, name, description, icon_name, parentgroup_id)
-        VALUES (?, ?, ?, ?, ?)
-    ''', insert_data)
-    
-    # 构建缓存数据
-    children_map, group_info = build_group_hierarchies(cursor)
-    items_map = build_group_items_map(cursor)
-    
-    # 后处理：处理图标继承
-    updates_icon = []
-    for group_id in group_info:
-        if not group_info[group_id]['icon_name']:
-            icon_name = get_icon_for_group(group_id, children_map, group_info)
-            if not icon_name:
-                icon_name = 'items_73_16_50.png'
-            updates_icon.append((icon_name, group_id))
-    
-    # 批量更新图标
-    if updates_icon:
-        cursor.executemany('''
-            UPDATE marketGroups 
-            SET icon_name = ? 
-            WHERE group_id = ?
-        ''', updates_icon)
-    
-    # 后处理：检查显示状态
-    updates_show = []
-    for group_id in group_info:
-        should_show = check_group_has_items_cached(group_id, children_map, items_map)
-        updates_show.append((should_show, group_id))
-    
-    # 批量更新显示状态
+        (group_id, name, description, icon_name, parentgroup_id, show, item_count)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', [
+        (group_id, name, description, resolved_icons[group_id], parentgroup_id,
+         subtree_counts[group_id] > 0, subtree_counts[group_id])
+        for group_id, name, description, parentgroup_id in insert_data
+    ])
+    
+    # 写入闭包表
     cursor.executemany('''
-        UPDATE marketGroups 
-        SET show = ? 
-        WHERE group_id = ?
-    ''', updates_show)
\ No newline at end of file
+        INSERT OR REPLACE INTO marketGroups_closure (ancestor_id, descendant_id, depth)
+        VALUES (?, ?, ?)
+    ''', closure)
@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""
+内存中的名称索引
+
+从数据库的 solarsystems、types、invNames 表一次性读取所有语言的名称，之后的名称解析
+完全在内存中完成，不再为每个名称打开数据库执行 LIKE 或等值查询：
+- 完全匹配与前缀匹配：对排序后的名称数组做二分查找
+- 子串匹配与模糊匹配：基于名称的三元组（trigram）倒排表
+
+用法：
+    index = NameIndex.from_database('output/db/item_db_zh.sqlite', kinds=('solarsystem',))
+    system_id = index.resolve('C-J6MT', kind='solarsystem')
+    ids = index.resolve_many(['C-J6MT', 'VBPT-T'], kind='solarsystem')
+"""
+import sqlite3
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+# 支持的语言列表
+LANGUAGES = ['de', 'en', 'es', 'fr', 'ja', 'ko', 'ru', 'zh']
+
+# 类别 -> (表名, ID列, 名称列)
+NAME_SOURCES = {
+    'solarsystem': ('solarsystems', 'solarSystemID',
+                    ['solarSystemName'] + [f'solarSystemName_{lang}' for lang in LANGUAGES]),
+    'type': ('types', 'type_id', ['name'] + [f'{lang}_name' for lang in LANGUAGES]),
+    'invname': ('invNames', 'itemID', ['itemName']),
+}
+
+# 模糊匹配的最低相似度（Dice 系数）
+FUZZY_THRESHOLD = 0.4
+
+
+class NameMatch(NamedTuple):
+    kind: str
+    item_id: int
+    name: str
+
+
+def normalize(name: str) -> str:
+    """比较用的名称：去掉首尾空白并忽略大小写"""
+    return name.strip().casefold()
+
+
+def trigrams(key: str) -> set:
+    """名称的三元组集合，首尾补空格使短名称和词首也能参与匹配"""
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class NameIndex:
+    """名称到ID的内存索引，构建一次后可反复查询"""
+
+    def __init__(self, entries: Iterable[Tuple[str, int, str]]):
+        """
+        Args:
+            entries: (kind, item_id, name) 的可迭代对象
+        """
+        unique = {(normalize(name), kind, int(item_id), name)
+                  for kind, item_id, name in entries if name and name.strip()}
+        rows = sorted(unique)
+        self._keys: List[str] = [row[0] for row in rows]
+        self._matches: List[NameMatch] = [NameMatch(kind, item_id, name) for _, kind, item_id, name in rows]
+        self._trigrams: Optional[Dict[str, List[int]]] = None
+        self._gram_counts: List[int] = []
+
+    @classmethod
+    def from_database(cls, db_path: str, kinds: Sequence[str] = tuple(NAME_SOURCES)) -> 'NameIndex':
+        """从数据库读取指定类别的名称构建索引，表或列不存在时跳过"""
+        conn = sqlite3.connect(str(db_path))
+        try:
+            cursor = conn.cursor()
+            entries = []
+            for kind in kinds:
+                table, id_column, name_columns = NAME_SOURCES[kind]
+                cursor.execute(f'PRAGMA table_info({table})')
+                columns = {row[1] for row in cursor.fetchall()}
+                name_columns = [column for column in name_columns if column in columns]
+                if id_column not in columns or not name_columns:
+                    continue
+                cursor.execute(f"SELECT {id_column}, {', '.join(name_columns)} FROM {table}")
+                for row in cursor.fetchall():
+                    entries.extend((kind, row[0], name) for name in set(row[1:]) if name)
+        finally:
+            conn.close()
+        return cls(entries)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def _trigram_index(self) -> Dict[str, List[int]]:
+        # 倒排表只在第一次子串/模糊查询时构建
+        if self._trigrams is None:
+            postings = defaultdict(list)
+            for position, key in enumerate(self._keys):
+                grams = trigrams(key)
+                self._gram_counts.append(len(grams))
+                for gram in grams:
+                    postings[gram].append(position)
+            self._trigrams = dict(postings)
+        return self._trigrams
+
+    @staticmethod
+    def _filter(matches: Iterable[NameMatch], kind: Optional[str]) -> List[NameMatch]:
+        return [match for match in matches if kind is None or match.kind == kind]
+
+    def exact(self, name: str, kind: Optional[str] = None) -> List[NameMatch]:
+        """忽略大小写的完全匹配"""
+        key = normalize(name)
+        start = bisect_left(self._keys, key)
+        end = start
+        while end < len(self._keys) and self._keys[end] == key:
+            end += 1
+        return self._filter(self._matches[start:end], kind)
+
+    def prefix(self, text: str, kind: Optional[str] = None, limit: Optional[int] = None) -> List[NameMatch]:
+        """以 text 开头的名称，按名称排序"""
+        key = normalize(text)
+        if not key:
+            return []
+        start = bisect_left(self._keys, key)
+        # 所有以 key 开头的字符串都小于 key + 最大码点
+        end = bisect_left(self._keys, key + '\U0010ffff', start)
+        matches = self._filter(self._matches[start:end], kind)
+        return matches[:limit] if limit is not None else matches
+
+    def substring(self, text: str, kind: Optional[str] = None, limit: Optional[int] = None) -> List[NameMatch]:
+        """包含 text 的名称：先用三元组倒排表求交集，再逐个确认"""
+        key = normalize(text)
+        if not key:
+            return []
+        postings = self._trigram_index()
+        # 只使用不含补位空格的三元组，它们必然出现在任何包含 key 的名称中
+        grams = [key[i:i + 3] for i in range(len(key) - 2)]
+        if grams:
+            lists = sorted((postings.get(gram, []) for gram in set(grams)), key=len)
+            candidates = set(lists[0])
+            for positions in lists[1:]:
+                candidates.intersection_update(positions)
+                if not candidates:
+                    break
+            positions = sorted(candidates)
+        else:
+            # 不足3个字符，只能扫描
+            positions = range(len(self._keys))
+        matches = self._filter((self._matches[p] for p in positions if key in self._keys[p]), kind)
+        matches.sort(key=lambda match: (len(match.name), match.name))
+        return matches[:limit] if limit is not None else matches
+
+    def fuzzy(self, text: str, kind: Optional[str] = None, limit: int = 10,
+              threshold: float = FUZZY_THRESHOLD) -> List[Tuple[NameMatch, float]]:
+        """按三元组 Dice 相似度排序的近似匹配，用于拼写错误的名称"""
+        query_grams = trigrams(normalize(text))
+        if not query_grams:
+            return []
+        postings = self._trigram_index()
+        shared = defaultdict(int)
+        for gram in query_grams:
+            for position in postings.get(gram, ()):
+                shared[position] += 1
+
+        scored = []
+        for position, count in shared.items():
+            match = self._matches[position]
+            if kind is not None and match.kind != kind:
+                continue
+            score = 2 * count / (len(query_grams) + self._gram_counts[position])
+            if score >= threshold:
+                scored.append((match, score))
+        scored.sort(key=lambda item: (-item[1], len(item[0].name), item[0].name))
+        return scored[:limit]
+
+    def search(self, text: str, kind: Optional[str] = None, limit: int = 20) -> List[NameMatch]:
+        """依次尝试完全匹配、前缀匹配、子串匹配、模糊匹配，返回第一组非空结果"""
+        matches = self.exact(text, kind) or self.prefix(text, kind, limit) or self.substring(text, kind, limit)
+        if matches:
+            return matches[:limit]
+        return [match for match, _ in self.fuzzy(text, kind, limit)]
+
+    def resolve(self, name: str, kind: Optional[str] = None, fuzzy: bool = False) -> Optional[int]:
+        """
+        将名称解析为唯一的ID
+
+        完全匹配优先，其次是唯一的前缀匹配；fuzzy 为 True 时再尝试模糊匹配的最佳结果。
+        无法唯一确定时返回 None
+        """
+        ids = {match.item_id for match in self.exact(name, kind)}
+        if not ids:
+            ids = {match.item_id for match in self.prefix(name, kind)}
+        if len(ids) == 1:
+            return next(iter(ids))
+        if not ids and fuzzy:
+            best = self.fuzzy(name, kind, limit=1)
+            if best:
+                return best[0][0].item_id
+        return None
+
+    def resolve_many(self, names: Iterable[str], kind: Optional[str] = None,
+                     fuzzy: bool = False) -> Dict[str, Optional[int]]:
+        """批量解析名称，返回 {名称: ID或None}，供表格驱动的工具使用"""
+        return {name: self.resolve(name, kind, fuzzy) for name in names}
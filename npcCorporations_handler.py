@@ -3,12 +3,10 @@ try:
     from yaml import CSafeLoader as SafeLoader
 except ImportError:
     from yaml import SafeLoader
-import os
 import time
-import aiohttp
 import asyncio
-from pathlib import Path
 import logging
+from image_downloader import download_images
 
 # 配置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -25,62 +23,10 @@ def read_yaml(file_path):
     print(f"读取 {file_path} 耗时: {end_time - start_time:.2f} 秒")
     return data
 
-async def download_corporation_icon(corp_id, output_dir, semaphore, retry_count=5):
-    """下载单个军团图标，带有重试逻辑"""
-    url = f"https://images.evetech.net/corporations/{corp_id}/logo?size=128"
-    filename = f"corperation_{corp_id}_128.png"
-    filepath = Path(output_dir) / filename
-    
-    # 如果文件已存在，直接返回文件名
-    if filepath.exists():
-        logger.info(f"图标已存在，跳过下载: {filename}")
-        return filename
-    
-    async with semaphore:  # 使用信号量限制并发数
-        for attempt in range(retry_count):
-            try:
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(url, timeout=10) as response:
-                        if response.status == 200:
-                            content = await response.read()
-                            with open(filepath, 'wb') as f:
-                                f.write(content)
-                            logger.info(f"成功下载图标: {filename}")
-                            return filename
-                        else:
-                            logger.warning(f"下载失败 (HTTP {response.status}): {filename}")
-            except asyncio.TimeoutError:
-                logger.warning(f"超时 (尝试 {attempt + 1}/{retry_count}): {filename}")
-            except Exception as e:
-                logger.warning(f"错误 (尝试 {attempt + 1}/{retry_count}): {filename} - {str(e)}")
-            
-            if attempt < retry_count - 1:
-                await asyncio.sleep(1)  # 重试前等待1秒
-    
-    logger.error(f"所有重试均失败: {filename}")
-    return None
-
 async def download_all_corporation_icons(corp_ids, output_dir):
-    """下载所有军团图标"""
-    # 创建输出目录
-    os.makedirs(output_dir, exist_ok=True)
-    
-    # 创建信号量以限制并发请求数
-    semaphore = asyncio.Semaphore(10)
-    
-    # 创建下载任务
-    tasks = [
-        download_corporation_icon(corp_id, output_dir, semaphore)
-        for corp_id in corp_ids
-    ]
-    
+    """下载所有军团图标，所有请求共用一个连接池会话"""
     print(f"准备下载 {len(corp_ids)} 个军团图标...")
-    
-    # 异步执行所有下载任务
-    results = await asyncio.gather(*tasks)
-    
-    # 返回结果字典
-    return {corp_id: filename for corp_id, filename in zip(corp_ids, results) if filename}
+    return await download_images('corporation', corp_ids, output_dir, size=128)
 
 def create_npc_corporations_table(cursor):
     """创建 npcCorporations 表"""
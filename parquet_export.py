@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+"""
+导出列式 Parquet 数据
+
+把 output/db 下各语言数据库的每张表导出为 Parquet（字典编码、zstd 压缩、每个行组带 min/max 统计），
+供数据分析使用：
+    python parquet_export.py                          # 导出到 output/parquet
+    python parquet_export.py --out-dir /tmp/parquet
+
+各语言内容完全相同的表（typeAttributes、蓝图表等与语言无关的数据）只保存一份：
+    output/parquet/{table}.parquet
+含本地化内容的表按语言分别保存（hive 分区目录，可以用 pyarrow.dataset 一次读取所有语言）：
+    output/parquet/{table}/lang={lang}/data.parquet
+output/parquet/manifest.json 记录每张表是否共享、行数和文件列表。
+
+ParquetStore 是配套的查询辅助，读取时按行组统计跳过不相关的数据，计算在 Arrow 中按列完成：
+    store = ParquetStore()
+    store.attribute_values([37, 552])                 # 指定属性的 (type_id, attribute_id, value)
+    store.blueprint_materials([691], 'manufacturing') # 蓝图制造材料按 typeID 汇总
+
+需要 pyarrow（pip install pyarrow）。FTS5 / R*Tree 虚拟表及其内部表是索引结构，不导出。
+"""
+import argparse
+import json
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# 支持的语言列表
+LANGUAGES = ['en', 'de', 'es', 'fr', 'ja', 'ko', 'ru', 'zh']
+
+output_db_dir = 'output/db'
+output_parquet_dir = 'output/parquet'
+
+MANIFEST_FILENAME = 'manifest.json'
+
+# 每个行组的行数，行组越小按统计跳过的粒度越细
+ROW_GROUP_SIZE = 64 * 1024
+
+# 写入前的排序列，默认按主键排序；按常用过滤列排序可以让行组统计更紧凑
+SORT_KEYS = {
+    'typeAttributes': ['attribute_id', 'type_id'],
+}
+
+
+def _arrow_type(declared: str) -> Optional[pa.DataType]:
+    """按 SQLite 的类型亲和规则把声明类型映射为 Arrow 类型，无法确定时返回 None（按值推断）"""
+    declared = (declared or '').upper()
+    if 'BOOL' in declared:
+        return pa.bool_()
+    if 'INT' in declared:
+        return pa.int64()
+    if any(name in declared for name in ('CHAR', 'CLOB', 'TEXT')):
+        return pa.string()
+    if any(name in declared for name in ('REAL', 'FLOA', 'DOUB')):
+        return pa.float64()
+    return None
+
+
+def _to_array(values: list, arrow_type: Optional[pa.DataType]) -> pa.Array:
+    """
+    转换一列数据
+
+    SQLite 的列可以混存不同类型的值，按声明类型转换失败时退回按值推断，仍失败则按字符串保存
+    """
+    if arrow_type == pa.bool_():
+        values = [None if value is None else bool(value) for value in values]
+    try:
+        return pa.array(values, type=arrow_type)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        pass
+    try:
+        return pa.array(values)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return pa.array([None if value is None else str(value) for value in values], type=pa.string())
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def list_tables(conn: sqlite3.Connection) -> List[str]:
+    """普通表列表，跳过虚拟表和它们的内部表"""
+    rows = conn.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+    ).fetchall()
+    virtual = [name for name, sql in rows if sql and sql.upper().startswith('CREATE VIRTUAL TABLE')]
+    return [
+        name for name, _ in rows
+        if name not in virtual and not any(name.startswith(f'{table}_') for table in virtual)
+    ]
+
+
+def read_table(conn: sqlite3.Connection, table: str) -> pa.Table:
+    """读取一张表为 Arrow 表，按 SORT_KEYS 或主键排序"""
+    columns = conn.execute(f'PRAGMA table_info({_quote(table)})').fetchall()
+    names = [column[1] for column in columns]
+    primary_key = [column[1] for column in sorted(columns, key=lambda column: column[5]) if column[5]]
+    sort_keys = SORT_KEYS.get(table, primary_key)
+
+    order_by = f" ORDER BY {', '.join(_quote(name) for name in sort_keys)}" if sort_keys else ''
+    rows = conn.execute(f"SELECT {', '.join(_quote(name) for name in names)} FROM {_quote(table)}{order_by}").fetchall()
+    data = list(zip(*rows)) if rows else [[] for _ in names]
+    return pa.table({
+        name: _to_array(list(values), _arrow_type(column[2]))
+        for name, column, values in zip(names, columns, data)
+    })
+
+
+def write_parquet(table: pa.Table, path: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    pq.write_table(
+        table, path,
+        compression='zstd',
+        use_dictionary=True,
+        write_statistics=True,
+        row_group_size=ROW_GROUP_SIZE,
+    )
+
+
+def export_table(table: str, db_paths: Dict[str, str], out_dir: str) -> dict:
+    """
+    导出一张表：各语言内容完全相同时只写一份，否则按语言分别写
+
+    Returns:
+        清单项 {"shared": bool, "rows": 行数, "files": [相对路径, ...]}
+    """
+    arrow_tables = {}
+    for lang, db_path in db_paths.items():
+        conn = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True)
+        try:
+            if table in list_tables(conn):
+                arrow_tables[lang] = read_table(conn, table)
+        finally:
+            conn.close()
+
+    base = next(iter(arrow_tables.values()))
+    shared = len(arrow_tables) == len(db_paths) and all(
+        other.equals(base) for other in arrow_tables.values()
+    )
+    if shared:
+        files = {None: f'{table}.parquet'}
+    else:
+        files = {lang: os.path.join(table, f'lang={lang}', 'data.parquet') for lang in arrow_tables}
+
+    for lang, relative_path in files.items():
+        write_parquet(base if lang is None else arrow_tables[lang], os.path.join(out_dir, relative_path))
+    return {
+        'shared': shared,
+        'rows': base.num_rows,
+        'files': [path.replace(os.sep, '/') for path in files.values()],
+    }
+
+
+def export_all(db_dir: str = output_db_dir, out_dir: str = output_parquet_dir,
+               languages: Sequence[str] = LANGUAGES, workers: int = 4) -> dict:
+    """并行导出所有表并写入清单"""
+    db_paths = {
+        lang: os.path.join(db_dir, f'item_db_{lang}.sqlite') for lang in languages
+        if os.path.exists(os.path.join(db_dir, f'item_db_{lang}.sqlite'))
+    }
+    if not db_paths:
+        raise FileNotFoundError(f"{db_dir} 中没有找到数据库")
+
+    # 以第一个语言（en）的表为准
+    conn = sqlite3.connect(next(iter(db_paths.values())))
+    try:
+        tables = list_tables(conn)
+    finally:
+        conn.close()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        entries = dict(zip(tables, executor.map(lambda table: export_table(table, db_paths, out_dir), tables)))
+
+    manifest = {'languages': list(db_paths), 'tables': entries}
+    with open(os.path.join(out_dir, MANIFEST_FILENAME), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return manifest
+
+
+class ParquetStore:
+    """读取 export_all 导出的 Parquet 数据"""
+
+    def __init__(self, root: str = output_parquet_dir):
+        self.root = root
+        with open(os.path.join(root, MANIFEST_FILENAME), 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+
+    def path(self, table: str, lang: str = 'en') -> str:
+        entry = self.manifest['tables'][table]
+        if entry['shared']:
+            return os.path.join(self.root, entry['files'][0])
+        return os.path.join(self.root, table, f'lang={lang}', 'data.parquet')
+
+    def read(self, table: str, lang: str = 'en', columns: Optional[List[str]] = None,
+             filters=None) -> pa.Table:
+        """
+        读取一张表
+
+        Args:
+            filters: pyarrow 过滤条件，如 [('attribute_id', 'in', [37, 552])]，按行组统计跳过不匹配的行组
+        """
+        return pq.read_table(self.path(table, lang), columns=columns, filters=filters)
+
+    def attribute_values(self, attribute_ids: Sequence[int], type_ids: Optional[Sequence[int]] = None) -> pa.Table:
+        """指定属性的 (type_id, attribute_id, value)，可以再限定物品"""
+        filters = [('attribute_id', 'in', list(attribute_ids))]
+        if type_ids is not None:
+            filters.append(('type_id', 'in', list(type_ids)))
+        return self.read('typeAttributes', columns=['type_id', 'attribute_id', 'value'], filters=filters)
+
+    def blueprint_materials(self, blueprint_ids: Sequence[int], activity: str = 'manufacturing',
+                            lang: str = 'en') -> pa.Table:
+        """
+        多个蓝图某项活动所需材料按 typeID 汇总
+
+        activity: manufacturing / research_material / research_time / copying / invention 等，
+        对应 blueprint_{activity}_materials 表
+        """
+        materials = self.read(f'blueprint_{activity}_materials', lang,
+                              columns=['blueprintTypeID', 'typeID', 'typeName', 'quantity'],
+                              filters=[('blueprintTypeID', 'in', list(blueprint_ids))])
+        totals = materials.group_by(['typeID', 'typeName']).aggregate([('quantity', 'sum')])
+        return totals.sort_by([('quantity_sum', 'descending')])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='把各语言数据库导出为 Parquet')
+    parser.add_argument('--db-dir', default=output_db_dir, help='数据库目录')
+    parser.add_argument('--out-dir', default=output_parquet_dir, help='Parquet 输出目录')
+    args = parser.parse_args(argv)
+
+    start_time = time.time()
+    manifest = export_all(args.db_dir, args.out_dir)
+    tables = manifest['tables']
+    shared = sum(1 for entry in tables.values() if entry['shared'])
+    size = sum(
+        os.path.getsize(os.path.join(args.out_dir, path))
+        for entry in tables.values() for path in entry['files']
+    )
+    print(f"导出 {len(tables)} 张表（{shared} 张各语言共享，{len(tables) - shared} 张按语言保存）")
+    print(f"Parquet 总大小: {size / 1024 / 1024:.2f} MB，耗时: {time.time() - start_time:.2f} 秒")
+
+
+if __name__ == "__main__":
+    main()
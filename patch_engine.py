@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""
+构建完成后的数据库修补
+
+所有后处理修补（更新、删除、删表）都在 dogmaPatch/post_build_patches.json 中声明，按顺序执行：
+    {"op": "drop_table", "table": "iconIDs"}
+    {"op": "delete", "table": "invNames", "where": "itemID < ? OR itemID > ?", "params": [40000000, 49999999]}
+    {"op": "update", "table": "dogmaEffects", "key": "effect_name", "rows": [{"effect_name": ..., "modifier_info": ...}]}
+    {"op": "update", ..., "rows_file": "dogma_effect_patches.json"}   # 行数据放在单独的文件中（相对修补文件的路径）
+
+每个修补可以用 "languages": ["zh"] 限定只作用于部分语言的数据库；
+标记 "manual": true 的修补不在构建时执行，只在以 manual=True 调用时执行（如 update_type_description.py）。
+update 的每一行除 key 列外的字段都会被写入，列表和字典按紧凑 JSON 保存。
+
+每个数据库的所有修补在同一个事务中执行，任一修补失败则整个数据库回滚；
+同一修补的所有行共用一条预编译语句（executemany）；各语言数据库并行处理。
+"""
+import json
+import os
+import re
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+PATCH_FILE = os.path.join('dogmaPatch', 'post_build_patches.json')
+
+SUPPORTED_OPS = ('update', 'delete', 'drop_table')
+
+IDENTIFIER_PATTERN = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+
+def _check_identifier(name: str) -> str:
+    if not isinstance(name, str) or not IDENTIFIER_PATTERN.match(name):
+        raise ValueError(f"无效的表名或列名: {name!r}")
+    return name
+
+
+def _sql_value(value):
+    """列表和字典按紧凑 JSON 保存，其他值原样写入"""
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, separators=(',', ':'))
+    return value
+
+
+def load_patches(patch_file: str = PATCH_FILE, manual: bool = False) -> List[dict]:
+    """
+    读取修补声明，展开 rows_file，并检查格式
+
+    manual 为 False 时只返回构建时执行的修补，为 True 时只返回标记了 "manual": true 的修补。
+
+    修补文件本身不存在或无法解析时抛出 FileNotFoundError / json.JSONDecodeError；
+    某个 rows_file 不存在或无法解析时只跳过该修补并给出警告，其他修补照常执行
+    """
+    with open(patch_file, 'r', encoding='utf-8') as f:
+        patches = json.load(f)
+
+    base_dir = os.path.dirname(patch_file)
+    loaded = []
+    for patch in patches:
+        if bool(patch.get('manual')) != manual:
+            continue
+        if patch.get('op') not in SUPPORTED_OPS:
+            raise ValueError(f"不支持的修补操作: {patch.get('op')!r}")
+        _check_identifier(patch.get('table'))
+        if patch['op'] == 'update':
+            _check_identifier(patch.get('key'))
+            if 'rows_file' in patch:
+                rows_file = os.path.join(base_dir, patch['rows_file'])
+                try:
+                    with open(rows_file, 'r', encoding='utf-8') as f:
+                        patch['rows'] = json.load(f)
+                except FileNotFoundError:
+                    print(f"警告：修补数据文件 {rows_file} 不存在，跳过修补 {patch.get('description', patch['table'])}")
+                    continue
+                except json.JSONDecodeError as e:
+                    print(f"错误：解析修补数据文件 {rows_file} 失败，跳过修补 "
+                          f"{patch.get('description', patch['table'])}: {e}")
+                    continue
+            if not patch.get('rows'):
+                raise ValueError(f"update 修补缺少 rows: {patch.get('description', patch['table'])}")
+        loaded.append(patch)
+    return loaded
+
+
+def compile_patch(patch: dict) -> List[Tuple[str, List[tuple]]]:
+    """
+    把一个修补转为 [(SQL, 参数列表), ...]
+
+    update 的行按写入的列分组，每组一条语句
+    """
+    table = patch['table']
+    if patch['op'] == 'drop_table':
+        return [(f'DROP TABLE IF EXISTS {table}', [()])]
+    if patch['op'] == 'delete':
+        return [(f"DELETE FROM {table} WHERE {patch['where']}", [tuple(patch.get('params', ()))])]
+
+    key = patch['key']
+    groups: Dict[tuple, List[tuple]] = {}
+    for row in patch['rows']:
+        columns = tuple(sorted(_check_identifier(column) for column in row if column != key))
+        groups.setdefault(columns, []).append(
+            tuple(_sql_value(row[column]) for column in columns) + (row[key],)
+        )
+    return [
+        (f"UPDATE {table} SET {', '.join(f'{column} = ?' for column in columns)} WHERE {key} = ?", params)
+        for columns, params in groups.items()
+    ]
+
+
+def apply_patches(db_path: str, lang: str, patches: Sequence[dict]) -> List[Tuple[str, int]]:
+    """
+    在一个事务中对单个数据库执行所有适用的修补
+
+    Returns:
+        [(修补描述, 影响行数), ...]
+    """
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    results = []
+    try:
+        conn.execute('BEGIN IMMEDIATE')
+        for patch in patches:
+            if patch.get('languages') and lang not in patch['languages']:
+                continue
+            affected = 0
+            for sql, params in compile_patch(patch):
+                cursor = conn.executemany(sql, params) if len(params) > 1 else conn.execute(sql, params[0])
+                affected += max(cursor.rowcount, 0)
+            results.append((patch.get('description', f"{patch['op']} {patch['table']}"), affected))
+        conn.execute('COMMIT')
+    except Exception:
+        # BEGIN 本身失败（如数据库被锁定）时没有事务可回滚，直接抛出原始错误
+        if conn.in_transaction:
+            conn.execute('ROLLBACK')
+        raise
+    finally:
+        conn.close()
+    return results
+
+
+def apply_patches_to_all(db_dir: str, languages: Sequence[str], patches: Optional[List[dict]] = None,
+                         patch_file: str = PATCH_FILE, manual: bool = False) -> bool:
+    """
+    并行修补所有语言的数据库
+
+    Returns:
+        所有数据库都修补成功时返回 True
+    """
+    if patches is None:
+        try:
+            patches = load_patches(patch_file, manual)
+        except FileNotFoundError:
+            print(f"警告：修补文件 {patch_file} 不存在，跳过修补")
+            return False
+        except json.JSONDecodeError as e:
+            print(f"错误：解析修补文件 {patch_file} 失败，跳过修补: {e}")
+            return False
+        except ValueError as e:
+            print(f"错误：修补文件 {patch_file} 格式错误，跳过修补: {e}")
+            return False
+        print(f"成功从 {patch_file} 加载了 {len(patches)} 个修补项")
+
+    def run(lang):
+        db_filename = os.path.join(db_dir, f'item_db_{lang}.sqlite')
+        if not os.path.exists(db_filename):
+            if os.path.exists(f"{db_filename}.zip") or os.path.exists(f"{db_filename}.zst"):
+                return lang, None, "数据库已被压缩，无法修补。请在压缩前执行修补操作。"
+            return lang, None, f"找不到数据库 {db_filename}"
+        try:
+            return lang, apply_patches(db_filename, lang, patches), None
+        except Exception as e:
+            return lang, None, f"修补数据库 {db_filename} 时发生错误，已回滚: {e}"
+
+    success = True
+    with ThreadPoolExecutor(max_workers=max(1, len(languages))) as executor:
+        # 按语言顺序输出结果
+        for lang, results, error in executor.map(run, languages):
+            if error:
+                print(f"错误：数据库 {lang}: {error}")
+                success = False
+                continue
+            for description, affected in results:
+                print(f"数据库 {lang}: {description}，影响 {affected} 条记录")
+    return success
@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+"""
+EVE 客户端 resfileindex.txt 索引
+
+resfileindex.txt 每行为 "res:/资源路径,ResFiles下的相对路径,md5,大小,压缩后大小"，共数十万行。
+这里只解析一次，结果按源文件的大小和修改时间缓存为二进制文件，之后直接加载：
+- 记录按资源路径（小写）排序，前缀查询用二分查找
+- 精确查询使用 64 位哈希的有序数组，并以哈希的高 16 位建立分桶索引，只在桶内二分
+
+用法：
+    index = ResFileIndex.load(resfileindex_path)
+    index.get('res:/ui/texture/icons/7_64_15.png')       # 'c7/c7def626ddcfd142_38da...'
+    index.prefix('res:/localizationfsd/localization_fsd_')
+"""
+import hashlib
+import os
+import struct
+from array import array
+from bisect import bisect_left
+from typing import Iterator, List, Optional, Tuple
+
+# 默认缓存目录，放在用户目录下，不随仓库或输出目录清理
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'evesde')
+
+CACHE_MAGIC = b'RESIDX01'
+# 魔数, 源文件大小, 源文件修改时间(ns), 记录数
+CACHE_HEADER = struct.Struct('<8sQqI')
+
+# 哈希高 BUCKET_BITS 位作为分桶索引
+BUCKET_BITS = 16
+BUCKET_SHIFT = 64 - BUCKET_BITS
+
+
+def resource_hash(resource: str) -> int:
+    """资源路径（小写）的 64 位哈希"""
+    return int.from_bytes(hashlib.blake2b(resource.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def _source_signature(path: str) -> Tuple[int, int]:
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _cache_path(source_path: str, cache_dir: str) -> str:
+    # 不同客户端目录的索引分别缓存
+    name = hashlib.blake2b(os.path.abspath(source_path).encode('utf-8'), digest_size=8).hexdigest()
+    return os.path.join(cache_dir, f'resfileindex_{name}.bin')
+
+
+class ResFileIndex:
+    """资源路径到 ResFiles 相对路径的只读索引"""
+
+    def __init__(self, resources: List[str], files: List[str],
+                 hashes: Optional[array] = None, order: Optional[array] = None, buckets: Optional[array] = None):
+        """
+        Args:
+            resources: 按字典序排序的小写资源路径
+            files: 与 resources 一一对应的 ResFiles 相对路径
+            hashes/order/buckets: 从缓存加载时直接传入的哈希索引，不传时重新计算
+        """
+        self.resources = resources
+        self.files = files
+        if hashes is None:
+            hashes, order, buckets = self._build_hash_index(resources)
+        self._hashes = hashes
+        self._order = order
+        self._buckets = buckets
+
+    @staticmethod
+    def _build_hash_index(resources: List[str]) -> Tuple[array, array, array]:
+        pairs = sorted((resource_hash(resource), position) for position, resource in enumerate(resources))
+        hashes = array('Q', (h for h, _ in pairs))
+        order = array('I', (position for _, position in pairs))
+        # buckets[b] 为第一个高位不小于 b 的哈希的位置
+        buckets = array('I', bytes(4 * ((1 << BUCKET_BITS) + 1)))
+        bucket = 0
+        for i, h in enumerate(hashes):
+            top = h >> BUCKET_SHIFT
+            while bucket <= top:
+                buckets[bucket] = i
+                bucket += 1
+        while bucket <= (1 << BUCKET_BITS):
+            buckets[bucket] = len(hashes)
+            bucket += 1
+        return hashes, order, buckets
+
+    @classmethod
+    def parse(cls, path: str) -> 'ResFileIndex':
+        """解析 resfileindex.txt，资源路径和文件路径统一转为小写"""
+        mapping = {}
+        with open(path, 'r', encoding='utf-8') as f:
+            for line_num, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                parts = line.split(',', 2)
+                if len(parts) < 2:
+                    print(f"警告: 第 {line_num} 行格式不正确: {line}")
+                    continue
+                mapping[parts[0].lower()] = parts[1].lower()
+        resources = sorted(mapping)
+        return cls(resources, [mapping[resource] for resource in resources])
+
+    @classmethod
+    def load(cls, path: str, cache_dir: Optional[str] = CACHE_DIR) -> 'ResFileIndex':
+        """
+        加载 resfileindex.txt 的索引，源文件大小和修改时间与缓存一致时直接读取缓存
+
+        Args:
+            path: resfileindex.txt 路径
+            cache_dir: 缓存目录，为 None 时不使用缓存
+        """
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"resfileindex.txt 文件不存在: {path}")
+        if cache_dir is None:
+            return cls.parse(path)
+
+        signature = _source_signature(path)
+        cache_path = _cache_path(path, cache_dir)
+        index = cls._read_cache(cache_path, signature)
+        if index is None:
+            print(f"解析 {path} ...")
+            index = cls.parse(path)
+            index._write_cache(cache_path, signature)
+            print(f"已解析 {len(index)} 条资源记录，缓存到 {cache_path}")
+        return index
+
+    @classmethod
+    def _read_cache(cls, cache_path: str, signature: Tuple[int, int]) -> Optional['ResFileIndex']:
+        if not os.path.exists(cache_path):
+            return None
+        try:
+            with open(cache_path, 'rb') as f:
+                data = f.read()
+            magic, size, mtime_ns, count = CACHE_HEADER.unpack_from(data)
+            if magic != CACHE_MAGIC or (size, mtime_ns) != signature:
+                return None
+            offset = CACHE_HEADER.size
+            arrays = []
+            for typecode, length in (('Q', count), ('I', count), ('I', (1 << BUCKET_BITS) + 1)):
+                values = array(typecode)
+                end = offset + values.itemsize * length
+                values.frombytes(data[offset:end])
+                arrays.append(values)
+                offset = end
+            lines = data[offset:].decode('utf-8').split('\n') if count else []
+            resources, files = lines[:count], lines[count:]
+            return cls(resources, files, *arrays)
+        except Exception as e:
+            print(f"读取缓存 {cache_path} 时出错: {e}")
+            return None
+
+    def _write_cache(self, cache_path: str, signature: Tuple[int, int]):
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        temp_path = cache_path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(CACHE_HEADER.pack(CACHE_MAGIC, signature[0], signature[1], len(self.resources)))
+            f.write(self._hashes.tobytes())
+            f.write(self._order.tobytes())
+            f.write(self._buckets.tobytes())
+            f.write('\n'.join(self.resources + self.files).encode('utf-8'))
+        os.replace(temp_path, cache_path)
+
+    def __len__(self):
+        return len(self.resources)
+
+    def get(self, resource: str, default: Optional[str] = None) -> Optional[str]:
+        """资源路径对应的 ResFiles 相对路径，忽略大小写"""
+        resource = resource.lower()
+        h = resource_hash(resource)
+        top = h >> BUCKET_SHIFT
+        position = bisect_left(self._hashes, h, self._buckets[top], self._buckets[top + 1])
+        # 哈希冲突时逐个比较
+        while position < len(self._hashes) and self._hashes[position] == h:
+            record = self._order[position]
+            if self.resources[record] == resource:
+                return self.files[record]
+            position += 1
+        return default
+
+    def __getitem__(self, resource: str) -> str:
+        file_path = self.get(resource)
+        if file_path is None:
+            raise KeyError(resource)
+        return file_path
+
+    def __contains__(self, resource: str) -> bool:
+        return self.get(resource) is not None
+
+    def prefix(self, prefix: str) -> Iterator[Tuple[str, str]]:
+        """以 prefix 开头的所有 (资源路径, ResFiles 相对路径)，按资源路径排序"""
+        prefix = prefix.lower()
+        position = bisect_left(self.resources, prefix)
+        while position < len(self.resources) and self.resources[position].startswith(prefix):
+            yield self.resources[position], self.files[position]
+            position += 1
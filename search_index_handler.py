@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""
+名称全文搜索索引
+
+在每个数据库中生成名称表 search_names 及其 FTS5 全文索引 search_index，覆盖物品、物品组、
+市场分组、星域、星座、星系、空间站、NPC公司和代理人名称（包括表中保存的所有语言）。
+使用 trigram 分词器，不依赖空格分词，不少于3个字符的中日韩文本和任意子串都可以走索引，
+取代 App 端的 LIKE '%q%' 全表扫描。trigram 无法索引1~2个字符的查询（如'乌鸦'），
+这类查询的子串匹配退回 search_names 上的 LIKE '%q%' 扫描，按短名称优先扫描到 limit 条即停止。
+
+App 端按 search() 的方式查询：先用 PREFIX_SEARCH_SQL 做前缀匹配，不足时再用 MATCH_SEARCH_SQL
+（少于 MIN_MATCH_LENGTH 个字符时用 SHORT_SEARCH_SQL）做子串匹配补充（{kind_filter} 替换为空或类别过滤）。
+排序规则为：完全匹配 > 前缀匹配 > 子串匹配，同一档内名称越短越靠前。
+"""
+import sqlite3
+from typing import List, Optional, Sequence, Tuple
+
+# 支持的语言列表
+LANGUAGES = ['de', 'en', 'es', 'fr', 'ja', 'ko', 'ru', 'zh']
+
+# trigram 分词器只能对不少于3个字符的查询使用索引，更短的查询用 SHORT_SEARCH_SQL 扫描
+MIN_MATCH_LENGTH = 3
+
+# (类别, 表名, ID列, 名称列)
+SEARCH_SOURCES = [
+    ('type', 'types', 'type_id', ['name'] + [f'{lang}_name' for lang in LANGUAGES]),
+    ('group', 'groups', 'group_id', ['name'] + [f'{lang}_name' for lang in LANGUAGES]),
+    ('market_group', 'marketGroups', 'group_id', ['name']),
+    ('region', 'regions', 'regionID', ['regionName'] + [f'regionName_{lang}' for lang in LANGUAGES]),
+    ('constellation', 'constellations', 'constellationID',
+     ['constellationName'] + [f'constellationName_{lang}' for lang in LANGUAGES]),
+    ('solarsystem', 'solarsystems', 'solarSystemID',
+     ['solarSystemName'] + [f'solarSystemName_{lang}' for lang in LANGUAGES]),
+    ('station', 'stations', 'stationID', ['stationName']),
+    ('corporation', 'npcCorporations', 'corporation_id', ['name'] + [f'{lang}_name' for lang in LANGUAGES]),
+    ('agent', 'agents', 'agent_id', ['agent_name']),
+]
+
+# 名称按长度升序写入，rowid 越小名称越短；两条查询都按 rowid 排序，即"短名称优先"，
+# FTS5 按 rowid 顺序产出结果，遇到 LIMIT 即可提前结束，不需要对全部命中排序
+
+# 前缀匹配：走 search_names 的名称索引，完全匹配排在最前
+PREFIX_SEARCH_SQL = '''
+    SELECT n.id, n.kind, n.item_id, n.name
+    FROM search_names n
+    WHERE n.name LIKE :pattern ESCAPE '\\' {kind_filter}
+    ORDER BY (n.name = :query COLLATE NOCASE) DESC, n.id
+    LIMIT :limit
+'''
+
+# 短查询的子串匹配：trigram 索引不可用，按 rowid（短名称优先）扫描 search_names，凑够 :limit 条即停止
+SHORT_SEARCH_SQL = '''
+    SELECT n.id, n.kind, n.item_id, n.name
+    FROM search_names n
+    WHERE n.name LIKE :substring ESCAPE '\\' {kind_filter}
+    ORDER BY n.id
+    LIMIT :limit
+'''
+
+# 子串匹配：走 trigram 全文索引，只用于不少于 MIN_MATCH_LENGTH 个字符的查询，:match 为用双引号包裹的短语
+MATCH_SEARCH_SQL = '''
+    SELECT n.id, n.kind, n.item_id, n.name
+    FROM search_index
+    JOIN search_names n ON n.id = search_index.rowid
+    WHERE search_index MATCH :match {kind_filter}
+    ORDER BY search_index.rowid
+    LIMIT :limit
+'''
+
+
+def _existing_columns(cursor, table: str) -> set:
+    cursor.execute(f'PRAGMA table_info({table})')
+    return {row[1] for row in cursor.fetchall()}
+
+
+def create_search_index(cursor):
+    """
+    重新生成 search_index 表
+
+    同一条记录在不同语言中相同的名称只保存一次；表或列不存在时跳过（例如代理人名称尚未本地化）
+    """
+    cursor.execute('DROP TABLE IF EXISTS search_index')
+    cursor.execute('DROP TABLE IF EXISTS search_names')
+    cursor.execute('''
+        CREATE TABLE search_names (
+            id INTEGER NOT NULL PRIMARY KEY,
+            name TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            item_id INTEGER NOT NULL
+        )
+    ''')
+    # 名称只保存在 search_names 中，FTS5 表作为外部内容索引，不重复保存文本
+    cursor.execute('''
+        CREATE VIRTUAL TABLE search_index USING fts5(
+            name,
+            content = 'search_names',
+            content_rowid = 'id',
+            tokenize = 'trigram'
+        )
+    ''')
+
+    # 先收集到临时表，再按名称长度整体排序写入
+    cursor.execute('DROP TABLE IF EXISTS temp.search_names_staging')
+    cursor.execute('CREATE TEMP TABLE search_names_staging (name TEXT, kind TEXT, item_id INTEGER)')
+
+    total = 0
+    for kind, table, id_column, name_columns in SEARCH_SOURCES:
+        columns = _existing_columns(cursor, table)
+        name_columns = [column for column in name_columns if column in columns]
+        if id_column not in columns or not name_columns:
+            print(f"跳过搜索索引来源 {table}：表或名称列不存在")
+            continue
+
+        union_sql = ' UNION '.join(
+            f'SELECT {id_column} AS item_id, {column} AS name FROM {table}' for column in name_columns
+        )
+        cursor.execute(f'''
+            INSERT INTO search_names_staging (name, kind, item_id)
+            SELECT name, ?, item_id
+            FROM ({union_sql})
+            WHERE name IS NOT NULL AND name != ''
+        ''', (kind,))
+        total += cursor.rowcount
+
+    cursor.execute('''
+        INSERT INTO search_names (name, kind, item_id)
+        SELECT name, kind, item_id FROM search_names_staging
+        ORDER BY length(name), name, kind, item_id
+    ''')
+    cursor.execute('DROP TABLE temp.search_names_staging')
+
+    # 前缀匹配使用的名称索引；建立全文索引并合并索引段，减小文件体积并加快查询
+    cursor.execute('CREATE INDEX idx_search_names_name ON search_names(name COLLATE NOCASE)')
+    cursor.execute("INSERT INTO search_index (search_index) VALUES ('rebuild')")
+    cursor.execute("INSERT INTO search_index (search_index) VALUES ('optimize')")
+    print(f"搜索索引已生成，共 {total} 条名称")
+
+
+def _escape_like(text: str) -> str:
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def search(cursor, query: str, limit: int = 20,
+           kinds: Optional[Sequence[str]] = None) -> List[Tuple[str, int, str]]:
+    """
+    按名称搜索
+
+    Args:
+        cursor: 数据库游标
+        query: 搜索文本，任意语言、任意子串
+        limit: 返回的最大条数
+        kinds: 可选，只返回这些类别（如 ['type', 'solarsystem']）
+
+    Returns:
+        [(kind, item_id, name), ...]，完全匹配 > 前缀匹配 > 子串匹配，同一档内名称越短越靠前
+    """
+    query = query.strip()
+    if not query:
+        return []
+
+    params = {'query': query, 'limit': limit, 'pattern': f'{_escape_like(query)}%'}
+    kind_filter = ''
+    if kinds:
+        kind_filter = 'AND n.kind IN ({})'.format(', '.join(f':kind{i}' for i in range(len(kinds))))
+        params.update({f'kind{i}': kind for i, kind in enumerate(kinds)})
+
+    # 完全匹配和前缀匹配优先
+    cursor.execute(PREFIX_SEARCH_SQL.format(kind_filter=kind_filter), params)
+    rows = cursor.fetchall()
+
+    # 不足 limit 条时用子串匹配补充，短查询无法使用 trigram 索引，退回 LIKE 扫描
+    if len(rows) < limit:
+        seen = {row[0] for row in rows}
+        params['limit'] = limit + len(rows)
+        if len(query) >= MIN_MATCH_LENGTH:
+            params['match'] = '"' + query.replace('"', '""') + '"'
+            cursor.execute(MATCH_SEARCH_SQL.format(kind_filter=kind_filter), params)
+        else:
+            params['substring'] = f'%{_escape_like(query)}%'
+            cursor.execute(SHORT_SEARCH_SQL.format(kind_filter=kind_filter), params)
+        rows.extend(row for row in cursor.fetchall() if row[0] not in seen)
+
+    return [(kind, int(item_id), name) for _, kind, item_id, name in rows[:limit]]
+
+if __name__ == "__main__":
+    import sys
+
+    with sqlite3.connect(sys.argv[1] if len(sys.argv) > 1 else 'output/db/item_db_zh.sqlite') as conn:
+        for row in search(conn.cursor(), sys.argv[2] if len(sys.argv) > 2 else '乌鸦'):
+            print(row)
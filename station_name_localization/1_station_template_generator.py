@@ -5,6 +5,10 @@ from typing import Dict, List, Tuple, Optional
 from tqdm import tqdm
 from datetime import datetime
 import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from localization_store import LocalizationStore  # noqa: E402
 
 # 配置日志
 logging.basicConfig(
@@ -90,7 +94,7 @@ def generate_word_combinations(text: str) -> List[str]:
     combinations.sort(key=len, reverse=True)
     return combinations
 
-def find_template_id(text: str, localization_data: Dict) -> Tuple[str, int]:
+def find_template_id(text: str, localization_data: LocalizationStore) -> Tuple[str, int]:
     """查找文本在本地化数据中的模板ID"""
     # 首先检查缓存
     cached_result = template_cache.get(text)
@@ -99,21 +103,15 @@ def find_template_id(text: str, localization_data: Dict) -> Tuple[str, int]:
         return cached_result
     
     # 缓存未命中，执行查找
-    matching_ids = []
-    for id_str, translations in localization_data.items():
-        if translations.get('en') == text:
-            matching_ids.append(int(id_str))
-    
-    result = None
-    if matching_ids:
-        # 如果有多个匹配，返回ID最小的
-        result = (str(min(matching_ids)), min(matching_ids))
+    # 如果有多个匹配，返回ID最小的
+    min_id = localization_data.find_id_by_en(text)
+    result = (str(min_id), min_id) if min_id is not None else None
     
     # 将结果存入缓存（包括未找到的情况）
     template_cache.set(text, result)
     return result if result else (None, None)
 
-def process_station_name(station_name: str, localization_data: Dict) -> str:
+def process_station_name(station_name: str, localization_data: LocalizationStore) -> str:
     """处理单个空间站名称，返回模板格式"""
     logger.debug(f"\n开始处理空间站名称: {station_name}")
     
@@ -184,7 +182,7 @@ def main():
         
         # 加载数据文件
         stations_data = load_json_file('../accounting_entry_types/static_data/stations_202504102216.json')
-        localization_data = load_json_file('../accounting_entry_types/output/combined_localization.json')
+        localization_data = LocalizationStore('../accounting_entry_types/output/localization.sqlite')
 
         # 存储结果的字典
         templates = {}
@@ -10,8 +10,9 @@ import os
 import json
 import sqlite3
 import re
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
 from pathlib import Path
+from localization_store import open_store
 
 # 定义输出目录和语言列表
 output_db_dir = './output/db'
@@ -30,66 +31,102 @@ def load_json_file(file_path: str) -> Optional[dict]:
         print(f"加载文件 {file_path} 时出错: {e}")
         return None
 
+# 模板中的本地化ID占位符，如 {271747}
+TEMPLATE_ID_PATTERN = re.compile(r'{(\d+)}')
+
+def compile_template(template: str) -> List[Tuple[bool, str]]:
+    """
+    将模板字符串编译为token列表：(是否为本地化ID, 文本或ID)
+    例如："{271747} X - {61158}" -> [(True, '271747'), (False, ' X - '), (True, '61158')]
+    """
+    tokens = []
+    # re.split 的结果中奇数位置是捕获到的ID，偶数位置是普通文本
+    for index, part in enumerate(TEMPLATE_ID_PATTERN.split(template)):
+        if index % 2:
+            tokens.append((True, part))
+        elif part:
+            tokens.append((False, part))
+    return tokens
+
+def render_template(tokens: List[Tuple[bool, str]], localization_data: Dict,
+                    langs: List[str]) -> Tuple[Dict[str, str], List[str]]:
+    """
+    一次遍历token列表，生成所有语言的文本
+
+    Returns:
+        ({语言: 文本}, 缺失的本地化ID列表)；有缺失ID时对应占位符原样保留
+    """
+    parts = {lang: [] for lang in langs}
+    missing_ids = []
+    for is_id, value in tokens:
+        translations = localization_data.get(value) if is_id else None
+        if is_id and translations is None:
+            missing_ids.append(value)
+        for lang in langs:
+            if not is_id:
+                parts[lang].append(value)
+            elif translations is None:
+                parts[lang].append(f"{{{value}}}")
+            else:
+                # 如果没有对应语言的翻译，回退到英文
+                parts[lang].append(translations.get(lang, translations.get('en', f"{{{value}}}")))
+    return {lang: ''.join(text) for lang, text in parts.items()}, missing_ids
+
 def process_template(template: str, localization_data: Dict, lang: str) -> str:
     """
     处理模板字符串，替换为对应语言的文本
     例如："{271747} X - {63584} 3 - {61158} {61515}"
     """
-    def replace_match(match):
-        template_id = match.group(1)
-        if template_id in localization_data:
-            translations = localization_data[template_id]
-            # 如果没有对应语言的翻译，回退到英文
-            translated_text = translations.get(lang, translations.get('en', match.group(0)))
-            # print(f"替换模板ID {template_id}: {translated_text} ({lang})")  # 添加调试信息
-            return translated_text
-        print(f"未找到模板ID {template_id} 的翻译")  # 添加调试信息
-        return match.group(0)
-    
-    # print(f"\n处理模板: {template}")  # 添加调试信息
-    
-    # 先检查模板中的所有ID是否都能找到对应的翻译
-    template_ids = re.findall(r'{(\d+)}', template)
-    # print(f"发现的模板ID: {template_ids}")
-    
-    missing_ids = []
-    for template_id in template_ids:
-        if template_id not in localization_data:
-            missing_ids.append(template_id)
-            print(f"警告：模板ID {template_id} 在本地化数据中不存在")
-    
-    if missing_ids:
-        print(f"警告：以下模板ID未找到对应的翻译: {missing_ids}")
-    
-    # 使用正则表达式替换所有模板ID
-    result = template
-    for template_id in template_ids:
-        if template_id in localization_data:
-            translations = localization_data[template_id]
-            translated_text = translations.get(lang, translations.get('en', f"{{{template_id}}}"))
-            # print(f"替换模板ID {template_id}: {translated_text} ({lang})")
-            # 使用更精确的替换
-            result = result.replace(f"{{{template_id}}}", translated_text)
-    
-    # print(f"处理结果: {result}")  # 添加调试信息
-    return result
+    rendered, _ = render_template(compile_template(template), localization_data, [lang])
+    return rendered[lang]
+
+def localize_all_stations(templates: Dict[str, str], localization_data: Dict) -> Tuple[Dict[int, Dict[str, str]], Dict[str, int]]:
+    """
+    编译所有模板并一次生成所有语言的空间站名称
+
+    Returns:
+        ({空间站ID: {语言: 名称}}, {缺失的本地化ID: 受影响的空间站数})；
+        含有缺失ID的空间站不出现在结果中
+    """
+    localized = {}
+    missing_summary = {}
+    for station_id, template in templates.items():
+        names, missing_ids = render_template(compile_template(template), localization_data, languages)
+        if missing_ids:
+            for template_id in set(missing_ids):
+                missing_summary[template_id] = missing_summary.get(template_id, 0) + 1
+            continue
+        localized[int(station_id)] = names
+    return localized, missing_summary
 
 def update_stations_localization():
     """更新stations表的本地化信息"""
     # 加载模板和本地化数据
     templates_file = "station_name_localization/station_name_templates.json"
-    localization_file = "accounting_entry_types/output/combined_localization.json"
     
     templates = load_json_file(templates_file)
-    localization_data = load_json_file(localization_file)
+    store = open_store()
     
-    if not templates or not localization_data:
+    if not templates or store is None:
         return False
+
+    # 只从本地化存储中读取模板用到的ID
+    with store:
+        template_ids = {template_id for template in templates.values()
+                        for template_id in TEMPLATE_ID_PATTERN.findall(template)}
+        localization_data = store.get_many(template_ids)
         
     # 打印一些本地化数据的统计信息
     print(f"\n本地化数据统计:")
-    print(f"- 总条目数: {len(localization_data)}")
-    print(f"- 包含的语言: {list(next(iter(localization_data.values())).keys())}")
+    print(f"- 模板使用的本地化ID数: {len(template_ids)}")
+    print(f"- 找到的本地化条目数: {len(localization_data)}")
+
+    # 所有语言的名称只生成一次
+    localized_names, missing_summary = localize_all_stations(templates, localization_data)
+    if missing_summary:
+        affected = sum(missing_summary.values())
+        print(f"警告：{len(missing_summary)} 个模板ID在本地化数据中不存在，涉及 {affected} 个空间站（保留原名称）:")
+        print(f"  {sorted(missing_summary.items(), key=lambda item: -item[1])}")
     
     # 确保输出目录存在
     os.makedirs(output_db_dir, exist_ok=True)
@@ -120,49 +157,40 @@ def update_stations_localization():
             cursor.execute("SELECT stationID, stationName FROM stations")
             stations = cursor.fetchall()
             
-            # 更新每个空间站的名称
-            updated_count = 0
-            not_found_count = 0
+            updates = []
+            not_found = []
+            skipped_count = 0
             no_change_count = 0
             
             for station_id, original_name in stations:
-                station_id_str = str(station_id)
-                if station_id_str in templates:
-                    template = templates[station_id_str]
-                    # 处理模板，生成本地化名称
-                    localized_name = process_template(template, localization_data, lang)
-                    
-                    # 检查是否有实际变化
-                    if localized_name != original_name:
-                        # 检查是否还有未替换的模板ID
-                        if re.search(r'{(\d+)}', localized_name):
-                            print(f"警告：空间站 {station_id} 的名称中仍有未替换的模板ID")
-                            print(f"模板: {template}")
-                            print(f"结果: {localized_name}")
-                            continue
-                            
-                        # 更新数据库
-                        cursor.execute("""
-                            UPDATE stations 
-                            SET stationName = ? 
-                            WHERE stationID = ?
-                        """, (localized_name, station_id))
-                        updated_count += 1
-                        # print(f"空间站 {station_id} 更新:")
-                        # print(f"原名称: {original_name}")
-                        # print(f"新名称: {localized_name}")
-                    else:
-                        no_change_count += 1
+                if str(station_id) not in templates:
+                    not_found.append(station_id)
+                    continue
+                names = localized_names.get(station_id)
+                if names is None:
+                    # 模板中有缺失的本地化ID，已在上面汇总报告
+                    skipped_count += 1
+                elif names[lang] != original_name:
+                    updates.append((names[lang], station_id))
                 else:
-                    not_found_count += 1
-                    print(f"警告：未找到空间站 {station_id} 的模板")
+                    no_change_count += 1
+            
+            # 批量更新
+            cursor.executemany("""
+                UPDATE stations 
+                SET stationName = ? 
+                WHERE stationID = ?
+            """, updates)
             
             # 提交更改
             conn.commit()
             print(f"\n处理完成:")
-            print(f"- 更新记录数: {updated_count}")
+            print(f"- 更新记录数: {len(updates)}")
             print(f"- 无变化记录数: {no_change_count}")
-            print(f"- 未找到模板记录数: {not_found_count}")
+            print(f"- 缺少本地化ID跳过数: {skipped_count}")
+            print(f"- 未找到模板记录数: {len(not_found)}")
+            if not_found:
+                print(f"  未找到模板的空间站（前10个）: {not_found[:10]}")
             success_count += 1
             
         except Exception as e:
@@ -176,4 +204,4 @@ def update_stations_localization():
     return success_count > 0
 
 if __name__ == "__main__":
-    update_stations_localization() 
\ No newline at end of file
+    update_stations_localization()
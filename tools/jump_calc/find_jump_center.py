@@ -2,8 +2,15 @@ import json
 import heapq
 import sqlite3
 import requests
+import sys
 import pandas as pd
 from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from name_index import NameIndex  # noqa: E402
+
+DB_PATH = '/Users/ggestamel/Documents/GitHub/EveSDE/output/db/item_db_zh.sqlite'
 
 # 读取 jump_map.json, 数据来自：Tritanium app 导航功能计算缓存
 with open("jump_map.json", "r") as f:
@@ -41,28 +48,31 @@ def get_alliance_info(alliance_id):
         print(f"获取联盟信息失败 (ID: {alliance_id}): {e}")
         return None
 
-# 连接数据库获取星系ID
+# 星系名称索引，只构建一次，之后所有名称都在内存中解析
+system_name_index = NameIndex.from_database(DB_PATH, kinds=('solarsystem',))
+
+# 批量解析星系名称（只接受完全匹配，避免截断或拼错的名称被解析为其他星系）
 def get_system_ids(system_names):
-    conn = sqlite3.connect('/Users/ggestamel/Documents/GitHub/EveSDE/output/db/item_db_zh.sqlite')
-    cursor = conn.cursor()
-    
-    # 构建查询语句
-    placeholders = ','.join(['?' for _ in system_names])
-    query = f"SELECT solarSystemID, solarSystemName FROM solarsystems WHERE solarSystemName IN ({placeholders})"
-    
-    cursor.execute(query, system_names)
-    results = cursor.fetchall()
-    
-    # 创建名称到ID的映射
-    name_to_id = {row[1]: row[0] for row in results}
-    id_to_name = {row[0]: row[1] for row in results}
+    name_to_id = {}
+    id_to_name = {}
+    unresolved = []
+    for name in system_names:
+        matches = system_name_index.exact(name, kind='solarsystem')
+        if len({match.item_id for match in matches}) != 1:
+            unresolved.append(name)
+            continue
+        # 使用数据库中的名称，同一星系的不同语言写法只保留第一个
+        name_to_id[name] = matches[0].item_id
+        id_to_name.setdefault(matches[0].item_id, matches[0].name)
+
+    if unresolved:
+        print(f"未找到或无法唯一确定的星系名称: {unresolved}")
     
-    conn.close()
     return name_to_id, id_to_name
 
 # 获取所有星系名称到ID的映射
 def get_all_system_names():
-    conn = sqlite3.connect('/Users/ggestamel/Documents/GitHub/EveSDE/output/db/item_db_zh.sqlite')
+    conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
     
     cursor.execute("SELECT solarSystemID, solarSystemName FROM solarsystems")
@@ -75,7 +85,7 @@ def get_all_system_names():
 
 # 获取星系所属的星域信息
 def get_system_region_info(system_ids):
-    conn = sqlite3.connect('/Users/ggestamel/Documents/GitHub/EveSDE/output/db/item_db_zh.sqlite')
+    conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
     
     # 构建查询语句获取星系所属的星域ID
@@ -107,7 +117,7 @@ def get_system_region_info(system_ids):
 # 第一步：获取目标星系ID
 print("=== 第一步：获取目标星系信息 ===")
 name_to_id, id_to_name = get_system_ids(system_list)
-target_ids = [name_to_id[name] for name in system_list if name in name_to_id]
+target_ids = list(dict.fromkeys(name_to_id[name] for name in system_list if name in name_to_id))
 
 if not target_ids:
     print("未找到指定的星系ID")
@@ -2,6 +2,7 @@ import json
 import heapq
 import os
 import sqlite3
+import sys
 from pathlib import Path
 from typing import Dict, List, Tuple
 
@@ -13,6 +14,9 @@ from typing import Dict, List, Tuple
 REPO_ROOT = Path(__file__).resolve().parents[2]
 DB_PATH = REPO_ROOT / "output" / "db" / "item_db_zh.sqlite"
 
+sys.path.insert(0, str(REPO_ROOT))
+from name_index import NameIndex  # noqa: E402
+
 # 跳跃图数据，复用 jump_calc 目录下缓存
 JUMP_MAP_PATH = Path(__file__).resolve().parents[1] / "jump_calc" / "jump_map.json"
 
@@ -58,21 +62,17 @@ def open_db():
 
 
 def get_system_id_by_name(system_name: str) -> Tuple[int, str]:
-    """根据星系名称获取其 ID 和名称（名称用于回显）。"""
-    conn = open_db()
-    try:
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT solarSystemID, solarSystemName FROM solarsystems WHERE solarSystemName = ?",
-            (system_name,),
-        )
-        row = cursor.fetchone()
-        if not row:
-            print(f"[x] 未在数据库中找到星系: {system_name}")
-            raise SystemExit(1)
-        return int(row[0]), str(row[1])
-    finally:
-        conn.close()
+    """根据星系名称获取其 ID 和名称（名称用于回显），支持任意语言的名称。"""
+    ensure_file_exists(DB_PATH, "数据库文件")
+    index = NameIndex.from_database(DB_PATH, kinds=("solarsystem",))
+    matches = index.exact(system_name, kind="solarsystem")
+    if not matches:
+        print(f"[x] 未在数据库中找到星系: {system_name}")
+        suggestions = index.search(system_name, kind="solarsystem", limit=5)
+        if suggestions:
+            print(f"[!] 是否要找: {', '.join(match.name for match in suggestions)}")
+        raise SystemExit(1)
+    return matches[0].item_id, matches[0].name
 
 
 def get_id_to_name(system_ids: List[int]) -> Dict[int, str]:
@@ -1,22 +1,19 @@
 import sqlite3
-import yaml
-try:
-    from yaml import CSafeLoader as SafeLoader
-except ImportError:
-    from yaml import SafeLoader
 import time
+from yaml_stream import iter_mapping_batches
 
 
-def read_yaml(file_path):
-    """读取 typeDogma.yaml 文件并返回数据"""
+def read_yaml(file_path, batch_size=5000):
+    """流式读取 typeDogma.yaml，每次产出 batch_size 条 {type_id: details}"""
     start_time = time.time()
-    
-    with open(file_path, 'r', encoding='utf-8') as file:
-        data = yaml.load(file, Loader=SafeLoader)
-    
+    count = 0
+
+    for batch in iter_mapping_batches(file_path, batch_size):
+        count += len(batch)
+        yield batch
+
     end_time = time.time()
-    print(f"读取 {file_path} 耗时: {end_time - start_time:.2f} 秒")
-    return data
+    print(f"流式读取并处理 {file_path} 共 {count} 条，耗时: {end_time - start_time:.2f} 秒")
 
 def create_tables(cursor):
     """创建数据库表以存储 typeAttributes 和 typeEffects"""
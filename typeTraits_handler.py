@@ -1,90 +1,91 @@
 import sqlite3
 
+# 支持的语言列表
+LANGUAGES = ['en', 'de', 'es', 'fr', 'ja', 'ko', 'ru', 'zh']
+
+# 加成数值后缀，按unitID区分：105 百分比，104 倍乘，139 加号；其他单位不加后缀
+UNIT_SUFFIXES = {105: '%', 104: 'x', 139: '+'}
+
+# 每批插入的记录数
+BATCH_SIZE = 10000
+
+# 所有语言的traits行缓存：{语言: [(typeid, importance, bonus_type, content, skill), ...]}
+trait_rows_cache = {}
+
+
+def format_bonus_prefix(bonus):
+    """生成加成数值前缀（与语言无关），没有bonus或unitID时返回空字符串"""
+    if 'bonus' not in bonus or 'unitID' not in bonus:
+        return ''
+    value = bonus['bonus']
+    bonus_num = int(value) if isinstance(value, int) or value.is_integer() else round(value, 2)
+    suffix = UNIT_SUFFIXES.get(bonus['unitID'])
+    if suffix is None:
+        return f"<b>{bonus_num}</b>  "
+    return f"<b>{bonus_num}{suffix}</b> "
+
+
+def iter_bonuses(traits_data):
+    """依次产出 (bonus, skill_id, bonus_type)：roleBonuses 船体加成、typeBonuses 技能加成、miscBonuses 其他加成"""
+    for bonus in traits_data.get('roleBonuses', ()):
+        yield bonus, None, "roleBonuses"
+    for skill_id, skill_bonuses in traits_data.get('types', {}).items():
+        for bonus in skill_bonuses:
+            yield bonus, skill_id, "typeBonuses"
+    for bonus in traits_data.get('miscBonuses', ()):
+        yield bonus, None, "miscBonuses"
+
+
+def process_single_data_all_languages(type_id, traits_data, languages=LANGUAGES):
+    """
+    一次遍历处理单个物品的traits数据，同时生成所有语言的结果
+
+    Returns:
+        {语言: [(type_id, content, skill, importance, bonus_type), ...]}，每种语言按importance排序
+    """
+    results = {lang: [] for lang in languages}
+
+    for bonus, skill_id, bonus_type in iter_bonuses(traits_data):
+        bonus_text = bonus.get('bonusText')
+        if bonus_text is None:
+            continue
+        en_text = bonus_text.get('en', '')
+        importance = bonus.get('importance', 999999)
+        prefix = None  # 前缀只在第一次用到时计算，之后各语言复用
+
+        for lang in languages:
+            content = bonus_text.get(lang, '') or en_text  # 如果当前语言的内容为空，使用英语
+            if not content:  # 只有在有内容的情况下才处理
+                continue
+            if prefix is None:
+                prefix = format_bonus_prefix(bonus)
+            results[lang].append((type_id, prefix + content, skill_id, importance, bonus_type))
+
+    # 按importance排序
+    for lang in languages:
+        results[lang].sort(key=lambda x: x[3])
+    return results
+
+
 def process_single_data(type_id, traits_data, language):
     """处理单个物品的traits数据"""
-    results = []
-    
-    # 处理 roleBonuses
-    if 'roleBonuses' in traits_data: # role bonuses,船体加成
-        for bonus in traits_data['roleBonuses']:
-            content = None
-            if 'bonusText' in bonus:
-                content = bonus['bonusText'].get(language, '')
-                if not content:  # 如果当前语言的内容为空，使用英语
-                    content = bonus['bonusText'].get('en', '')
-                
-                if content:  # 只有在有内容的情况下才处理
-                    # 如果有bonus和unitID，需要添加到文本前面
-                    if 'bonus' in bonus and 'unitID' in bonus:
-                        bonus_num = int(bonus['bonus']) if isinstance(bonus['bonus'], int) or bonus[
-                            'bonus'].is_integer() else round(bonus['bonus'], 2)
-                        if bonus['unitID'] == 105:  # 百分比
-                            prefix = f"<b>{bonus_num}%</b> "
-                        elif bonus['unitID'] == 104:  # 倍乘
-                            prefix = f"<b>{bonus_num}x</b> "
-                        elif bonus['unitID'] == 139:  # 加号
-                            prefix = f"<b>{bonus_num}+</b> "
-                        else:
-                            prefix = f"<b>{bonus_num}</b>  "
-                        content = prefix + content
-                    
-                    results.append((type_id, content, None, bonus.get('importance', 999999), "roleBonuses"))
-    
-    # 处理 typeBonuses
-    if 'types' in traits_data: # type bonuses,技能加成
-        for skill_id, skill_bonuses in traits_data['types'].items():
-            for bonus in skill_bonuses:
-                content = None
-                if 'bonusText' in bonus:
-                    content = bonus['bonusText'].get(language, '')
-                    if not content:  # 如果当前语言的内容为空，使用英语
-                        content = bonus['bonusText'].get('en', '')
-                    
-                    if content:  # 只有在有内容的情况下才处理
-                        # 如果有bonus和unitID，需要添加到文本前面
-                        if 'bonus' in bonus and 'unitID' in bonus:
-                            bonus_num = int(bonus['bonus']) if isinstance(bonus['bonus'], int) or bonus[
-                                'bonus'].is_integer() else round(bonus['bonus'], 2)
-                            if bonus['unitID'] == 105:  # 百分比
-                                prefix = f"<b>{bonus_num}%</b> "
-                            elif bonus['unitID'] == 104:  # 倍乘
-                                prefix = f"<b>{bonus_num}x</b> "
-                            elif bonus['unitID'] == 139:  # 加号
-                                prefix = f"<b>{bonus_num}+</b> "
-                            else:
-                                prefix = f"<b>{bonus_num}</b>  "
-                            content = prefix + content
-                        
-                        results.append((type_id, content, skill_id, bonus.get('importance', 999999), "typeBonuses"))
-    
-    # 处理 miscBonuses
-    if 'miscBonuses' in traits_data: # misc bonuses,其他加成
-        for bonus in traits_data['miscBonuses']:
-            content = None
-            if 'bonusText' in bonus:
-                content = bonus['bonusText'].get(language, '')
-                if not content:  # 如果当前语言的内容为空，使用英语
-                    content = bonus['bonusText'].get('en', '')
-                
-                if content:  # 只有在有内容的情况下才处理
-                    # 如果有bonus和unitID，需要添加到文本前面
-                    if 'bonus' in bonus and 'unitID' in bonus:
-                        bonus_num = int(bonus['bonus']) if isinstance(bonus['bonus'], int) or bonus[
-                            'bonus'].is_integer() else round(bonus['bonus'], 2)
-                        if bonus['unitID'] == 105:  # 百分比
-                            prefix = f"<b>{bonus_num}%</b> "
-                        elif bonus['unitID'] == 104:  # 倍乘
-                            prefix = f"<b>{bonus_num}x</b> "
-                        elif bonus['unitID'] == 139:  # 加号
-                            prefix = f"<b>{bonus_num}+</b> "
-                        else:
-                            prefix = f"<b>{bonus_num}</b>  "
-                        content = prefix + content
-                    
-                    results.append((type_id, content, None, bonus.get('importance', 999999), "miscBonuses"))
-    
-    # 按importance排序
-    return sorted(results, key=lambda x: x[3])
+    return process_single_data_all_languages(type_id, traits_data, [language])[language]
+
+
+def build_trait_rows(yaml_data, languages=LANGUAGES):
+    """遍历一次 types 数据，生成所有语言待插入的traits行"""
+    rows = {lang: [] for lang in languages}
+    for type_id, type_data in yaml_data.items():
+        if 'traits' not in type_data:
+            continue
+        traits = process_single_data_all_languages(type_id, type_data['traits'], languages)
+        for lang in languages:
+            rows[lang].extend(
+                (type_id, importance, bonus_type, content, skill)
+                for type_id, content, skill, importance, bonus_type in traits[lang]
+            )
+    return rows
+
 
 def process_trait_data(yaml_data, cursor, language):
     """处理YAML数据并写入数据库"""
@@ -99,17 +100,18 @@ def process_trait_data(yaml_data, cursor, language):
         PRIMARY KEY (typeid, content, skill)
     )
     ''')
-    
-    # 清空现有数据
-    cursor.execute('DELETE FROM traits')
 
-    # 处理每个物品的traits数据
-    for type_id, type_data in yaml_data.items():
-        if 'traits' in type_data:
-            traits = process_single_data(type_id, type_data['traits'], language)
-            for type_id, content, skill, importance, bonus_type in traits:
-                # 逐个插入
-                cursor.execute(
-                    'INSERT OR REPLACE INTO traits (typeid, importance, bonus_type, content, skill) VALUES (?, ?, ?, ?, ?)',
-                    (type_id, importance, bonus_type, content, skill)
-                )
\ No newline at end of file
+    # 清空本批物品的现有数据（types 数据分批处理时每批只涉及其中的物品）
+    cursor.executemany('DELETE FROM traits WHERE typeid = ?', ((type_id,) for type_id in yaml_data))
+
+    # 英文数据库（第一个处理）时一次生成所有语言的数据，其他语言直接使用缓存
+    if language == 'en' or language not in trait_rows_cache:
+        trait_rows_cache.clear()
+        trait_rows_cache.update(build_trait_rows(yaml_data, sorted(set(LANGUAGES) | {language})))
+
+    rows = trait_rows_cache[language]
+    for start in range(0, len(rows), BATCH_SIZE):
+        cursor.executemany(
+            'INSERT OR REPLACE INTO traits (typeid, importance, bonus_type, content, skill) VALUES (?, ?, ?, ?, ?)',
+            rows[start:start + BATCH_SIZE]
+        )
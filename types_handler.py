@@ -1,9 +1,3 @@
-import yaml
-
-try:
-    from yaml import CSafeLoader as SafeLoader
-except ImportError:
-    from yaml import SafeLoader
 import sqlite3
 from typeTraits_handler import process_trait_data
 import shutil
@@ -11,6 +5,7 @@ import os
 import hashlib
 import json
 import time
+from yaml_stream import iter_mapping_batches
 
 # NPC船只场景映射
 NPC_SHIP_SCENES = [
@@ -124,6 +119,10 @@ npc_classification_cache = {}
 faction_icon_cache = {}
 # 英文名称映射缓存
 type_en_name_cache = {}
+# 各语言数据库的 categories / groups 映射缓存，按语言保存（分组名称已本地化）
+group_lookup_cache = {}
+# repackagedvolumes.json 的内容，每次读取只加载一次
+repackaged_volumes_cache = None
 
 
 def get_npc_ship_scene(group_name, lang='en'):
@@ -158,16 +157,24 @@ def get_npc_ship_type(group_name, name, lang='en'):
     return "Other" if lang == 'en' else "其他"
 
 
-def read_yaml(file_path):
-    """读取 types.yaml 文件"""
+def read_yaml(file_path, batch_size=5000):
+    """流式读取 types.yaml，每次产出 batch_size 条 {type_id: item}"""
+    global repackaged_volumes_cache
     start_time = time.time()
+    count = 0
+
+    # 新的一次读取开始时清空跨批次的缓存
+    npc_classification_cache.clear()
+    type_en_name_cache.clear()
+    group_lookup_cache.clear()
+    repackaged_volumes_cache = None
 
-    with open(file_path, 'r', encoding='utf-8') as file:
-        types_data = yaml.load(file, Loader=SafeLoader)
+    for batch in iter_mapping_batches(file_path, batch_size):
+        count += len(batch)
+        yield batch
 
     end_time = time.time()
-    print(f"读取 {file_path} 耗时: {end_time - start_time:.2f} 秒")
-    return types_data
+    print(f"流式读取并处理 {file_path} 共 {count} 条，耗时: {end_time - start_time:.2f} 秒")
 
 
 def read_repackaged_volumes():
@@ -472,18 +479,21 @@ def process_wormhole_data(cursor, type_id, name, description, icon, lang):
 
 def process_data(types_data, cursor, lang):
     """处理 types 数据并插入数据库（针对单一语言）"""
+    global repackaged_volumes_cache
     create_types_table(cursor)
     create_wormholes_table(cursor)  # 创建虫洞表
-    group_to_category, category_id_to_name, group_id_to_name = fetch_and_process_data(cursor)
 
-    # 读取repackaged_volumes数据
-    repackaged_volumes = read_repackaged_volumes()
+    # 分组映射和 repackaged_volumes 数据在同一次读取的所有批次间共用，缓存在 read_yaml 开始时清空
+    if lang not in group_lookup_cache:
+        group_lookup_cache[lang] = fetch_and_process_data(cursor)
+    group_to_category, category_id_to_name, group_id_to_name = group_lookup_cache[lang]
+
+    if repackaged_volumes_cache is None:
+        repackaged_volumes_cache = read_repackaged_volumes()
+    repackaged_volumes = repackaged_volumes_cache
 
-    # 如果是英文数据库，清空缓存并建立英文名称映射
+    # 如果是英文数据库，建立英文名称映射（分批调用时逐批累积，缓存在 read_yaml 开始时清空）
     if lang == 'en':
-        npc_classification_cache.clear()
-        type_en_name_cache.clear()
-        # 预处理所有英文名称
         for type_id, item in types_data.items():
             type_en_name_cache[type_id] = item['name'].get('en', "")
 
@@ -3,7 +3,8 @@ import time
 import logging
 import re
 import os
-from typing import List, Tuple, Set
+from typing import Dict, Iterable, Iterator, List, Tuple, Set
+from universe_records import iter_systems
 
 # 配置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -12,6 +13,9 @@ logger = logging.getLogger(__name__)
 # 用于缓存universe数据
 _universe_data: List[Tuple] = []
 
+# 1光年对应的米数（与 star_map / jump_navi_handler 保持一致）
+LIGHT_YEAR_METERS = 9460528400000000
+
 planetary_typeIdMapping = {
     "temperate": 11,
     "barren": 2016,
@@ -76,6 +80,9 @@ def create_table(cursor):
     # 执行创建表语句
     cursor.execute(table_schema)
     logger.info(f"创建了包含 {len(planetary_typeIdMapping)} 种行星类型和jove列的表结构")
+
+    # 主键以星域开头，按星系ID查询需要单独的索引
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_universe_solarsystem_id ON universe(solarsystem_id)')
     
     # cursor.execute('''
     #     CREATE TABLE IF NOT EXISTS starmap (
@@ -85,20 +92,127 @@ def create_table(cursor):
     #     )
     # ''')
 
-def read_universe_data(file_path: str = 'fetchUniverse/universe_data.json') -> dict:
-    """读取universe_data.json文件"""
+def read_universe_data(file_path: str = None) -> Iterator[Dict]:
+    """惰性读取 universe_data.jsonl 中的星系记录"""
     try:
-        with open(file_path, 'r', encoding='utf-8') as file:
-            return json.load(file)
+        yield from iter_systems(file_path)
     except FileNotFoundError:
-        logger.error(f"文件 {file_path} 不存在")
-        return {}
+        logger.error(f"文件 {file_path or 'fetchUniverse/universe_data.jsonl'} 不存在")
     except json.JSONDecodeError:
-        logger.error(f"文件 {file_path} 不是有效的JSON格式")
-        return {}
+        logger.error(f"文件 {file_path or 'fetchUniverse/universe_data.jsonl'} 不是有效的JSON Lines格式")
+
+def build_universe_row(record: Dict, jove_systems: Set[str], jspace_pattern, planet_type_to_name: Dict[int, str]) -> Tuple:
+    """将一条星系记录转换为universe表的一行"""
+    sys_info = record.get('system_info', {})
+    # 获取安全等级
+    security_status = sys_info.get('security_status', 0.0)
+    # 默认恒星类型为6（标准黄色恒星）
+    system_type = sys_info.get('solar_type_id', 6)
+    
+    # 获取坐标
+    position = sys_info.get('position', {})
+    x = position.get('x', 0.0)
+    y = position.get('y', 0.0)
+    z = position.get('z', 0.0)
+    
+    # 检查是否有空间站
+    stations = sys_info.get('stations', [])
+    has_station = isinstance(stations, list) and len(stations) > 0
+    
+    # 检查是否有星门
+    jump_gates = sys_info.get('stargates', [])
+    has_stargates = isinstance(jump_gates, list) and len(jump_gates) > 0
+    
+    # 检查是否为JSpace
+    system_name = record.get('system_name', {}).get('en', '')
+    is_jspace = bool(jspace_pattern.match(system_name) or system_name == "J1226-0") and not has_stargates
+    
+    # 处理行星数据
+    planets = sys_info.get('planets', {})
+    # 初始化所有行星类型的计数为0
+    planet_counts = {name: 0 for name in planetary_typeIdMapping.keys()}
+    
+    if isinstance(planets, dict):
+        # 如果planets已经是按类型组织的字典
+        for type_key, planet_list in planets.items():
+            if type_key.startswith('type_'):
+                try:
+                    planet_type = int(type_key.split('_')[1])
+                    # 只统计在planetary_typeIdMapping中定义的行星类型
+                    if planet_type in planet_type_to_name:
+                        planet_name = planet_type_to_name[planet_type]
+                        planet_counts[planet_name] = len(planet_list) if isinstance(planet_list, list) else 0
+                except (ValueError, IndexError):
+                    logger.warning(f"无法解析行星类型: {type_key}")
+    elif isinstance(planets, list):
+        # 如果planets是列表，按类型计数
+        for planet in planets:
+            if isinstance(planet, dict) and 'type_id' in planet:
+                planet_type = planet['type_id']
+                # 只统计在planetary_typeIdMapping中定义的行星类型
+                if planet_type in planet_type_to_name:
+                    planet_name = planet_type_to_name[planet_type]
+                    planet_counts[planet_name] += 1
+    
+    # 检查是否为Jove星系
+    is_jove = system_name in jove_systems
+    
+    # 构建数据元组
+    data_tuple = [
+        int(record['region_id']),
+        int(record['constellation_id']),
+        int(record['system_id']),
+        float(security_status),
+        system_type,
+        float(x),
+        float(y),
+        float(z),
+        has_station,
+        has_stargates,
+        is_jspace,
+        is_jove
+    ]
+    
+    # 添加行星类型计数，按照planetary_typeIdMapping的顺序
+    for planet_name in planetary_typeIdMapping.keys():
+        data_tuple.append(planet_counts.get(planet_name, 0))
+    
+    return tuple(data_tuple)
+
+def insert_universe_rows(cursor, universe_data: List[Tuple]):
+    """批量插入universe表"""
+    if not universe_data:
+        return
+    # 构建动态SQL语句
+    placeholders = ', '.join(['?' for _ in range(len(universe_data[0]))])
+    columns = [
+        'region_id', 'constellation_id', 'solarsystem_id', 
+        'system_security', 'system_type', 'x', 'y', 'z', 
+        'hasStation', 'hasJumpGate', 'isJSpace', 'jove'
+    ]
+    
+    # 添加行星类型列，按照planetary_typeIdMapping的顺序
+    for planet_name in planetary_typeIdMapping.keys():
+        columns.append(planet_name)
+    
+    columns_str = ', '.join(columns)
+    sql = f'INSERT OR REPLACE INTO universe ({columns_str}) VALUES ({placeholders})'
+    
+    batch_size = 1000
+    for i in range(0, len(universe_data), batch_size):
+        batch = universe_data[i:i + batch_size]
+        cursor.executemany(sql, batch)
+        logger.debug(f"已插入 {i + len(batch)}/{len(universe_data)} 条记录")
 
-def process_universe_data(data: dict, cursor=None, jove_systems: Set[str] = None) -> List[Tuple]:
-    """处理universe数据"""
+def process_universe_data(systems: Iterable[Dict], cursor=None, jove_systems: Set[str] = None) -> List[Tuple]:
+    """
+    处理universe数据
+
+    Args:
+        systems: 星系记录的可迭代对象，只遍历一次
+        cursor: 提供时直接插入universe表
+        jove_systems: Jove星系名称集合，默认读取jo.txt
+    """
     universe_data = []
     neighbour_count = 0
     
@@ -115,118 +229,19 @@ def process_universe_data(data: dict, cursor=None, jove_systems: Set[str] = None
     if jove_systems is None:
         jove_systems = read_jove_systems()
     
-    # 遍历所有星域
-    for region_id, region_info in data.items():
-        # 遍历星域下的所有星座
-        for const_id, const_info in region_info.get('constellations', {}).items():
-            # 遍历星座下的所有恒星系
-            for sys_id, sys_info in const_info.get('systems', {}).items():
-                # 获取安全等级
-                security_status = sys_info.get('system_info', {}).get('security_status', 0.0)
-                # 默认恒星类型为6（标准黄色恒星）
-                system_type = sys_info.get('system_info', {}).get('solar_type_id', 6)
-                
-                # 获取坐标
-                position = sys_info.get('system_info', {}).get('position', {})
-                x = position.get('x', 0.0)
-                y = position.get('y', 0.0)
-                z = position.get('z', 0.0)
-                
-                # 检查是否有空间站
-                stations = sys_info.get('system_info', {}).get('stations', [])
-                has_station = isinstance(stations, list) and len(stations) > 0
-                
-                # 检查是否有星门
-                jump_gates = sys_info.get('system_info', {}).get('stargates', [])
-                has_stargates = isinstance(jump_gates, list) and len(jump_gates) > 0
-                
-                # 检查是否为JSpace
-                system_name = sys_info.get('system_name', {}).get('en', '')
-                is_jspace = bool(jspace_pattern.match(system_name) or system_name == "J1226-0") and not has_stargates
-                
-                # 处理行星数据
-                planets = sys_info.get('system_info', {}).get('planets', {})
-                # 初始化所有行星类型的计数为0
-                planet_counts = {name: 0 for name in planetary_typeIdMapping.keys()}
-                
-                if isinstance(planets, dict):
-                    # 如果planets已经是按类型组织的字典
-                    for type_key, planet_list in planets.items():
-                        if type_key.startswith('type_'):
-                            try:
-                                planet_type = int(type_key.split('_')[1])
-                                # 只统计在planetary_typeIdMapping中定义的行星类型
-                                if planet_type in planet_type_to_name:
-                                    planet_name = planet_type_to_name[planet_type]
-                                    planet_counts[planet_name] = len(planet_list) if isinstance(planet_list, list) else 0
-                            except (ValueError, IndexError):
-                                logger.warning(f"无法解析行星类型: {type_key}")
-                elif isinstance(planets, list):
-                    # 如果planets是列表，按类型计数
-                    for planet in planets:
-                        if isinstance(planet, dict) and 'type_id' in planet:
-                            planet_type = planet['type_id']
-                            # 只统计在planetary_typeIdMapping中定义的行星类型
-                            if planet_type in planet_type_to_name:
-                                planet_name = planet_type_to_name[planet_type]
-                                planet_counts[planet_name] += 1
-                
-                # 检查是否为Jove星系
-                is_jove = system_name in jove_systems
-                
-                # 构建数据元组
-                data_tuple = [
-                    int(region_id),
-                    int(const_id),
-                    int(sys_id),
-                    float(security_status),
-                    system_type,
-                    float(x),
-                    float(y),
-                    float(z),
-                    has_station,
-                    has_stargates,
-                    is_jspace,
-                    is_jove
-                ]
-                
-                # 添加行星类型计数，按照planetary_typeIdMapping的顺序
-                for planet_name in planetary_typeIdMapping.keys():
-                    data_tuple.append(planet_counts.get(planet_name, 0))
-                
-                universe_data.append(tuple(data_tuple))
-                
-                # 处理邻居星系
-                system_info = sys_info.get('system_info', {})
-                if 'neighbours' in system_info:
-                    neighbours = system_info['neighbours']
-                    if neighbours:
-                        # 将邻居星系ID添加到字典中
-                        neighbours_data[str(sys_id)] = [int(neighbour) for neighbour in neighbours]
-                        neighbour_count += len(neighbours)
+    for record in systems:
+        universe_data.append(build_universe_row(record, jove_systems, jspace_pattern, planet_type_to_name))
+        
+        # 处理邻居星系
+        neighbours = record.get('system_info', {}).get('neighbours')
+        if neighbours:
+            # 将邻居星系ID添加到字典中
+            neighbours_data[str(record['system_id'])] = [int(neighbour) for neighbour in neighbours]
+            neighbour_count += len(neighbours)
     
     # 如果提供了cursor，执行批量插入
-    if cursor and universe_data:
-        # 构建动态SQL语句
-        placeholders = ', '.join(['?' for _ in range(len(universe_data[0]))])
-        columns = [
-            'region_id', 'constellation_id', 'solarsystem_id', 
-            'system_security', 'system_type', 'x', 'y', 'z', 
-            'hasStation', 'hasJumpGate', 'isJSpace', 'jove'
-        ]
-        
-        # 添加行星类型列，按照planetary_typeIdMapping的顺序
-        for planet_name in planetary_typeIdMapping.keys():
-            columns.append(planet_name)
-        
-        columns_str = ', '.join(columns)
-        sql = f'INSERT OR REPLACE INTO universe ({columns_str}) VALUES ({placeholders})'
-        
-        batch_size = 1000
-        for i in range(0, len(universe_data), batch_size):
-            batch = universe_data[i:i + batch_size]
-            cursor.executemany(sql, batch)
-            logger.debug(f"已插入 {i + len(batch)}/{len(universe_data)} 条记录")
+    if cursor:
+        insert_universe_rows(cursor, universe_data)
     
     # 保存邻居星系数据到JSON文件
     if neighbours_data:
@@ -252,68 +267,185 @@ def save_neighbours_to_json(neighbours_data: dict, output_file: str = 'output/db
     except Exception as e:
         logger.error(f"保存邻居星系数据失败: {str(e)}")
 
-def process_data(cursor, lang: str = 'en'):
-    """主处理函数"""
+def create_spatial_index(cursor):
+    """
+    基于universe表生成星系坐标的R*Tree空间索引（单位：光年）
+
+    每个星系是一个退化的包围盒（min == max），App端可以直接用范围查询找到
+    "N光年内的星系"，再用universe表中的精确坐标做距离过滤，参见 find_systems_in_range
+    """
+    cursor.execute('DROP TABLE IF EXISTS universe_rtree')
+    cursor.execute('''
+        CREATE VIRTUAL TABLE universe_rtree USING rtree(
+            solarsystem_id,
+            min_x, max_x,
+            min_y, max_y,
+            min_z, max_z
+        )
+    ''')
+    cursor.execute(f'''
+        INSERT INTO universe_rtree (solarsystem_id, min_x, max_x, min_y, max_y, min_z, max_z)
+        SELECT solarsystem_id,
+               x / {LIGHT_YEAR_METERS}.0, x / {LIGHT_YEAR_METERS}.0,
+               y / {LIGHT_YEAR_METERS}.0, y / {LIGHT_YEAR_METERS}.0,
+               z / {LIGHT_YEAR_METERS}.0, z / {LIGHT_YEAR_METERS}.0
+        FROM universe
+    ''')
+    logger.info(f"已为 {cursor.rowcount} 个星系创建空间索引 universe_rtree")
+
+# 以中心星系为原点的范围查询：先用R*Tree按包围盒筛选，再按精确坐标过滤距离
+SYSTEMS_IN_RANGE_SQL = f'''
+    SELECT u.solarsystem_id,
+           ((u.x - c.x) * (u.x - c.x) + (u.y - c.y) * (u.y - c.y) + (u.z - c.z) * (u.z - c.z))
+               / ({LIGHT_YEAR_METERS}.0 * {LIGHT_YEAR_METERS}.0) AS distance_sq_ly
+    FROM universe c
+    JOIN universe_rtree r
+      ON r.max_x >= c.x / {LIGHT_YEAR_METERS}.0 - :range AND r.min_x <= c.x / {LIGHT_YEAR_METERS}.0 + :range
+     AND r.max_y >= c.y / {LIGHT_YEAR_METERS}.0 - :range AND r.min_y <= c.y / {LIGHT_YEAR_METERS}.0 + :range
+     AND r.max_z >= c.z / {LIGHT_YEAR_METERS}.0 - :range AND r.min_z <= c.z / {LIGHT_YEAR_METERS}.0 + :range
+    JOIN universe u ON u.solarsystem_id = r.solarsystem_id
+    WHERE c.solarsystem_id = :system_id
+      AND u.solarsystem_id != :system_id
+      AND distance_sq_ly <= :range * :range
+    ORDER BY distance_sq_ly
+'''
+
+def find_systems_in_range(cursor, system_id: int, max_distance_ly: float) -> List[Tuple[int, float]]:
+    """
+    查询距离指定星系 max_distance_ly 光年以内的所有星系
+
+    Returns:
+        [(solarsystem_id, distance_ly), ...]，按距离升序
+    """
+    cursor.execute(SYSTEMS_IN_RANGE_SQL, {'system_id': system_id, 'range': float(max_distance_ly)})
+    return [(row[0], row[1] ** 0.5) for row in cursor.fetchall()]
+
+# 跳跃邻居表的参数，与 jump_navi_handler 的筛选条件一致
+JUMP_RANGE_LY = 10
+# 不能使用旗舰跳跃的星域
+JUMP_EXCLUDED_REGIONS = (10000019, 10000004, 10000017)
+# 距离按 0.001 光年取整后以整数保存
+JUMP_DISTANCE_SCALE = 1000
+
+def calculate_display_security(true_sec: float) -> float:
+    """计算显示用的安全等级"""
+    if 0.0 < true_sec < 0.05:
+        return 0.1  # 0.0到0.05之间向上取整到0.1
+    return round(true_sec * 10) / 10  # 其他情况四舍五入到小数点后一位
+
+def create_jump_neighbors_table(cursor, max_distance_ly: float = JUMP_RANGE_LY):
+    """
+    预计算可跳跃星系之间 max_distance_ly 光年以内的邻居，写入 jump_neighbors 表
+
+    表以 (source_id, distance, dest_id) 为主键且为 WITHOUT ROWID，数据按起点聚簇、
+    按距离有序，"某星系N光年内可跳到哪些星系"只需一次主键范围查询：
+        SELECT dest_id, distance, dest_security FROM jump_neighbors
+        WHERE source_id = ? AND distance <= ? * 1000
+    每对星系双向各存一行。distance 为 光年 * JUMP_DISTANCE_SCALE 的整数。
+    """
+    cursor.execute('DROP TABLE IF EXISTS jump_neighbors')
+    cursor.execute('''
+        CREATE TABLE jump_neighbors (
+            source_id INTEGER NOT NULL,
+            dest_id INTEGER NOT NULL,
+            distance INTEGER NOT NULL,  -- 光年 * 1000
+            dest_security REAL NOT NULL,  -- 目标星系的显示安全等级
+            PRIMARY KEY (source_id, distance, dest_id)
+        ) WITHOUT ROWID
+    ''')
+
+    # 符合跳跃条件的星系：低安/00、有星门、非虫洞、不在禁跳星域
+    cursor.execute(f'''
+        SELECT solarsystem_id, system_security
+        FROM universe
+        WHERE system_security < 0.5
+          AND hasJumpGate
+          AND NOT isJSpace
+          AND region_id NOT IN ({', '.join(map(str, JUMP_EXCLUDED_REGIONS))})
+    ''')
+    candidates = []
+    for system_id, security in cursor.fetchall():
+        display_sec = calculate_display_security(float(security))
+        if display_sec < 0.5:
+            candidates.append((system_id, display_sec))
+
+    cursor.execute('DROP TABLE IF EXISTS temp.jump_candidates')
+    cursor.execute('''
+        CREATE TEMP TABLE jump_candidates (
+            solarsystem_id INTEGER NOT NULL PRIMARY KEY,
+            security REAL NOT NULL
+        )
+    ''')
+    cursor.executemany('INSERT INTO jump_candidates VALUES (?, ?)', candidates)
+
+    # 用 universe_rtree 按包围盒筛选，再按精确坐标过滤距离
+    cursor.execute(f'''
+        SELECT source_id, dest_id, distance_sq_ly, dest_security
+        FROM (
+            SELECT c.solarsystem_id AS source_id,
+                   u.solarsystem_id AS dest_id,
+                   dest.security AS dest_security,
+                   ((u.x - c.x) * (u.x - c.x) + (u.y - c.y) * (u.y - c.y) + (u.z - c.z) * (u.z - c.z))
+                       / ({LIGHT_YEAR_METERS}.0 * {LIGHT_YEAR_METERS}.0) AS distance_sq_ly
+            FROM jump_candidates src
+            JOIN universe c ON c.solarsystem_id = src.solarsystem_id
+            JOIN universe_rtree r
+              ON r.max_x >= c.x / {LIGHT_YEAR_METERS}.0 - :range AND r.min_x <= c.x / {LIGHT_YEAR_METERS}.0 + :range
+             AND r.max_y >= c.y / {LIGHT_YEAR_METERS}.0 - :range AND r.min_y <= c.y / {LIGHT_YEAR_METERS}.0 + :range
+             AND r.max_z >= c.z / {LIGHT_YEAR_METERS}.0 - :range AND r.min_z <= c.z / {LIGHT_YEAR_METERS}.0 + :range
+            JOIN jump_candidates dest ON dest.solarsystem_id = r.solarsystem_id
+            JOIN universe u ON u.solarsystem_id = r.solarsystem_id
+            WHERE u.solarsystem_id != c.solarsystem_id
+        )
+        WHERE distance_sq_ly < :range * :range
+    ''', {'range': float(max_distance_ly)})
+    neighbor_rows = [
+        (source_id, dest_id, round(distance_sq_ly ** 0.5 * JUMP_DISTANCE_SCALE), dest_security)
+        for source_id, dest_id, distance_sq_ly, dest_security in cursor.fetchall()
+    ]
+    cursor.executemany(
+        'INSERT INTO jump_neighbors (source_id, dest_id, distance, dest_security) VALUES (?, ?, ?, ?)',
+        neighbor_rows
+    )
+    pair_count = len(neighbor_rows)
+    cursor.execute('DROP TABLE temp.jump_candidates')
+    logger.info(f"已为 {len(candidates)} 个可跳跃星系生成 {pair_count} 条跳跃邻居记录 (< {max_distance_ly} 光年)")
+
+def process_data(cursor, lang: str = 'en', systems: Iterable[Dict] = None):
+    """
+    主处理函数
+
+    Args:
+        cursor: 数据库游标
+        lang: 语言代码，英文库负责读取数据，其他语言复用缓存
+        systems: 可选，外部提供的星系记录（便于与名称处理共享同一次遍历）
+    """
     global _universe_data
     start_time = time.time()
     
     # 创建表
     create_table(cursor)
     
-    # 只在处理英文数据时读取文件
-    if lang == 'en':
-        logger.info("处理英文宇宙数据...")
-        _universe_data.clear()  # 清空缓存
-        
-        # 读取数据
-        data = read_universe_data()
-        if not data:
+    # 只在处理英文数据或外部提供了数据时读取
+    if lang == 'en' or systems is not None:
+        logger.info("处理宇宙数据...")
+        _universe_data = process_universe_data(systems if systems is not None else read_universe_data(), cursor)
+        if not _universe_data:
             logger.error("无法读取universe数据")
             return
-            
-        # 处理数据
-        _universe_data = process_universe_data(data, cursor)
         logger.info(f"缓存了 {len(_universe_data)} 条宇宙数据记录")
-    else:
+    elif _universe_data:
         # 使用缓存数据
-        if _universe_data:
-            logger.info(f"使用缓存数据插入 {len(_universe_data)} 条宇宙数据记录...")
-            
-            # 构建动态SQL语句
-            if _universe_data:
-                placeholders = ', '.join(['?' for _ in range(len(_universe_data[0]))])
-                
-                # 构建列名
-                columns = [
-                    'region_id', 'constellation_id', 'solarsystem_id', 
-                    'system_security', 'system_type', 'x', 'y', 'z', 
-                    'hasStation', 'hasJumpGate', 'isJSpace', 'jove'
-                ]
-                
-                # 添加行星类型列，按照planetary_typeIdMapping的顺序
-                for planet_name in planetary_typeIdMapping.keys():
-                    columns.append(planet_name)
-                
-                columns_str = ', '.join(columns)
-                sql = f'INSERT OR REPLACE INTO universe ({columns_str}) VALUES ({placeholders})'
-                
-                # 批量插入数据
-                batch_size = 1000
-                for i in range(0, len(_universe_data), batch_size):
-                    batch = _universe_data[i:i + batch_size]
-                    cursor.executemany(sql, batch)
-                    logger.debug(f"已插入 {i + len(batch)}/{len(_universe_data)} 条记录")
-            else:
-                logger.warning("没有找到有效的宇宙数据记录")
-            
-            # 重新读取数据以处理starmap
-            data = read_universe_data()
-            if data:
-                process_universe_data(data, cursor)
-            else:
-                logger.error("无法读取universe数据用于处理starmap")
-        else:
-            logger.warning("没有找到缓存的宇宙数据")
+        logger.info(f"使用缓存数据插入 {len(_universe_data)} 条宇宙数据记录...")
+        insert_universe_rows(cursor, _universe_data)
+    else:
+        logger.warning("没有找到缓存的宇宙数据")
+
+    # 生成坐标空间索引
+    create_spatial_index(cursor)
+
+    # 生成跳跃邻居表
+    create_jump_neighbors_table(cursor)
     
     end_time = time.time()
-    logger.info(f"处理universe数据耗时: {end_time - start_time:.2f} 秒") 
\ No newline at end of file
+    logger.info(f"处理universe数据耗时: {end_time - start_time:.2f} 秒")
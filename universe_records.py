@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+宇宙数据的流式记录格式（JSON Lines）
+
+fetchUniverse 的输出不再是一个带缩进的大JSON，而是每行一个星系的记录：
+    {"region_id": ..., "region_name": {...}, "constellation_id": ...,
+     "constellation_name": {...}, "system_id": ..., "system_name": {...}, "system_info": {...}}
+
+写入端逐条追加，读取端逐行解析并惰性产出，峰值内存与文件大小无关。
+为兼容旧数据，读取时如果只存在旧的 universe_data.json，会将其展开为同样的记录。
+"""
+import json
+import logging
+import os
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+UNIVERSE_JSONL_PATH = 'fetchUniverse/universe_data.jsonl'
+LEGACY_UNIVERSE_JSON_PATH = 'fetchUniverse/universe_data.json'
+
+
+class JsonLinesWriter:
+    """
+    逐条写入 JSON Lines 文件
+
+    先写入临时文件，正常退出上下文时再替换目标文件，中途失败不会留下半个文件。
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.tmp_path = f"{file_path}.tmp"
+        self.count = 0
+        self._file = None
+
+    def __enter__(self):
+        directory = os.path.dirname(self.file_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(self.tmp_path, 'w', encoding='utf-8')
+        return self
+
+    def write(self, record: Dict[str, Any]):
+        self._file.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')))
+        self._file.write('\n')
+        self.count += 1
+
+    def write_all(self, records: Iterable[Dict[str, Any]]):
+        for record in records:
+            self.write(record)
+
+    def __exit__(self, exc_type, exc, tb):
+        self._file.close()
+        if exc_type is None:
+            os.replace(self.tmp_path, self.file_path)
+        else:
+            os.remove(self.tmp_path)
+        return False
+
+
+def iter_jsonl(file_path: str) -> Iterator[Dict[str, Any]]:
+    """逐行读取 JSON Lines 文件，跳过空行"""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def flatten_universe(data: dict) -> Iterator[Dict[str, Any]]:
+    """将旧的 星域 → 星座 → 星系 嵌套结构展开为星系记录"""
+    for region_id, region_data in data.items():
+        for const_id, const_data in region_data.get('constellations', {}).items():
+            for sys_id, sys_data in const_data.get('systems', {}).items():
+                yield {
+                    'region_id': int(region_id),
+                    'region_name': region_data.get('region_name', {}),
+                    'constellation_id': int(const_id),
+                    'constellation_name': const_data.get('constellation_name', {}),
+                    'system_id': int(sys_id),
+                    'system_name': sys_data.get('system_name', {}),
+                    'system_info': sys_data.get('system_info', {})
+                }
+
+
+def iter_systems(file_path: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    惰性产出所有星系记录
+
+    Args:
+        file_path: JSON Lines 文件路径，默认 fetchUniverse/universe_data.jsonl；
+                   以 .json 结尾时按旧的嵌套格式读取
+    """
+    file_path = file_path or UNIVERSE_JSONL_PATH
+    if file_path.endswith('.json'):
+        with open(file_path, 'r', encoding='utf-8') as f:
+            yield from flatten_universe(json.load(f))
+        return
+
+    if not os.path.exists(file_path) and os.path.exists(LEGACY_UNIVERSE_JSON_PATH):
+        logger.warning(f"文件 {file_path} 不存在，回退到旧格式 {LEGACY_UNIVERSE_JSON_PATH}")
+        yield from iter_systems(LEGACY_UNIVERSE_JSON_PATH)
+        return
+
+    yield from iter_jsonl(file_path)
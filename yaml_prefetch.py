@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+SDE YAML 预读取
+
+YAML 解析是单线程、CPU 密集的，而各阶段写入数据库时 CPU 大部分在等待 SQLite。
+YamlPrefetcher 按阶段顺序在进程池中提前解析后面的文件，阶段需要数据时直接取已解析的结果，
+让 YAML 解析与数据库写入重叠进行：
+
+    plan = [(categories_yaml_file_path, read_categories_yaml), (groups_yaml_file_path, read_groups_yaml), ...]
+    with YamlPrefetcher(plan) as prefetcher:
+        data = prefetcher.get(categories_yaml_file_path, read_categories_yaml)
+
+- 同时最多提前解析 lookahead 个文件，已解析但尚未取走的结果占用的内存有上限
+- 不在计划中的文件直接在当前进程读取
+- read_func 必须是模块级函数（子进程按名称导入），返回值需要能被 pickle
+"""
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+
+class YamlPrefetcher:
+    def __init__(self, plan: Sequence[Tuple[str, Callable[[str], Any]]], lookahead: int = 3,
+                 workers: Optional[int] = None):
+        """
+        Args:
+            plan: [(文件路径, 读取函数), ...]，按各阶段使用的顺序排列
+            lookahead: 同时提前解析的文件数
+            workers: 进程数，默认为 min(lookahead, CPU 核数)
+        """
+        self._plan: List[Tuple[str, Callable[[str], Any]]] = list(plan)
+        self._lookahead = max(1, lookahead)
+        self._futures: Dict[str, Future] = {}
+        self._executor = ProcessPoolExecutor(max_workers=workers or min(self._lookahead, os.cpu_count() or 1))
+        self._fill()
+
+    def _fill(self):
+        """补充提交计划中的文件，直到进行中和待取走的任务数达到 lookahead"""
+        while self._plan and len(self._futures) < self._lookahead:
+            file_path, read_func = self._plan.pop(0)
+            self._futures[file_path] = self._executor.submit(read_func, file_path)
+
+    def get(self, file_path: str, read_func: Callable[[str], Any]) -> Any:
+        """取得文件的解析结果，文件不在计划中时直接读取"""
+        future = self._futures.pop(file_path, None)
+        if future is None:
+            # 计划中尚未提交的文件，从计划中移除，避免之后重复解析
+            self._plan = [(path, func) for path, func in self._plan if path != file_path]
+            self._fill()
+            return read_func(file_path)
+        try:
+            return future.result()
+        finally:
+            self._fill()
+
+    def close(self):
+        """取消尚未开始的解析并关闭进程池"""
+        self._plan.clear()
+        for future in self._futures.values():
+            future.cancel()
+        self._futures.clear()
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
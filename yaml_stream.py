@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""
+SDE YAML 流式读取
+
+基于 PyYAML 的事件接口（有 libyaml 时使用 C 解析器）逐条产出记录，不构建整个文档树，
+峰值内存与单条记录大小相关，而不是与文件大小相关。
+
+- iter_sequence_rows: 顶层为列表、每项为扁平映射的文件（如 bsd/invNames.yaml），
+  逐项产出指定字段组成的元组，可以在读取时按字段过滤，被过滤的记录不会组装成记录返回给调用方
+- iter_mapping_items: 顶层为映射的文件（如 fsd/types.yaml、fsd/typeDogma.yaml），逐条产出 (键, 值)，
+  值按 SafeLoader 的规则构建为 dict / list / 标量
+- iter_mapping_batches: 在 iter_mapping_items 基础上每 batch_size 条组成一个 dict，
+  供按 data.items() 处理整份数据的处理器分批调用，峰值内存与批大小相关
+"""
+import re
+from typing import Any, Callable, Dict, Iterator, Optional, Sequence, Tuple
+
+import yaml
+
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+# 标量按 SafeLoader 的规则解析：隐式标签由 YAML 1.1 解析器确定（null、bool、十进制/八进制/十六进制/六十进制整数、
+# 浮点数、时间戳等），再由 SafeConstructor 中对应标签的构造函数转换
+_resolver = yaml.resolver.Resolver()
+_constructor = yaml.constructor.SafeConstructor()
+STR_TAG = 'tag:yaml.org,2002:str'
+
+# SDE 中绝大多数标量为 null / bool、十进制整数、浮点数或普通文本，直接转换，结果与 SafeConstructor 相同
+KEYWORD_VALUES = {
+    '': None, '~': None, 'null': None, 'Null': None, 'NULL': None,
+    'yes': True, 'Yes': True, 'YES': True, 'true': True, 'True': True, 'TRUE': True, 'on': True, 'On': True, 'ON': True,
+    'no': False, 'No': False, 'NO': False, 'false': False, 'False': False, 'FALSE': False, 'off': False, 'Off': False,
+    'OFF': False,
+}
+INT_PATTERN = re.compile(r'^[-+]?(0|[1-9][0-9_]*)$')
+FLOAT_PATTERN = re.compile(r'^[-+]?[0-9][0-9_]*\.[0-9_]*([eE][-+][0-9]+)?$')
+
+
+def scalar_value(event: yaml.ScalarEvent):
+    """按 SafeLoader 的规则解析标量，结果与 yaml.safe_load 相同；未知的显式标签抛出 ConstructorError"""
+    value = event.value
+    # implicit[0] 为 True 表示无引号、无显式标签的普通标量
+    if event.implicit[0]:
+        if value in KEYWORD_VALUES:
+            return KEYWORD_VALUES[value]
+        if INT_PATTERN.match(value):
+            return int(value.replace('_', ''))
+        if FLOAT_PATTERN.match(value):
+            return float(value.replace('_', ''))
+        # 首字符没有对应的隐式解析规则时只能是字符串
+        if value and value[0] not in _resolver.yaml_implicit_resolvers:
+            return value
+
+    tag = event.tag
+    if tag is None or tag == '!':
+        tag = _resolver.resolve(yaml.ScalarNode, value, event.implicit)
+    if tag == STR_TAG:
+        return value
+    # 直接调用构造函数而不是 construct_object，避免构造器缓存每个节点
+    construct = _constructor.yaml_constructors.get(tag, _constructor.yaml_constructors[None])
+    return construct(_constructor, yaml.ScalarNode(tag, value, event.start_mark, event.end_mark, event.style))
+
+
+def _construct(event, events: Iterator):
+    """从当前事件开始读取一个完整的节点，构建为 dict / list / 标量"""
+    if isinstance(event, yaml.ScalarEvent):
+        return scalar_value(event)
+    if isinstance(event, yaml.MappingStartEvent):
+        mapping = {}
+        for key_event in events:
+            if isinstance(key_event, yaml.MappingEndEvent):
+                return mapping
+            key = _construct(key_event, events)
+            mapping[key] = _construct(next(events), events)
+    if isinstance(event, yaml.SequenceStartEvent):
+        items = []
+        for item_event in events:
+            if isinstance(item_event, yaml.SequenceEndEvent):
+                return items
+            items.append(_construct(item_event, events))
+    if isinstance(event, yaml.AliasEvent):
+        raise ValueError(f"不支持 YAML 锚点和别名: {event.start_mark}")
+    raise ValueError(f"意外的 YAML 事件: {event}")
+
+
+def iter_mapping_items(file_path: str) -> Iterator[Tuple[Any, Any]]:
+    """
+    逐条读取顶层为映射的 YAML 文件
+
+    Yields:
+        (键, 值)，与 yaml.safe_load 得到的 dict 中的条目相同（不支持锚点和别名），按文件中的顺序产出
+    """
+    with open(file_path, 'r', encoding='utf-8') as file:
+        events = yaml.parse(file, Loader=SafeLoader)
+        for event in events:
+            if isinstance(event, yaml.MappingStartEvent):
+                break
+        else:
+            return
+
+        for key_event in events:
+            if isinstance(key_event, yaml.MappingEndEvent):
+                return
+            key = _construct(key_event, events)
+            yield key, _construct(next(events), events)
+
+
+def iter_mapping_batches(file_path: str, batch_size: int = 5000) -> Iterator[Dict[Any, Any]]:
+    """把 iter_mapping_items 的条目每 batch_size 条组成一个 dict 产出"""
+    batch = {}
+    for key, value in iter_mapping_items(file_path):
+        batch[key] = value
+        if len(batch) >= batch_size:
+            yield batch
+            batch = {}
+    if batch:
+        yield batch
+
+
+def iter_sequence_rows(file_path: str, fields: Sequence[str],
+                       filters: Optional[Dict[str, Callable[[Any], bool]]] = None) -> Iterator[Tuple]:
+    """
+    逐项读取顶层为列表的 YAML 文件
+
+    Args:
+        file_path: YAML 文件路径
+        fields: 每项需要的字段，按该顺序产出元组，缺失的字段为 None
+        filters: 可选，{字段: 判断函数}，读到该字段时立即判断，不保留的记录跳过其余字段
+
+    Yields:
+        (field1, field2, ...) 元组
+    """
+    positions = {field: i for i, field in enumerate(fields)}
+    filters = filters or {}
+    with open(file_path, 'r', encoding='utf-8') as file:
+        events = yaml.parse(file, Loader=SafeLoader)
+        for event in events:
+            if isinstance(event, yaml.SequenceStartEvent):
+                break
+        else:
+            return
+
+        depth = 0
+        row = None
+        key = None
+        skip = False
+        for event in events:
+            if depth == 0:
+                if isinstance(event, yaml.MappingStartEvent):
+                    depth, row, key, skip = 1, [None] * len(fields), None, False
+                elif isinstance(event, yaml.SequenceEndEvent):
+                    return
+                continue
+
+            if depth == 1:
+                if isinstance(event, yaml.MappingEndEvent):
+                    depth = 0
+                    if not skip:
+                        yield tuple(row)
+                elif isinstance(event, yaml.ScalarEvent):
+                    if key is None:
+                        key = event.value
+                        continue
+                    if not skip and key in positions:
+                        value = scalar_value(event)
+                        row[positions[key]] = value
+                        if key in filters and not filters[key](value):
+                            skip = True
+                    key = None
+                elif isinstance(event, (yaml.MappingStartEvent, yaml.SequenceStartEvent)):
+                    # 嵌套结构不属于扁平记录，跳过整个值
+                    depth += 1
+                continue
+
+            # depth > 1：跳过嵌套值
+            if isinstance(event, (yaml.MappingStartEvent, yaml.SequenceStartEvent)):
+                depth += 1
+            elif isinstance(event, (yaml.MappingEndEvent, yaml.SequenceEndEvent)):
+                depth -= 1
+                if depth == 1:
+                    key = None
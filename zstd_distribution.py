@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+"""
+zstd 数据库分发包
+
+各语言数据库的大部分内容（属性、蓝图、星系等）相同，分别用 ZIP_DEFLATED 压缩时无法利用这一点。
+这里用 zstd 压缩所有语言的数据库，并让它们共享同一份字典：
+- dictionary: 从所有语言数据库中抽样页面训练一份共享字典（item_db.zstdict），所有数据库都用它压缩
+- reference: 以英文数据库原文作为其他语言的字典，其他语言只需保存与英文数据库的差异部分，
+  客户端需要先解压英文数据库，再用它解压其他语言
+
+两种模式都开启长距离匹配（LDM），窗口覆盖整个数据库文件，各数据库并行压缩。
+压缩完成后逐个解压校验 sha256，并报告压缩比和解压速度：
+    python zstd_distribution.py                    # 默认 dictionary 模式
+    python zstd_distribution.py --mode reference
+
+输出 output/db/item_db_{lang}.sqlite.zst 和 item_db_zstd.json（模式、参数、每个文件的大小和 sha256）。
+需要 zstandard（pip install zstandard）。
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+import zstandard as zstd
+
+# 支持的语言列表，en 为 reference 模式的参考数据库
+LANGUAGES = ['en', 'de', 'es', 'fr', 'ja', 'ko', 'ru', 'zh']
+
+output_db_dir = 'output/db'
+
+DICTIONARY_FILENAME = 'item_db.zstdict'
+MANIFEST_FILENAME = 'item_db_zstd.json'
+
+ZSTD_LEVEL = 19
+# 共享字典大小和每个数据库抽样的页数
+DICT_SIZE = 256 * 1024
+SAMPLE_PAGES_PER_DB = 2000
+# 窗口上限（128MB），解压时需要同样大小的内存
+ZSTD_WINDOW_LOG_MAX = 27
+
+
+def read_page_size(data: bytes) -> int:
+    """SQLite 文件头偏移 16 处的页大小，1 表示 65536"""
+    page_size = int.from_bytes(data[16:18], 'big')
+    return 65536 if page_size == 1 else page_size or 4096
+
+
+def sample_pages(data: bytes, max_samples: int = SAMPLE_PAGES_PER_DB) -> List[bytes]:
+    """均匀抽样数据库页面作为字典训练样本，跳过全零页"""
+    page_size = read_page_size(data)
+    page_count = len(data) // page_size
+    step = max(1, page_count // max_samples)
+    pages = (data[i * page_size:(i + 1) * page_size] for i in range(0, page_count, step))
+    return [page for page in pages if page.strip(b'\x00')]
+
+
+def window_log(size: int) -> int:
+    """覆盖整个文件的窗口大小，限制在 zstd 最小值和 ZSTD_WINDOW_LOG_MAX 之间"""
+    return max(zstd.WINDOWLOG_MIN, min(ZSTD_WINDOW_LOG_MAX, math.ceil(math.log2(max(size, 1)))))
+
+
+def compress_file(src_path: str, dst_path: str, dict_data: Optional[zstd.ZstdCompressionDict],
+                  level: int = ZSTD_LEVEL) -> dict:
+    """压缩单个数据库，返回大小、sha256 和耗时"""
+    with open(src_path, 'rb') as f:
+        data = f.read()
+
+    start_time = time.time()
+    params = zstd.ZstdCompressionParameters.from_level(
+        level, source_size=len(data), window_log=window_log(len(data)), enable_ldm=True
+    )
+    compressed = zstd.ZstdCompressor(compression_params=params, dict_data=dict_data).compress(data)
+    seconds = time.time() - start_time
+
+    with open(dst_path, 'wb') as f:
+        f.write(compressed)
+    return {
+        'size': len(data),
+        'compressed_size': len(compressed),
+        'sha256': hashlib.sha256(data).hexdigest(),
+        'compress_seconds': round(seconds, 3),
+    }
+
+
+def decompress_file(path: str, dict_data: Optional[zstd.ZstdCompressionDict] = None) -> bytes:
+    with open(path, 'rb') as f:
+        compressed = f.read()
+    decompressor = zstd.ZstdDecompressor(dict_data=dict_data, max_window_size=1 << ZSTD_WINDOW_LOG_MAX)
+    return decompressor.decompress(compressed)
+
+
+def verify_file(path: str, entry: dict, dict_data: Optional[zstd.ZstdCompressionDict] = None) -> float:
+    """
+    解压并校验 sha256
+
+    Returns:
+        解压速度（MB/s）
+    """
+    start_time = time.time()
+    data = decompress_file(path, dict_data)
+    seconds = max(time.time() - start_time, 1e-9)
+    if len(data) != entry['size'] or hashlib.sha256(data).hexdigest() != entry['sha256']:
+        raise ValueError(f"解压校验失败: {path}")
+    return len(data) / (1024 * 1024) / seconds
+
+
+def compress_databases(db_dir: str = output_db_dir, languages: Sequence[str] = LANGUAGES,
+                       mode: str = 'dictionary', level: int = ZSTD_LEVEL,
+                       workers: Optional[int] = None, remove_source: bool = False) -> dict:
+    """
+    并行压缩所有语言的数据库，校验后写入清单
+
+    Args:
+        mode: dictionary（共享训练字典）或 reference（以英文数据库为字典）
+        remove_source: 压缩并校验成功后删除原数据库
+    """
+    if mode not in ('dictionary', 'reference'):
+        raise ValueError(f"不支持的模式: {mode}")
+    db_paths = {
+        lang: os.path.join(db_dir, f'item_db_{lang}.sqlite') for lang in languages
+        if os.path.exists(os.path.join(db_dir, f'item_db_{lang}.sqlite'))
+    }
+    if not db_paths:
+        raise FileNotFoundError(f"{db_dir} 中没有找到数据库")
+    if mode == 'reference' and 'en' not in db_paths:
+        raise FileNotFoundError("reference 模式需要英文数据库")
+
+    # 准备字典：dictionary 模式下所有数据库使用同一份字典；reference 模式下英文数据库不使用字典
+    dicts: Dict[str, Optional[zstd.ZstdCompressionDict]] = {}
+    dictionary_file = None
+    if mode == 'dictionary':
+        start_time = time.time()
+        samples = []
+        for db_path in db_paths.values():
+            with open(db_path, 'rb') as f:
+                samples.extend(sample_pages(f.read()))
+        shared_dict = zstd.train_dictionary(DICT_SIZE, samples, level=level)
+        dictionary_file = DICTIONARY_FILENAME
+        with open(os.path.join(db_dir, dictionary_file), 'wb') as f:
+            f.write(shared_dict.as_bytes())
+        print(f"共享字典训练完成: {len(samples)} 个样本页，字典 {len(shared_dict.as_bytes()) / 1024:.0f}KB，"
+              f"耗时 {time.time() - start_time:.2f} 秒")
+        dicts = {lang: shared_dict for lang in db_paths}
+    else:
+        # 清理之前 dictionary 模式留下的字典
+        if os.path.exists(os.path.join(db_dir, DICTIONARY_FILENAME)):
+            os.remove(os.path.join(db_dir, DICTIONARY_FILENAME))
+        with open(db_paths['en'], 'rb') as f:
+            reference = zstd.ZstdCompressionDict(f.read(), dict_type=zstd.DICT_TYPE_RAWCONTENT)
+        dicts = {lang: None if lang == 'en' else reference for lang in db_paths}
+
+    def compress(lang):
+        return lang, compress_file(db_paths[lang], f'{db_paths[lang]}.zst', dicts[lang], level)
+
+    # zstd 压缩时释放 GIL，线程即可并行
+    with ThreadPoolExecutor(max_workers=workers or len(db_paths)) as executor:
+        entries = dict(executor.map(compress, db_paths))
+
+    for lang, entry in entries.items():
+        entry['decompress_mb_per_second'] = round(verify_file(f'{db_paths[lang]}.zst', entry, dicts[lang]), 1)
+
+    manifest = {
+        'mode': mode,
+        'level': level,
+        'dictionary': dictionary_file,
+        'reference': 'en' if mode == 'reference' else None,
+        'files': {lang: dict(entry, file=f'item_db_{lang}.sqlite.zst') for lang, entry in entries.items()},
+    }
+    with open(os.path.join(db_dir, MANIFEST_FILENAME), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    if remove_source:
+        for db_path in db_paths.values():
+            os.remove(db_path)
+    return manifest
+
+
+def print_report(manifest: dict):
+    """打印每个数据库的压缩比和解压速度"""
+    print(f"\n{'语言':<6}{'原大小':>12}{'压缩后':>12}{'压缩比':>10}{'压缩耗时':>12}{'解压速度':>14}")
+    total_size = total_compressed = 0
+    for lang, entry in manifest['files'].items():
+        total_size += entry['size']
+        total_compressed += entry['compressed_size']
+        print(f"{lang:<6}{entry['size'] / 1024 / 1024:>10.2f}MB{entry['compressed_size'] / 1024 / 1024:>10.2f}MB"
+              f"{entry['size'] / entry['compressed_size']:>10.2f}{entry['compress_seconds']:>11.2f}s"
+              f"{entry['decompress_mb_per_second']:>10.1f}MB/s")
+    if total_compressed:
+        print(f"合计: {total_size / 1024 / 1024:.2f}MB -> {total_compressed / 1024 / 1024:.2f}MB，"
+              f"压缩比 {total_size / total_compressed:.2f}（{manifest['mode']} 模式）")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='用共享字典的 zstd 压缩各语言数据库')
+    parser.add_argument('--db-dir', default=output_db_dir, help='数据库目录')
+    parser.add_argument('--mode', choices=['dictionary', 'reference'], default='dictionary', help='字典模式')
+    parser.add_argument('--level', type=int, default=ZSTD_LEVEL, help='zstd 压缩级别')
+    parser.add_argument('--remove-source', action='store_true', help='压缩并校验后删除原数据库')
+    args = parser.parse_args(argv)
+
+    manifest = compress_databases(args.db_dir, mode=args.mode, level=args.level, remove_source=args.remove_source)
+    print_report(manifest)
+
+
+if __name__ == "__main__":
+    main()